@@ -30,6 +30,7 @@ import functools
 import collections
 import inspect
 from datetime import datetime
+from types import ModuleType
 from six import string_types
 
 # Ignore emacs backups when listing modules
@@ -460,3 +461,59 @@ class ObjectWrapper(object):
         wrapped_name = wrapped_cls.__name__
         self.__class__ = type(wrapped_name, (type(self), wrapped_cls), {})
         self.__dict__ = wrapped_object.__dict__
+
+
+class LazyModule(ModuleType):
+    """Module with attributes that are computed on first access.
+
+    Python 2 has no module-level ``__getattr__``, so a module that wants
+    lazy attributes replaces itself in ``sys.modules`` with an instance
+    of this class::
+
+        module = LazyModule(sys.modules[__name__])
+        sys.modules[__name__] = module
+        module.add_lazy_attribute('editor', find_editor)
+
+    The wrapper starts with a copy of the module's namespace.  Globals
+    the module defines later are looked up in the wrapped module, so the
+    rest of its body can run unchanged.
+
+    Lazy attributes take precedence over submodules of the same name:
+    importing the submodule does not overwrite them.
+    """
+    def __init__(self, module):
+        super(LazyModule, self).__init__(module.__name__, module.__doc__)
+        self.__dict__.update(module.__dict__)
+        self.__dict__['_wrapped_module'] = module
+        self.__dict__['_lazy_attributes'] = {}
+        self.__dict__['_lazy_names'] = set()
+
+    def add_lazy_attribute(self, name, factory):
+        """Compute attribute ``name`` by calling ``factory()`` on first
+        access.  Assigning to the attribute overrides the factory."""
+        self._lazy_attributes[name] = factory
+        self._lazy_names.add(name)
+        self.__dict__.pop(name, None)
+
+    def __getattr__(self, name):
+        # Only called when regular attribute lookup fails.
+        lazy_attributes = self.__dict__['_lazy_attributes']
+        if name in lazy_attributes:
+            value = lazy_attributes[name]()
+            lazy_attributes.pop(name, None)
+        else:
+            value = getattr(self.__dict__['_wrapped_module'], name)
+        self.__dict__[name] = value
+        return value
+
+    def __setattr__(self, name, value):
+        # The import system sets submodules as attributes of their parent.
+        submodule_name = '%s.%s' % (self.__name__, name)
+        if (name in self._lazy_names and isinstance(value, ModuleType) and
+                value.__name__ == submodule_name):
+            return
+        self._lazy_attributes.pop(name, None)
+        super(LazyModule, self).__setattr__(name, value)
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(self._lazy_attributes))
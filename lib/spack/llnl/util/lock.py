@@ -41,6 +41,13 @@ _default_timeout = 60
 # Sleep time per iteration in spin loop (in seconds)
 _sleep_time = 1e-5
 
+#: Lock files open in this process, by path, as ``[file, users]``.  POSIX
+#: locks belong to a process, and closing *any* descriptor of a file
+#: releases all of the process's locks on it.  So all Locks on a file,
+#: e.g. on different byte ranges, share one descriptor, and it is only
+#: closed when none of them holds a lock anymore.
+_open_files = {}
+
 
 class Lock(object):
     """This is an implementation of a filesystem lock using Python's lockf.
@@ -86,10 +93,12 @@ class Lock(object):
         pid and host to the lock file, in case the holding process needs
         to be killed later.
 
-        If the lock times out, it raises a ``LockError``.
+        If the lock times out, it raises a ``LockError``.  The lock is
+        tried at least once, so a ``timeout`` of 0 makes a non-blocking
+        attempt.
         """
         start_time = time.time()
-        while (time.time() - start_time) < timeout:
+        while True:
             try:
                 # If we could write the file, we'd have opened it 'r+'.
                 # Raise an error when we attempt to upgrade to a write lock.
@@ -99,20 +108,8 @@ class Lock(object):
                             "Can't take exclusive lock on read-only file: %s"
                             % self.path)
 
-                # Create file and parent directories if they don't exist.
                 if self._file is None:
-                    self._ensure_parent_directory()
-
-                    # Prefer to open 'r+' to allow upgrading to write
-                    # lock later if possible.  Open read-only if we can't
-                    # write the lock file at all.
-                    os_mode, fd_mode = (os.O_RDWR | os.O_CREAT), 'r+'
-                    if os.path.exists(self.path) and not os.access(
-                            self.path, os.W_OK):
-                        os_mode, fd_mode = os.O_RDONLY, 'r'
-
-                    fd = os.open(self.path, os_mode)
-                    self._file = os.fdopen(fd, fd_mode)
+                    self._file = self._open_file()
 
                 # Try to get the lock (will raise if not available.)
                 fcntl.lockf(self._file, op | fcntl.LOCK_NB,
@@ -133,10 +130,46 @@ class Lock(object):
                     pass
                 else:
                     raise
+
+            if time.time() - start_time >= timeout:
+                break
             time.sleep(_sleep_time)
 
+        # Don't keep the file open for a lock we don't hold
+        if self._file is not None and not (self._reads or self._writes):
+            self._close_file()
         raise LockError("Timed out waiting for lock.")
 
+    def _open_file(self):
+        """Open the lock file, or share this process's open copy of it."""
+        key = os.path.abspath(self.path)
+        if key in _open_files:
+            _open_files[key][1] += 1
+            return _open_files[key][0]
+
+        # Create file and parent directories if they don't exist.
+        self._ensure_parent_directory()
+
+        # Prefer to open 'r+' to allow upgrading to write lock later if
+        # possible.  Open read-only if we can't write the lock file at all.
+        os_mode, fd_mode = (os.O_RDWR | os.O_CREAT), 'r+'
+        if os.path.exists(self.path) and not os.access(self.path, os.W_OK):
+            os_mode, fd_mode = os.O_RDONLY, 'r'
+
+        fd = os.open(self.path, os_mode)
+        lock_file = os.fdopen(fd, fd_mode)
+        _open_files[key] = [lock_file, 1]
+        return lock_file
+
+    def _close_file(self):
+        """Close the lock file, unless other Locks in this process use it."""
+        key = os.path.abspath(self.path)
+        _open_files[key][1] -= 1
+        if not _open_files[key][1]:
+            del _open_files[key]
+            self._file.close()
+        self._file = None
+
     def _ensure_parent_directory(self):
         parent = os.path.dirname(self.path)
         try:
@@ -150,6 +183,7 @@ class Lock(object):
 
     def _read_lock_data(self):
         """Read PID and host data out of the file if it is there."""
+        self._file.seek(0)
         line = self._file.read()
         if line:
             pid, host = line.strip().split(',')
@@ -180,8 +214,7 @@ class Lock(object):
         """
         fcntl.lockf(self._file, fcntl.LOCK_UN,
                     self._length, self._start, os.SEEK_SET)
-        self._file.close()
-        self._file = None
+        self._close_file()
 
     def acquire_read(self, timeout=_default_timeout):
         """Acquires a recursive, shared lock for reading.
@@ -230,11 +263,12 @@ class Lock(object):
             self._writes += 1
             return False
 
-    def release_read(self):
+    def release_read(self, release_fn=None):
         """Releases a read lock.
 
         Returns True if the last recursive lock was released, False if
-        there are still outstanding locks.
+        there are still outstanding locks.  If the last lock is released,
+        ``release_fn`` is called first, while the lock is still held.
 
         Does limited correctness checking: if a read lock is released
         when none are held, this will raise an assertion error.
@@ -245,18 +279,23 @@ class Lock(object):
         if self._reads == 1 and self._writes == 0:
             tty.debug('READ LOCK: {0.path}[{0._start}:{0._length}] [Released]'
                       .format(self))
-            self._unlock()      # can raise LockError.
-            self._reads -= 1
+            try:
+                if release_fn is not None:
+                    release_fn()
+            finally:
+                self._unlock()      # can raise LockError.
+                self._reads -= 1
             return True
         else:
             self._reads -= 1
             return False
 
-    def release_write(self):
+    def release_write(self, release_fn=None):
         """Releases a write lock.
 
         Returns True if the last recursive lock was released, False if
-        there are still outstanding locks.
+        there are still outstanding locks.  If the last lock is released,
+        ``release_fn`` is called first, while the lock is still held.
 
         Does limited correctness checking: if a read lock is released
         when none are held, this will raise an assertion error.
@@ -267,8 +306,12 @@ class Lock(object):
         if self._writes == 1 and self._reads == 0:
             tty.debug('WRITE LOCK: {0.path}[{0._start}:{0._length}] [Released]'
                       .format(self))
-            self._unlock()      # can raise LockError.
-            self._writes -= 1
+            try:
+                if release_fn is not None:
+                    release_fn()
+            finally:
+                self._unlock()      # can raise LockError.
+                self._writes -= 1
             return True
         else:
             self._writes -= 1
@@ -311,15 +354,19 @@ class LockTransaction(object):
                 return self._as
 
     def __exit__(self, type, value, traceback):
-        suppress = False
-        if self._exit():
-            if self._as and hasattr(self._as, '__exit__'):
-                if self._as.__exit__(type, value, traceback):
-                    suppress = True
+        suppress = []
+
+        def release_fn():
             if self._release_fn:
-                if self._release_fn(type, value, traceback):
-                    suppress = True
-        return suppress
+                suppress.append(self._release_fn(type, value, traceback))
+
+        # Exit the nested context manager and call release_fn while the
+        # lock is still held, so that e.g. files they write are updated
+        # atomically.
+        if self._as and hasattr(self._as, '__exit__'):
+            suppress.append(self._as.__exit__(type, value, traceback))
+        self._exit(release_fn)
+        return any(suppress)
 
 
 class ReadTransaction(LockTransaction):
@@ -327,8 +374,8 @@ class ReadTransaction(LockTransaction):
     def _enter(self):
         return self._lock.acquire_read(self._timeout)
 
-    def _exit(self):
-        return self._lock.release_read()
+    def _exit(self, release_fn):
+        return self._lock.release_read(release_fn)
 
 
 class WriteTransaction(LockTransaction):
@@ -336,8 +383,8 @@ class WriteTransaction(LockTransaction):
     def _enter(self):
         return self._lock.acquire_write(self._timeout)
 
-    def _exit(self):
-        return self._lock.release_write()
+    def _exit(self, release_fn):
+        return self._lock.release_write(release_fn)
 
 
 class LockError(Exception):
@@ -24,11 +24,13 @@
 ##############################################################################
 """Utility classes for logging the output of blocks of code.
 """
+import codecs
 import multiprocessing
 import os
 import re
 import select
 import sys
+import time
 import traceback
 from contextlib import contextmanager
 from six import string_types
@@ -47,6 +49,15 @@ _escape = re.compile(r'\x1b[^m]*m|\x1b\[?1034h')
 xon, xoff = '\x11\n', '\x13\n'
 control = re.compile('(\x11\n|\x13\n)')
 
+# Most output the writer daemon reads from the pipe at once
+_chunk_size = 65536
+
+# Longest line the writer daemon keeps back until it sees a newline
+_max_line = 65536
+
+# Longest time, in seconds, that output may sit unflushed in the log file
+_flush_interval = 0.5
+
 
 def _strip(line):
     """Strip color and control characters from a line."""
@@ -430,64 +441,117 @@ class log_output(object):
         sys.stdout.flush()
 
     def _writer_daemon(self, stdin):
-        """Daemon that writes output to the log file and stdout."""
-        # Use line buffering (3rd param = 1) since Python 3 has a bug
-        # that prevents unbuffered text I/O.
-        in_pipe = os.fdopen(self.read_fd, 'r', 1)
+        """Daemon that writes output to the log file and stdout.
+
+        The daemon sleeps in ``select()`` until there is output or a
+        keypress, and reads whatever output is in the pipe at once, so it
+        takes little CPU time even for very noisy builds.  Output is
+        echoed as soon as it is read, but the log file is only flushed
+        when the output pauses, or every ``_flush_interval`` seconds.
+        """
         os.close(self.write_fd)
+        in_fd = self.read_fd
+
+        # Output is read as bytes.  Python 3 needs it decoded, which has
+        # to be done incrementally, as characters may span two reads.
+        decoder = None
+        if sys.version_info[0] >= 3:
+            decoder = codecs.getincrementaldecoder('utf-8')('replace')
 
         echo = self.echo        # initial echo setting, user-controllable
         force_echo = False      # parent can force echo for certain output
 
-        # list of streams to select from
-        istreams = [in_pipe, stdin] if stdin else [in_pipe]
+        # file descriptors to select from
+        stdin_fd = stdin.fileno() if stdin else None
+        ifds = [in_fd, stdin_fd] if stdin else [in_fd]
+
+        held = ''               # start of a control sequence split by a read
+        pending = ''            # output after the last complete line
+        last_flush = time.time()
+        unflushed = False
 
         log_file = self.log_file
         try:
             with keyboard_input(stdin):
                 while True:
-                    # Without the last parameter (timeout) select will
-                    # wait until at least one of the two streams are
-                    # ready. This may cause the function to hang.
-                    rlist, _, xlist = select.select(istreams, [], [], 0)
+                    # Only wake up on a timeout if the log needs a flush.
+                    timeout = _flush_interval if unflushed else None
+                    rlist, _, _ = select.select(ifds, [], [], timeout)
+                    if not rlist:
+                        # Output paused; write out what we have.
+                        log_file.flush()
+                        last_flush = time.time()
+                        unflushed = False
+                        continue
 
                     # Allow user to toggle echo with 'v' key.
                     # Currently ignores other chars.
-                    if stdin in rlist:
-                        if stdin.read(1) == 'v':
+                    if stdin_fd in rlist:
+                        key = os.read(stdin_fd, 1)
+                        if not key:
+                            ifds.remove(stdin_fd)  # EOF; stop watching
+                        elif key == b'v':
                             echo = not echo
 
                     # Handle output from the with block process.
-                    if in_pipe in rlist:
-                        # If we arrive here it means that in_pipe was
-                        # ready for reading : it should never happen that
-                        # line is false-ish
-                        line = in_pipe.readline()
-                        if not line:
-                            break  # EOF
-
-                        # find control characters and strip them.
-                        controls = control.findall(line)
-                        line = re.sub(control, '', line)
-
-                        # Echo to stdout if requested or forced
-                        if echo or force_echo:
-                            sys.stdout.write(line)
-                            sys.stdout.flush()
-
-                        # Stripped output to log file.
-                        log_file.write(_strip(line))
+                    if in_fd not in rlist:
+                        continue
+
+                    data = os.read(in_fd, _chunk_size)
+                    eof = not data
+                    if decoder:
+                        data = decoder.decode(data, final=eof)
+                    text = held + data
+
+                    # Keep a control character back until we have the
+                    # newline that follows it.
+                    held = ''
+                    if not eof and text.endswith(('\x11', '\x13')):
+                        text, held = text[:-1], text[-1]
+
+                    # Echo to stdout if requested or forced, and strip
+                    # control sequences.  split() alternates between text
+                    # and the controls that separate it.
+                    parts = control.split(text)
+                    output = []
+                    for i, part in enumerate(parts):
+                        if i % 2:
+                            force_echo = (part == xon)
+                            continue
+                        if part and (echo or force_echo):
+                            sys.stdout.write(part)
+                        output.append(part)
+                    sys.stdout.flush()
+
+                    # Stripped output to log file.  Escapes may also be
+                    # split by a read, so only whole lines are stripped.
+                    pending += ''.join(output)
+                    if eof or len(pending) > _max_line:
+                        end = len(pending)
+                    else:
+                        end = pending.rfind('\n') + 1
+                    if end:
+                        log_file.write(_strip(pending[:end]))
+                        pending = pending[end:]
+                        unflushed = True
+
+                    if eof:
+                        break
+
+                    # Output may never pause; flush it now and then.
+                    now = time.time()
+                    if unflushed and now - last_flush > _flush_interval:
                         log_file.flush()
+                        last_flush = now
+                        unflushed = False
 
-                        if xon in controls:
-                            force_echo = True
-                        if xoff in controls:
-                            force_echo = False
         except BaseException:
             tty.error("Exception occurred in writer daemon!")
             traceback.print_exc()
 
         finally:
+            os.close(in_fd)
+
             # send written data back to parent if we used a StringIO
             if self.write_log_in_parent:
                 self.child.send(log_file.getvalue())
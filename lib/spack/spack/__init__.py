@@ -28,6 +28,11 @@ import os
 import sys
 import tempfile
 import getpass
+import time
+
+# When Spack started to load, to report the time spent starting up.
+start_time = time.time()
+
 from llnl.util.filesystem import *
 import llnl.util.tty as tty
 
@@ -75,22 +80,54 @@ mock_gpg_keys_path = join_path(var_path, "gpg.mock", "keys")
 gpg_path           = join_path(opt_path, "spack", "gpg")
 
 
+#-----------------------------------------------------------------------------
+# Lazy attributes
+#-----------------------------------------------------------------------------
+# Most of what this module provides is expensive to set up: the package
+# repositories, the concretizer, caches built from config.yaml and the
+# build system classes that packages import.  Python 2 has no module-level
+# __getattr__, so this module replaces itself in sys.modules with a
+# LazyModule that builds those attributes on first access.  This has to
+# happen before any other spack module is imported, so that they all see
+# the replacement when they 'import spack'.
+from llnl.util.lang import LazyModule
+
+_module = LazyModule(sys.modules[__name__])
+sys.modules[__name__] = _module
+
+
+def _lazy(name):
+    """Decorator registering a function that computes attribute ``name``."""
+    def _register(factory):
+        _module.add_lazy_attribute(name, factory)
+        return factory
+    return _register
+
+
+def _lazy_import(module_name, names):
+    """Import ``names`` from ``module_name`` the first time one is used.
+
+    All the names are set at once: on Python 2, importing a submodule
+    like ``spack.patch`` overwrites the ``patch`` directive, and this puts
+    it back.
+    """
+    def _importer(name):
+        def _import():
+            module = __import__(module_name, fromlist=names)
+            for other in names:
+                setattr(_module, other, getattr(module, other))
+            return getattr(module, name)
+        return _import
+
+    for name in names:
+        _module.add_lazy_attribute(name, _importer(name))
+
+
 #-----------------------------------------------------------------------------
 # Initial imports (only for use in this file -- see __all__ below.)
 #-----------------------------------------------------------------------------
-# These imports depend on the paths above, or on each other
-# Group them here so it's easy to understand the order.
-# TODO: refactor this stuff to be more init order agnostic.
-import spack.repository
 import spack.error
-import spack.config
-import spack.fetch_strategy
-from spack.file_cache import FileCache
-from spack.abi import ABI
-from spack.concretize import DefaultConcretizer
 from spack.version import Version
-from spack.util.path import canonicalize_path
-from spack.package_prefs import PackageTesting
 
 #-----------------------------------------------------------------------------
 # Initialize various data structures & objects at the core of Spack.
@@ -100,69 +137,124 @@ spack_version = Version("0.10.0")
 
 
 # Set up the default packages database.
-try:
-    repo = spack.repository.RepoPath()
-    sys.meta_path.append(repo)
-except spack.error.SpackError as e:
-    tty.die('while initializing Spack RepoPath:', e.message)
+@_lazy('repo')
+def _repo():
+    import spack.repository
+    try:
+        return spack.repository.RepoPath()
+    except spack.error.SpackError as e:
+        tty.die('while initializing Spack RepoPath:', e.message)
+
+
+class _RepoFinder(object):
+    """Import hook for package modules that defers to ``spack.repo``.
+
+    Having this on ``sys.meta_path`` instead of the RepoPath itself means
+    the repositories are only read when a package is first imported.
+    """
+    def find_module(self, fullname, path=None):
+        if fullname == 'spack.pkg' or fullname.startswith('spack.pkg.'):
+            return _module.repo.find_module(fullname, path)
+        return None
+
+
+sys.meta_path.append(_RepoFinder())
 
 
 # Tests ABI compatibility between packages
-abi = ABI()
+@_lazy('abi')
+def _abi():
+    from spack.abi import ABI
+    return ABI()
 
 
 # This controls how things are concretized in spack.
 # Replace it with a subclass if you want different
 # policies.
-concretizer = DefaultConcretizer()
+@_lazy('concretizer')
+def _concretizer():
+    from spack.concretize import DefaultConcretizer
+    return DefaultConcretizer()
 
 #-----------------------------------------------------------------------------
 # config.yaml options
 #-----------------------------------------------------------------------------
-_config = spack.config.get_config('config')
+def _config():
+    import spack.config
+    return spack.config.get_config('config')
 
 
 # Path where downloaded source code is cached
-cache_path = canonicalize_path(
-    _config.get('source_cache', join_path(var_path, "cache")))
-fetch_cache = spack.fetch_strategy.FsCache(cache_path)
+@_lazy('cache_path')
+def _cache_path():
+    from spack.util.path import canonicalize_path
+    return canonicalize_path(
+        _config().get('source_cache', join_path(var_path, "cache")))
+
+
+@_lazy('fetch_cache')
+def _fetch_cache():
+    import spack.fetch_strategy
+    return spack.fetch_strategy.FsCache(_module.cache_path)
 
 
 # cache for miscellaneous stuff.
-misc_cache_path = canonicalize_path(
-    _config.get('misc_cache', join_path(user_config_path, 'cache')))
-misc_cache = FileCache(misc_cache_path)
+@_lazy('misc_cache_path')
+def _misc_cache_path():
+    from spack.util.path import canonicalize_path
+    return canonicalize_path(
+        _config().get('misc_cache', join_path(user_config_path, 'cache')))
+
+
+@_lazy('misc_cache')
+def _misc_cache():
+    from spack.file_cache import FileCache
+    return FileCache(_module.misc_cache_path)
 
 
 binary_cache_retrieved_specs = set()
 
 
 #: Directories where to search for templates
-template_dirs = spack.config.get_config('config')['template_dirs']
-template_dirs = [canonicalize_path(x) for x in template_dirs]
+@_lazy('template_dirs')
+def _template_dirs():
+    from spack.util.path import canonicalize_path
+    return [canonicalize_path(x) for x in _config()['template_dirs']]
+
 
 # If this is enabled, tools that use SSL should not verify
 # certifiates. e.g., curl should use the -k option.
-insecure = not _config.get('verify_ssl', True)
+@_lazy('insecure')
+def _insecure():
+    return not _config().get('verify_ssl', True)
 
 
 # Whether spack should allow installation of unsafe versions of software.
 # "Unsafe" versions are ones it doesn't have a checksum for.
-do_checksum = _config.get('checksum', True)
+@_lazy('do_checksum')
+def _do_checksum():
+    return _config().get('checksum', True)
 
 
 # If this is True, spack will not clean the environment to remove
 # potentially harmful variables before builds.
-dirty = _config.get('dirty', False)
+@_lazy('dirty')
+def _dirty():
+    return _config().get('dirty', False)
 
 
 # The number of jobs to use when building in parallel.
 # By default, use all cores on the machine.
-build_jobs = _config.get('build_jobs', multiprocessing.cpu_count())
+@_lazy('build_jobs')
+def _build_jobs():
+    return _config().get('build_jobs', multiprocessing.cpu_count())
 
 
 # Needed for test dependencies
-package_testing = PackageTesting()
+@_lazy('package_testing')
+def _package_testing():
+    from spack.package_prefs import PackageTesting
+    return PackageTesting()
 
 
 #-----------------------------------------------------------------------------
@@ -171,6 +263,10 @@ package_testing = PackageTesting()
 # Spack internal code should call 'import spack' and accesses other
 # variables (spack.repo, paths, etc.) directly.
 #
+# Everything but the filesystem and executable helpers is imported lazily,
+# so build systems are only loaded once a package needs them.  These lists
+# must match the modules they come from; spack/test/imports.py checks that.
+#
 # TODO: maybe this should be separated out to build_environment.py?
 # TODO: it's not clear where all the stuff that needs to be included in
 #       packages should live.  This file is overloaded for spack core vs.
@@ -179,86 +275,69 @@ package_testing = PackageTesting()
 #-----------------------------------------------------------------------------
 __all__ = []
 
-from spack.package import Package, run_before, run_after, on_package_attributes
-from spack.build_systems.makefile import MakefilePackage
-from spack.build_systems.aspell_dict import AspellDictPackage
-from spack.build_systems.autotools import AutotoolsPackage
-from spack.build_systems.cmake import CMakePackage
-from spack.build_systems.qmake import QMakePackage
-from spack.build_systems.scons import SConsPackage
-from spack.build_systems.waf import WafPackage
-from spack.build_systems.python import PythonPackage
-from spack.build_systems.r import RPackage
-from spack.build_systems.perl import PerlPackage
-from spack.build_systems.intel import IntelPackage
-
-__all__ += [
-    'run_before',
-    'run_after',
-    'on_package_attributes',
-    'Package',
-    'MakefilePackage',
-    'AspellDictPackage',
-    'AutotoolsPackage',
-    'CMakePackage',
-    'QMakePackage',
-    'SConsPackage',
-    'WafPackage',
-    'PythonPackage',
-    'RPackage',
-    'PerlPackage',
-    'IntelPackage',
+#: Names that packages get from each module, imported on first use
+lazy_exports = [
+    ('spack.package', [
+        'Package', 'run_before', 'run_after', 'on_package_attributes']),
+    ('spack.build_systems.makefile', ['MakefilePackage']),
+    ('spack.build_systems.aspell_dict', ['AspellDictPackage']),
+    ('spack.build_systems.autotools', ['AutotoolsPackage']),
+    ('spack.build_systems.cmake', ['CMakePackage']),
+    ('spack.build_systems.qmake', ['QMakePackage']),
+    ('spack.build_systems.scons', ['SConsPackage']),
+    ('spack.build_systems.waf', ['WafPackage']),
+    ('spack.build_systems.python', ['PythonPackage']),
+    ('spack.build_systems.r', ['RPackage']),
+    ('spack.build_systems.perl', ['PerlPackage']),
+    ('spack.build_systems.intel', ['IntelPackage']),
+    ('spack.version', ['ver']),
+    ('spack.spec', ['Spec']),
+    ('spack.dependency', ['all_deptypes']),
+    ('spack.multimethod', ['when']),
+    ('spack.directives', [
+        'version', 'conflicts', 'depends_on', 'extends', 'provides',
+        'patch', 'variant', 'resource']),
+    ('spack.package', [
+        'install_dependency_symlinks', 'flatten_dependencies',
+        'DependencyConflictError', 'InstallError', 'ExternalPackageError']),
 ]
 
-from spack.version import Version, ver
-__all__ += ['Version', 'ver']
+for _module_name, _names in lazy_exports:
+    _lazy_import(_module_name, _names)
+    __all__ += _names
 
-from spack.spec import Spec
-__all__ += ['Spec']
-
-from spack.dependency import all_deptypes
-__all__ += ['all_deptypes']
-
-from spack.multimethod import when
-__all__ += ['when']
+__all__ += ['Version']
 
 import llnl.util.filesystem
 from llnl.util.filesystem import *
 __all__ += llnl.util.filesystem.__all__
 
-import spack.directives
-from spack.directives import *
-__all__ += spack.directives.__all__
-
 import spack.util.executable
 from spack.util.executable import *
 __all__ += spack.util.executable.__all__
 
 
 # Set up the user's editor
-# $EDITOR environment variable has the highest precedence
-editor = os.environ.get('EDITOR')
+@_lazy('editor')
+def _editor():
+    # $EDITOR environment variable has the highest precedence
+    editor = os.environ.get('EDITOR')
+
+    # if editor is not set, use some sensible defaults
+    if editor is not None:
+        return Executable(editor)
 
-# if editor is not set, use some sensible defaults
-if editor is not None:
-    editor = Executable(editor)
-else:
     editor = which('vim', 'vi', 'emacs', 'nano')
+    if editor:
+        return editor
 
-# If there is no editor, only raise an error if we actually try to use it.
-if not editor:
+    # If there is no editor, only raise an error if we actually try to use it.
     def editor_not_found(*args, **kwargs):
         raise EnvironmentError(
             'No text editor found! Please set the EDITOR environment variable '
             'to your preferred text editor.')
-    editor = editor_not_found
-
-from spack.package import \
-    install_dependency_symlinks, flatten_dependencies, \
-    DependencyConflictError, InstallError, ExternalPackageError
-__all__ += [
-    'install_dependency_symlinks', 'flatten_dependencies',
-    'DependencyConflictError', 'InstallError', 'ExternalPackageError']
+    return editor_not_found
+
 
 # Add default values for attributes that would otherwise be modified from
 # Spack main script
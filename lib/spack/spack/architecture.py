@@ -86,7 +86,6 @@ import llnl.util.tty as tty
 import spack
 from spack.util.naming import mod_to_class
 from spack.util.environment import get_path
-from spack.util.multiproc import parmap
 from spack.util.spack_yaml import syaml_dict
 import spack.error as serr
 
@@ -276,19 +275,11 @@ class OperatingSystem(object):
                 filtered_path.append(os.path.realpath(bin))
 
         # Once the paths are cleaned up, do a search for each type of
-        # compiler.  We can spawn a bunch of parallel searches to reduce
-        # the overhead of spelunking all these directories.
+        # compiler.
         # NOTE: we import spack.compilers here to avoid init order cycles
         import spack.compilers
         types = spack.compilers.all_compiler_types()
-        compiler_lists = parmap(lambda cmp_cls:
-                                self.find_compiler(cmp_cls, *filtered_path),
-                                types)
-
-        # ensure all the version calls we made are cached in the parent
-        # process, as well.  This speeds up Spack a lot.
-        clist = [comp for cl in compiler_lists for comp in cl]
-        return clist
+        return self._find_compilers(types, *filtered_path)
 
     def find_compiler(self, cmp_cls, *path):
         """Try to find the given type of compiler in the user's
@@ -301,13 +292,47 @@ class OperatingSystem(object):
            prefixes, suffixes, and versions.  e.g., gcc-mp-4.7 would
            be grouped with g++-mp-4.7 and gfortran-mp-4.7.
         """
-        dicts = parmap(
-            lambda t: cmp_cls._find_matches_in_path(*t),
-            [(cmp_cls.cc_names,  cmp_cls.cc_version)  + tuple(path),
-             (cmp_cls.cxx_names, cmp_cls.cxx_version) + tuple(path),
-             (cmp_cls.f77_names, cmp_cls.f77_version) + tuple(path),
-             (cmp_cls.fc_names,  cmp_cls.fc_version)  + tuple(path)])
+        return self._find_compilers([cmp_cls], *path)
+
+    def _find_compilers(self, types, *path):
+        """Find compilers of all the given types in the path.
 
+           Candidate binaries are found for every type and language
+           first.  Their versions are then checked all at once, in
+           parallel, since running the binaries is what takes time.
+        """
+        # NOTE: we import spack.compiler here to avoid init order cycles
+        import spack.compiler
+
+        searches = []
+        for cmp_cls in types:
+            for names, detect_version in (
+                    (cmp_cls.cc_names,  cmp_cls.cc_version),
+                    (cmp_cls.cxx_names, cmp_cls.cxx_version),
+                    (cmp_cls.f77_names, cmp_cls.f77_version),
+                    (cmp_cls.fc_names,  cmp_cls.fc_version)):
+                candidates = cmp_cls._find_candidates_in_path(names, *path)
+                searches.append((cmp_cls, detect_version, candidates))
+
+        versions = iter(spack.compiler.probe_compiler_versions(
+            [(detect_version, c[0])
+             for cmp_cls, detect_version, candidates in searches
+             for c in candidates]))
+
+        dicts = [cmp_cls._group_by_version(
+            candidates, [next(versions) for c in candidates])
+            for cmp_cls, detect_version, candidates in searches]
+
+        compilers = []
+        for i, cmp_cls in enumerate(types):
+            compilers.extend(
+                self._group_compilers(cmp_cls, dicts[4 * i:4 * i + 4]))
+        return compilers
+
+    def _group_compilers(self, cmp_cls, dicts):
+        """Make compilers of one type from the (version, prefix, suffix)
+           dicts found for its cc, cxx, f77 and fc.
+        """
         all_keys = set()
         for d in dicts:
             all_keys.update(d)
@@ -470,7 +470,7 @@ def get_specs(force=False):
                 # read the spec from the build cache file. All specs
                 # in build caches are concrete (as they are built) so
                 # we need to mark this spec concrete on read-in.
-                spec = spack.spec.Spec.from_yaml(f)
+                spec = spack.spec.Spec.from_yaml(f, fast=True)
                 spec._mark_concrete()
                 specs.add(spec)
 
@@ -706,9 +706,12 @@ def fork(pkg, function, dirty, fake):
             # show that, too.
             package_context = get_package_context(tb)
 
-            build_log = None
-            if hasattr(pkg, 'log_path'):
+            # Like hasattr() on Python 2: a package without a stage has
+            # no log, but raises more than AttributeError.
+            try:
                 build_log = pkg.log_path
+            except Exception:
+                build_log = None
 
             # make a pickleable exception to send to parent.
             msg = "%s: %s" % (exc_type.__name__, str(exc))
@@ -742,7 +745,17 @@ def fork(pkg, function, dirty, fake):
         if input_stream is not None:
             input_stream.close()
 
-    child_result = parent_pipe.recv()
+    # Only the child writes to the pipe.  Without our copy of its end,
+    # recv() fails instead of waiting forever if the child dies.
+    child_pipe.close()
+    try:
+        child_result = parent_pipe.recv()
+    except EOFError:
+        p.join()
+        e = InstallError('Build process for %s exited with status %s'
+                         % (pkg.name, p.exitcode))
+        e.pkg = pkg
+        raise e
     p.join()
 
     # let the caller know which package went wrong.
@@ -27,9 +27,10 @@ from __future__ import print_function
 import os
 import re
 import sys
+from collections import namedtuple
 
 import llnl.util.tty as tty
-from llnl.util.lang import attr_setdefault, index_by
+from llnl.util.lang import attr_setdefault, index_by, memoized
 from llnl.util.tty.colify import colify
 from llnl.util.tty.color import colorize
 from llnl.util.filesystem import working_dir
@@ -59,12 +60,13 @@ DESCRIPTION = "description"
 
 command_path = os.path.join(spack.lib_path, "spack", "cmd")
 
-commands = []
+# Not called 'commands', as that is the module for 'spack commands'.
+all_commands = []
 for file in os.listdir(command_path):
     if file.endswith(".py") and not re.search(ignore_files, file):
         cmd = re.sub(r'.py$', '', file)
-        commands.append(cmd)
-commands.sort()
+        all_commands.append(cmd)
+all_commands.sort()
 
 
 def remove_options(parser, *options):
@@ -105,6 +107,70 @@ def get_command(name):
     return getattr(get_module(python_name), python_name)
 
 
+#: Tab-separated name, section, level and description of each command.
+#: Help is built from this instead of from the command modules, and bash
+#: completion reads it to list commands without starting Spack.
+manifest_path = os.path.join(command_path, 'manifest.txt')
+
+manifest_header = """\
+# Spack command manifest: name, section, level and description of each
+# command, separated by tabs.  Generated by 'spack commands --update'.
+"""
+
+#: What the manifest records about a command
+CommandInfo = namedtuple(
+    'CommandInfo', ['name', 'section', 'level', 'description'])
+
+
+@memoized
+def read_manifest():
+    """Reads the command manifest.
+
+    Returns:
+        (dict): CommandInfo for each command, by python name.  Empty if
+            there is no manifest.
+    """
+    manifest = {}
+    if not os.path.exists(manifest_path):
+        return manifest
+
+    with open(manifest_path) as f:
+        for line in f:
+            if line.startswith('#') or not line.strip():
+                continue
+            info = CommandInfo(*line.rstrip('\n').split('\t', 3))
+            manifest[get_python_name(info.name)] = info
+    return manifest
+
+
+def get_command_info(name):
+    """Returns the CommandInfo for a command.
+
+    Commands missing from the manifest are imported to find out.
+    """
+    python_name = get_python_name(name)
+    info = read_manifest().get(python_name)
+    if info is None:
+        module = get_module(python_name)
+        info = CommandInfo(
+            python_name.replace('_', '-'),
+            getattr(module, 'section', None),
+            getattr(module, 'level', None),
+            module.description)
+    return info
+
+
+def write_manifest(stream):
+    """Writes a manifest for the current command modules to a stream."""
+    stream.write(manifest_header)
+    for name in all_commands:
+        module = get_module(name)
+        fields = [name.replace('_', '-')]
+        fields.extend(getattr(module, attr, '')
+                      for attr in ('section', 'level', 'description'))
+        stream.write('\t'.join(fields) + '\n')
+
+
 def parse_specs(args, **kwargs):
     """Convenience function for parsing arguments from specs.  Handles common
        exceptions and dies if there are errors.
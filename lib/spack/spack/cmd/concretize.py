@@ -0,0 +1,88 @@
+##############################################################################
+# Copyright (c) 2013-2017, Lawrence Livermore National Security, LLC.
+# Produced at the Lawrence Livermore National Laboratory.
+#
+# This file is part of Spack.
+# Created by Todd Gamblin, tgamblin@llnl.gov, All rights reserved.
+# LLNL-CODE-647188
+#
+# For details, see https://github.com/spack/spack
+# Please also see the NOTICE and LICENSE files for our notice and the LGPL.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License (as
+# published by the Free Software Foundation) version 2.1, February 1999.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the IMPLIED WARRANTY OF
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the terms and
+# conditions of the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+##############################################################################
+from __future__ import print_function
+
+import argparse
+import time
+
+import llnl.util.tty as tty
+
+import spack
+import spack.cmd
+import spack.concretize
+
+description = "concretize many specs at once and time each of them"
+section = "build"
+level = "long"
+
+
+def setup_parser(subparser):
+    subparser.add_argument(
+        '-f', '--file', action='append', default=[], dest='files',
+        help="read specs from a file, one per line")
+    subparser.add_argument(
+        '-j', '--jobs', action='store', type=int, default=1,
+        help="number of processes to concretize with. default is 1")
+    subparser.add_argument(
+        'specs', nargs=argparse.REMAINDER, help="specs to concretize")
+
+
+def _read_spec_file(path):
+    """Read the specs in a file, skipping blank lines and # comments."""
+    lines = []
+    with open(path) as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                lines.append(line)
+    return lines
+
+
+def concretize(parser, args):
+    if args.jobs <= 0:
+        tty.die("The -j option must be a positive integer!")
+
+    specs = spack.cmd.parse_specs(args.specs)
+    for path in args.files:
+        specs.extend(spack.cmd.parse_specs(_read_spec_file(path)))
+    if not specs:
+        tty.die("concretize requires at least one spec or spec file")
+
+    start = time.time()
+    results = spack.concretize.concretize_specs(specs, jobs=args.jobs)
+    elapsed = time.time() - start
+
+    failed = 0
+    for result in results:
+        if result.error:
+            failed += 1
+            tty.error('%s: %s' % (result.abstract, result.error))
+            continue
+
+        print('%8.2fs  %s' % (result.seconds, result.concrete.cshort_spec))
+
+    tty.msg("Concretized %d specs in %.2fs" % (len(results), elapsed))
+    if failed:
+        tty.die("%d specs could not be concretized" % failed)
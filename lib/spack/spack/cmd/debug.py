@@ -22,15 +22,22 @@
 # License along with this program; if not, write to the Free Software
 # Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
 ##############################################################################
+from __future__ import print_function
+
 import os
 import re
+import sys
+import time
 from datetime import datetime
 from glob import glob
 
+from six import StringIO
+
 import llnl.util.tty as tty
 from llnl.util.filesystem import working_dir
 
 import spack
+from spack.provider_index import ProviderIndex
 from spack.util.executable import which
 
 description = "debugging commands for troubleshooting Spack"
@@ -42,6 +49,13 @@ def setup_parser(subparser):
     sp = subparser.add_subparsers(metavar='SUBCOMMAND', dest='debug_command')
     sp.add_parser('create-db-tarball',
                   help="create a tarball of Spack's installation metadata")
+    sp.add_parser('provider-index',
+                  help="print the provider index of all repositories as YAML")
+    index_load = sp.add_parser(
+        'index-load', help="time loading provider indexes as JSON and YAML")
+    index_load.add_argument(
+        '-n', '--repeat', type=int, default=10,
+        help="number of times each index is loaded [default: 10]")
 
 
 def _debug_tarball_suffix():
@@ -97,6 +111,38 @@ def create_db_tarball(args):
     tty.msg('Created %s' % tarball_name)
 
 
+def provider_index(args):
+    spack.repo.provider_index.to_yaml(sys.stdout)
+
+
+def _time_load(load, text, repeat):
+    """Average milliseconds taken by load() to read an index from text."""
+    start = time.time()
+    for _ in range(repeat):
+        load(StringIO(text))
+    return (time.time() - start) * 1000.0 / repeat
+
+
+def index_load(args):
+    print('%-20s %8s %12s %12s' % ('Repository', 'Virtuals', 'JSON [ms]',
+                                   'YAML [ms]'))
+    for repo in spack.repo.repos:
+        index = repo.provider_index
+
+        json_text, yaml_text = StringIO(), StringIO()
+        index.to_json(json_text)
+        index.to_yaml(yaml_text)
+
+        json_ms = _time_load(
+            ProviderIndex.from_json, json_text.getvalue(), args.repeat)
+        yaml_ms = _time_load(
+            ProviderIndex.from_yaml, yaml_text.getvalue(), args.repeat)
+        print('%-20s %8d %12.2f %12.2f' % (
+            repo.namespace, len(index.providers), json_ms, yaml_ms))
+
+
 def debug(parser, args):
-    action = {'create-db-tarball': create_db_tarball}
+    action = {'create-db-tarball': create_db_tarball,
+              'provider-index': provider_index,
+              'index-load': index_load}
     action[args.debug_command](args)
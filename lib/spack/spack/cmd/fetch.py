@@ -28,6 +28,7 @@ import llnl.util.tty as tty
 
 import spack
 import spack.cmd
+import spack.prefetch
 
 description = "fetch archives for packages"
 section = "build"
@@ -44,6 +45,9 @@ def setup_parser(subparser):
     subparser.add_argument(
         '-D', '--dependencies', action='store_true',
         help="also fetch all dependencies")
+    subparser.add_argument(
+        '-j', '--jobs', action='store', type=int,
+        help="number of archives to download at once")
     subparser.add_argument(
         'packages', nargs=argparse.REMAINDER,
         help="specs of packages to fetch")
@@ -56,7 +60,13 @@ def fetch(parser, args):
     if args.no_checksum:
         spack.do_checksum = False
 
+    if args.jobs is not None and args.jobs <= 0:
+        tty.die("The -j option must be a positive integer!")
+
     specs = spack.cmd.parse_specs(args.packages, concretize=True)
+
+    # Everything to fetch, in the order to fetch it
+    packages = []
     for spec in specs:
         if args.missing or args.dependencies:
             for s in spec.traverse():
@@ -70,7 +80,13 @@ def fetch(parser, args):
                 if package.spec.external:
                     continue
 
-                package.do_fetch()
+                packages.append(package)
+
+        packages.append(spack.repo.get(spec))
 
-        package = spack.repo.get(spec)
-        package.do_fetch()
+    # Download in the background, and stage each package from the
+    # download cache once it is there.
+    with spack.prefetch.prefetching([p.spec for p in packages], args.jobs):
+        for package in packages:
+            spack.prefetch.wait(package.spec)
+            package.do_fetch()
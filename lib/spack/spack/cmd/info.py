@@ -32,7 +32,6 @@ from llnl.util.tty.colify import colify
 
 import llnl.util.tty.color as color
 import spack
-import spack.fetch_strategy as fs
 import spack.spec
 
 description = 'get detailed information on a particular package'
@@ -146,7 +145,11 @@ class VariantFormatter(object):
 
 
 def print_text_info(pkg):
-    """Print out a plain text description of a package."""
+    """Print out a plain text description of a package.
+
+    Args:
+        pkg (PackageMetadata): metadata of the package
+    """
 
     header = section_title(
         '{0}:   '
@@ -169,9 +172,8 @@ def print_text_info(pkg):
 
     color.cprint('')
     color.cprint(section_title("Tags: "))
-    if hasattr(pkg, 'tags'):
-        tags = sorted(pkg.tags)
-        colify(tags, indent=4)
+    if pkg.tags:
+        colify(pkg.tags, indent=4)
     else:
         color.cprint("    None")
 
@@ -194,15 +196,15 @@ def print_text_info(pkg):
                             v)
         preferred = sorted(pkg.versions, key=key_fn).pop()
 
-        f = fs.for_package_version(pkg, preferred)
-        line = version('    {0}'.format(pad(preferred))) + str(f)
+        f = pkg.fetchers[preferred] or ''
+        line = version('    {0}'.format(pad(preferred))) + f
         color.cprint(line)
         color.cprint('')
         color.cprint(section_title('Safe versions:  '))
 
         for v in reversed(sorted(pkg.versions)):
-            f = fs.for_package_version(pkg, v)
-            line = version('    {0}'.format(pad(v))) + str(f)
+            f = pkg.fetchers[v] or ''
+            line = version('    {0}'.format(pad(v))) + f
             color.cprint(line)
 
     color.cprint('')
@@ -250,5 +252,5 @@ def print_text_info(pkg):
 
 
 def info(parser, args):
-    pkg = spack.repo.get(args.name)
+    pkg = spack.repo.get_metadata(args.name)
     print_text_info(pkg)
@@ -38,6 +38,7 @@ import llnl.util.tty as tty
 import spack
 import spack.cmd
 import spack.cmd.common.arguments as arguments
+import spack.prefetch
 from spack.build_environment import InstallError
 from spack.fetch_strategy import FetchError
 from spack.package import PackageBase
@@ -61,6 +62,14 @@ the dependencies"""
     subparser.add_argument(
         '-j', '--jobs', action='store', type=int,
         help="explicitly set number of make jobs. default is #cpus")
+    subparser.add_argument(
+        '--concurrent-builds', action='store', type=int,
+        help="number of dependencies to build at once. make jobs are split"
+        " between them")
+    subparser.add_argument(
+        '--fetch-jobs', action='store', type=int,
+        help="number of archives to download at once, while packages whose"
+        " sources are fetched build")
     subparser.add_argument(
         '--overwrite', action='store_true',
         help="reinstall an existing spec, even if it has dependents")
@@ -337,8 +346,9 @@ def install_spec(cli_args, kwargs, spec):
         test_suite = TestSuite(spec)
 
         # Temporarily decorate PackageBase.do_install to monitor
-        # recursive calls.
+        # recursive calls.  They must all happen in this process.
         decorator = junit_output(spec, test_suite)
+        kwargs['concurrent_builds'] = 1
 
     # Do the actual installation
     try:
@@ -384,6 +394,14 @@ def install(parser, args, **kwargs):
         if args.jobs <= 0:
             tty.die("The -j option must be a positive integer!")
 
+    if args.concurrent_builds is not None:
+        if args.concurrent_builds <= 0:
+            tty.die("--concurrent-builds must be a positive integer!")
+
+    if args.fetch_jobs is not None:
+        if args.fetch_jobs <= 0:
+            tty.die("--fetch-jobs must be a positive integer!")
+
     if args.no_checksum:
         spack.do_checksum = False        # TODO: remove this global.
 
@@ -396,6 +414,7 @@ def install(parser, args, **kwargs):
         'install_source': args.install_source,
         'install_deps': 'dependencies' in args.things_to_install,
         'make_jobs': args.jobs,
+        'concurrent_builds': args.concurrent_builds,
         'verbose': args.verbose,
         'fake': args.fake,
         'dirty': args.dirty,
@@ -456,6 +475,18 @@ def install(parser, args, **kwargs):
             install_spec(args, kwargs, specs[0])
 
     else:
-
-        for spec in specs:
-            install_spec(args, kwargs, spec)
+        # Fetch the sources of everything that is not installed yet in
+        # the background, while the first packages build.
+        to_fetch = []
+        if not args.fake:
+            for spec in specs:
+                nodes = spec.traverse(order='post')
+                if args.things_to_install == 'dependencies':
+                    nodes = spec.traverse(order='post', root=False)
+                elif args.things_to_install == 'package':
+                    nodes = [spec]
+                to_fetch.extend(s for s in nodes if not s.package.installed)
+
+        with spack.prefetch.prefetching(to_fetch, args.fetch_jobs):
+            for spec in specs:
+                install_spec(args, kwargs, spec)
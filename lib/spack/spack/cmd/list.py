@@ -93,7 +93,7 @@ def filter_by_name(pkgs, args):
                 if f.match(p):
                     return True
 
-                pkg = spack.repo.get(p)
+                pkg = spack.repo.get_metadata(p)
                 if pkg.__doc__:
                     return f.match(pkg.__doc__)
                 return False
@@ -130,7 +130,7 @@ def rst(pkgs):
         return '%s\n%s%s' % (header, cols.getvalue(), header)
 
     pkg_names = pkgs
-    pkgs = [spack.repo.get(name) for name in pkg_names]
+    pkgs = [spack.repo.get_metadata(name) for name in pkg_names]
 
     print('.. _package-list:')
     print()
@@ -66,6 +66,12 @@ def setup_parser(subparser):
         '-o', '--one-version-per-spec', action='store_const',
         const=1, default=0,
         help="only fetch one 'preferred' version per spec, not all known")
+    create_parser.add_argument(
+        '-j', '--jobs', action='store', type=int,
+        help="number of package versions to fetch at once")
+    create_parser.add_argument(
+        '--report', metavar='FILE',
+        help="write a JSON report of what was mirrored to FILE")
 
     scopes = spack.config.config_scopes
 
@@ -163,6 +169,9 @@ def _read_specs_from_file(filename):
 def mirror_create(args):
     """Create a directory to be used as a spack mirror, and fill it with
        package archives."""
+    if args.jobs is not None and args.jobs <= 0:
+        tty.die("The -j option must be a positive integer!")
+
     # try to parse specs from the command line first.
     specs = spack.cmd.parse_specs(args.specs, concretize=True)
 
@@ -201,7 +210,8 @@ def mirror_create(args):
 
     # Actually do the work to create the mirror
     present, mirrored, error = spack.mirror.create(
-        directory, specs, num_versions=args.one_version_per_spec)
+        directory, specs, num_versions=args.one_version_per_spec,
+        jobs=args.jobs, report=args.report)
     p, m, e = len(present), len(mirrored), len(error)
 
     verb = "updated" if existed else "created"
@@ -211,6 +221,8 @@ def mirror_create(args):
         "  %-4d already present"  % p,
         "  %-4d added"            % m,
         "  %-4d failed to fetch." % e)
+    if args.report:
+        tty.msg("Report written to %s" % args.report)
     if error:
         tty.error("Failed downloads:")
         colify(s.cformat("$_$@") for s in error)
@@ -22,6 +22,12 @@
 # License along with this program; if not, write to the Free Software
 # Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
 ##############################################################################
+import multiprocessing
+import sys
+import time
+
+import llnl.util.tty as tty
+
 import spack
 import spack.store
 description = "rebuild Spack's package database"
@@ -30,5 +36,32 @@ section = "admin"
 level = "long"
 
 
+def setup_parser(subparser):
+    subparser.add_argument(
+        '-j', '--jobs', action='store', type=int,
+        default=multiprocessing.cpu_count(),
+        help="number of processes reading spec files. default is #cpus")
+
+
+def _show_progress(done, total):
+    """Overwrite a progress line on the terminal while reading specs."""
+    sys.stderr.write('\r  Read %d/%d spec files' % (done, total))
+    if done == total:
+        sys.stderr.write('\n')
+    sys.stderr.flush()
+
+
 def reindex(parser, args):
-    spack.store.db.reindex(spack.store.layout)
+    if args.jobs <= 0:
+        tty.die("The -j option must be a positive integer!")
+
+    progress = _show_progress if sys.stderr.isatty() else None
+
+    start = time.time()
+    spack.store.db.reindex(
+        spack.store.layout, jobs=args.jobs, progress=progress)
+    elapsed = time.time() - start
+
+    with spack.store.db.read_transaction():
+        count = len(spack.store.db.query(installed=any))
+    tty.msg("Reindexed %d specs in %.2fs" % (count, elapsed))
@@ -36,18 +36,25 @@ level = "long"
 def setup_parser(subparser):
     subparser.add_argument('package', metavar='PACKAGE',
                            help='package to list versions for')
+    subparser.add_argument(
+        '-s', '--safe-only', action='store_true',
+        help='only list safe versions of the package')
 
 
 def versions(parser, args):
-    pkg = spack.repo.get(args.package)
-
-    safe_versions = pkg.versions
-    fetched_versions = pkg.fetch_remote_versions()
-    remote_versions = set(fetched_versions).difference(safe_versions)
+    # Safe versions are known without loading the package
+    safe_versions = spack.repo.get_metadata(args.package).versions
 
     tty.msg("Safe versions (already checksummed):")
     colify(sorted(safe_versions, reverse=True), indent=2)
 
+    if args.safe_only:
+        return
+
+    pkg = spack.repo.get(args.package)
+    fetched_versions = pkg.fetch_remote_versions()
+    remote_versions = set(fetched_versions).difference(safe_versions)
+
     tty.msg("Remote versions (not yet checksummed):")
     if not remote_versions:
         if not fetched_versions:
@@ -25,18 +25,24 @@
 import os
 import re
 import itertools
+import threading
+import time
 
+import llnl.util.lang
 import llnl.util.tty as tty
 from llnl.util.filesystem import join_path
 
+import spack
 import spack.error
 import spack.spec
 import spack.architecture
-from spack.util.multiproc import parmap
+from spack.util.multiproc import thread_map
 from spack.util.executable import Executable, ProcessError
 from spack.util.environment import get_path
+import spack.util.spack_json as sjson
 
-__all__ = ['Compiler', 'get_compiler_version']
+__all__ = ['Compiler', 'get_compiler_version', 'cached_compiler_version',
+           'probe_compiler_versions']
 
 
 def _verify_executables(*paths):
@@ -47,17 +53,232 @@ def _verify_executables(*paths):
 
 _version_cache = {}
 
+#: Misc cache entry with the versions detected for compiler binaries
+version_cache_filename = 'compilers/versions.json'
+
+#: Serializes access to the misc cache entry from probing threads
+_version_cache_lock = threading.RLock()
+
+#: Locks held while probing a compiler, by (path, probe)
+_probe_locks = {}
+
+#: Versions that ``probe_compiler_versions()`` writes to the misc cache
+#: once all its checks are done, or None if it isn't running
+_unwritten_versions = None
+
+#: Number of compiler version checks run at once.  Checks mostly wait
+#: on the compilers they run, so this does not depend on the CPU count.
+probe_jobs = 16
+
+#: Probes that take longer than this many seconds are reported as slow
+slow_probe_time = 5
+
+
+def compiler_version_cache_enabled():
+    """Whether detected compiler versions are kept in the misc cache."""
+    import spack.config
+    config = spack.config.get_config('config')
+    return config.get('compiler_version_cache', True)
+
+
+def compiler_probe_timeout():
+    """Seconds a compiler may take to report its version, or None."""
+    import spack.config
+    config = spack.config.get_config('config')
+    return config.get('compiler_probe_timeout', 30) or None
+
+
+def _binary_id(path):
+    """Real path of a binary, and the stat info that tells if it changed."""
+    real_path = os.path.realpath(path)
+    stat = os.stat(real_path)
+    return real_path, [stat.st_mtime, stat.st_size, stat.st_ino]
+
+
+@llnl.util.lang.memoized
+def _read_version_cache():
+    """Versions kept in the misc cache, by real path of the binary."""
+    with _version_cache_lock:
+        if not spack.misc_cache.init_entry(version_cache_filename):
+            return {}
+        with spack.misc_cache.read_transaction(version_cache_filename) as f:
+            try:
+                return sjson.load(f)
+            except ValueError:
+                # A corrupt cache is rewritten as versions are detected
+                return {}
+
+
+def _write_version_cache(new_versions):
+    """Add detected versions to the misc cache, in one transaction.
+
+    Args:
+        new_versions (list): ``(real_path, stat, probe, version)`` tuples
+    """
+    with _version_cache_lock:
+        with spack.misc_cache.write_transaction(version_cache_filename) as (
+                old, new):
+            # Other processes may have added versions since we read them.
+            try:
+                data = sjson.load(old) if old else {}
+            except ValueError:
+                data = {}
+
+            for real_path, stat, probe, version in new_versions:
+                entry = data.get(real_path)
+                if entry is None or entry['stat'] != stat:
+                    entry = data[real_path] = {'stat': stat, 'versions': {}}
+                entry['versions'][probe] = version
+            sjson.dump(data, new)
+
+        cache = _read_version_cache()
+        for real_path, stat, probe, version in new_versions:
+            cache[real_path] = data[real_path]
+
+
+def _save_versions(new_versions):
+    """Write detected versions to the misc cache, or keep them for later
+    while ``probe_compiler_versions()`` runs."""
+    with _version_cache_lock:
+        if _unwritten_versions is not None:
+            _unwritten_versions.extend(new_versions)
+            return
+
+    if not new_versions:
+        return
+
+    try:
+        _write_version_cache(new_versions)
+    except (IOError, OSError, spack.error.SpackError) as e:
+        tty.debug("Couldn't cache versions of compilers",
+                  *sorted(set(v[0] for v in new_versions)) + [str(e)])
+
+
+def cached_compiler_version(compiler_path, probe, detect):
+    """Version of a compiler binary, running ``detect()`` only if needed.
+
+    Versions are cached in memory by path.  If ``compiler_version_cache``
+    is enabled, they are also kept in the misc cache by the real path,
+    mtime, size and inode of the binary, so later runs of Spack only run
+    binaries that are new or changed.
+
+    Args:
+        compiler_path (str): path to the compiler binary
+        probe (str): identifies how the version is detected, e.g. the
+            version argument and regular expression used
+        detect (function): runs the binary and returns its version
+    """
+    key = (compiler_path, probe)
+    if key in _version_cache:
+        return _version_cache[key]
+
+    # Threads probing the same compiler wait for the first one's result
+    with _version_cache_lock:
+        probe_lock = _probe_locks.setdefault(key, threading.Lock())
+
+    with probe_lock:
+        if key in _version_cache:
+            return _version_cache[key]
+
+        binary_id = None
+        if compiler_version_cache_enabled():
+            try:
+                binary_id = _binary_id(compiler_path)
+            except OSError:
+                pass
+
+        if binary_id:
+            real_path, stat = binary_id
+            entry = _read_version_cache().get(real_path)
+            if (entry and entry['stat'] == stat and
+                    probe in entry['versions']):
+                _version_cache[key] = entry['versions'][probe]
+                return _version_cache[key]
+
+        version = detect()
+        _version_cache[key] = version
+
+        if binary_id:
+            _save_versions([(real_path, stat, probe, version)])
+
+        return version
+
 
 def get_compiler_version(compiler_path, version_arg, regex='(.*)'):
-    key = (compiler_path, version_arg, regex)
-    if key not in _version_cache:
+    def detect():
         compiler = Executable(compiler_path)
-        output = compiler(version_arg, output=str, error=str)
+        output = compiler(version_arg, output=str, error=str,
+                          timeout=compiler_probe_timeout())
 
         match = re.search(regex, output)
-        _version_cache[key] = match.group(1) if match else 'unknown'
-
-    return _version_cache[key]
+        return match.group(1) if match else 'unknown'
+
+    probe = '%s %s' % (version_arg, regex)
+    return cached_compiler_version(compiler_path, probe, detect)
+
+
+def probe_compiler_versions(probes):
+    """Run the version checks of candidate compilers in parallel.
+
+    Checks run in a pool of ``probe_jobs`` threads.  Each may take at most
+    ``compiler_probe_timeout`` seconds, so that a hung compiler (e.g.
+    one waiting on a license server) can't stall detection.  Checks that
+    time out or are slow are reported.
+
+    Args:
+        probes (list): ``(detect_version, path)`` tuples, where
+            ``detect_version(path)`` returns the version of the compiler
+            at ``path``, e.g. ``Gcc.cc_version``
+
+    Returns:
+        list: the detected version for each probe, or ``None`` if the
+            version could not be detected
+    """
+    timeout = compiler_probe_timeout()
+
+    def check(probe):
+        detect_version, full_path = probe
+        start = time.time()
+        try:
+            version = detect_version(full_path)
+        except ProcessError as e:
+            tty.debug(
+                "Couldn't get version for compiler %s" % full_path, e)
+            version = None
+        except Exception as e:
+            # Catching "Exception" here is fine because it just
+            # means something went wrong running a candidate executable.
+            tty.debug("Error while executing candidate compiler %s"
+                      % full_path,
+                      "%s: %s" % (e.__class__.__name__, e))
+            version = None
+        return version, time.time() - start
+
+    # Detected versions are cached all at once, after the checks.
+    global _unwritten_versions
+    _unwritten_versions = []
+    try:
+        results = thread_map(check, probes, jobs=probe_jobs)
+    finally:
+        new_versions, _unwritten_versions = _unwritten_versions, None
+        _save_versions(new_versions)
+
+    timed_out, slow = [], []
+    for (detect_version, full_path), (version, elapsed) in zip(
+            probes, results):
+        if version is None and timeout and elapsed >= timeout:
+            timed_out.append(full_path)
+        elif elapsed >= slow_probe_time:
+            slow.append('%s (%.1fs)' % (full_path, elapsed))
+
+    if timed_out:
+        tty.warn('Gave up on compilers that did not report their version '
+                 'within %s seconds:' % timeout, *sorted(set(timed_out)))
+    if slow:
+        tty.warn('Some compilers were slow to report their version:',
+                 *sorted(set(slow)))
+
+    return [version for version, elapsed in results]
 
 
 def dumpversion(compiler_path):
@@ -243,18 +464,13 @@ class Compiler(object):
         return cls.default_version(fc)
 
     @classmethod
-    def _find_matches_in_path(cls, compiler_names, detect_version, *path):
-        """Finds compilers in the paths supplied.
+    def _find_candidates_in_path(cls, compiler_names, *path):
+        """Finds binaries in the paths supplied that may be compilers.
 
            Looks for all combinations of ``compiler_names`` with the
            ``prefixes`` and ``suffixes`` defined for this compiler
-           class.  If any compilers match the compiler_names,
-           prefixes, or suffixes, uses ``detect_version`` to figure
-           out what version the compiler is.
-
-           This returns a dict with compilers grouped by (prefix,
-           suffix, version) tuples.  This can be further organized by
-           find().
+           class, and returns a list of ``(full_path, prefix, suffix)``
+           tuples, ordered like the paths.
         """
         if not path:
             path = get_path('PATH')
@@ -281,24 +497,18 @@ class Compiler(object):
                         key = (full_path,) + match.groups()
                         checks.append(key)
 
-        def check(key):
-            try:
-                full_path, prefix, suffix = key
-                version = detect_version(full_path)
-                return (version, prefix, suffix, full_path)
-            except ProcessError as e:
-                tty.debug(
-                    "Couldn't get version for compiler %s" % full_path, e)
-                return None
-            except Exception as e:
-                # Catching "Exception" here is fine because it just
-                # means something went wrong running a candidate executable.
-                tty.debug("Error while executing candidate compiler %s"
-                          % full_path,
-                          "%s: %s" % (e.__class__.__name__, e))
-                return None
+        return checks
+
+    @staticmethod
+    def _group_by_version(candidates, versions):
+        """Groups candidate compilers by (version, prefix, suffix).
 
-        successful = [k for k in parmap(check, checks) if k is not None]
+           ``versions`` holds the detected version of each candidate
+           returned by ``_find_candidates_in_path()``, or ``None``.
+        """
+        successful = [(v, p, s, path)
+                      for (path, p, s), v in zip(candidates, versions)
+                      if v is not None]
 
         # The 'successful' list is ordered like the input paths.
         # Reverse it here so that the dict creation (last insert wins)
@@ -306,6 +516,25 @@ class Compiler(object):
         successful.reverse()
         return dict(((v, p, s), path) for v, p, s, path in successful)
 
+    @classmethod
+    def _find_matches_in_path(cls, compiler_names, detect_version, *path):
+        """Finds compilers in the paths supplied.
+
+           Looks for all combinations of ``compiler_names`` with the
+           ``prefixes`` and ``suffixes`` defined for this compiler
+           class.  If any compilers match the compiler_names,
+           prefixes, or suffixes, uses ``detect_version`` to figure
+           out what version the compiler is.
+
+           This returns a dict with compilers grouped by (prefix,
+           suffix, version) tuples.  This can be further organized by
+           find().
+        """
+        candidates = cls._find_candidates_in_path(compiler_names, *path)
+        versions = probe_compiler_versions(
+            [(detect_version, c[0]) for c in candidates])
+        return cls._group_by_version(candidates, versions)
+
     def setup_custom_environment(self, pkg, env):
         """Set any environment variables necessary to use the compiler."""
         pass
@@ -27,6 +27,7 @@ system and configuring Spack to use multiple compilers.
 """
 import imp
 
+import llnl.util.lang
 from llnl.util.lang import list_modules
 from llnl.util.filesystem import join_path
 
@@ -42,6 +43,9 @@ _imported_compilers_module = 'spack.compilers'
 _path_instance_vars = ['cc', 'cxx', 'f77', 'fc']
 _cache_config_file = []
 
+#: compiler specs parsed from a compilers config, as (config, specs)
+_cache_compiler_specs = (None, [])
+
 #: cache of compilers constructed from config data, keyed by config entry id.
 _compiler_cache = {}
 
@@ -177,9 +181,15 @@ def all_compilers_config(scope=None, init_config=True):
 
 
 def all_compiler_specs(scope=None, init_config=True):
-    # Return compiler specs from the merged config.
-    return [spack.spec.CompilerSpec(s['compiler']['spec'])
-            for s in all_compilers_config(scope, init_config)]
+    # Return compiler specs from the merged config.  They are parsed
+    # once per config, since concretization asks for them a lot.
+    global _cache_compiler_specs
+    config = all_compilers_config(scope, init_config)
+    if _cache_compiler_specs[0] is not config:
+        specs = [spack.spec.CompilerSpec(s['compiler']['spec'])
+                 for s in config]
+        _cache_compiler_specs = (config, specs)
+    return list(_cache_compiler_specs[1])
 
 
 def find_compilers(*paths):
@@ -196,6 +206,7 @@ def find_compilers(*paths):
     return compiler_lists
 
 
+@llnl.util.lang.memoized
 def supported_compilers():
     """Return a set of names of compilers supported by Spack.
 
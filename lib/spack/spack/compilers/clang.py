@@ -30,7 +30,8 @@ from shutil import copytree, ignore_patterns
 import llnl.util.tty as tty
 
 import spack
-from spack.compiler import Compiler, _version_cache
+from spack.compiler import Compiler, cached_compiler_version
+from spack.compiler import compiler_probe_timeout
 from spack.util.executable import Executable
 from spack.version import ver
 
@@ -139,9 +140,10 @@ class Clang(Compiler):
             Target: x86_64-apple-darwin15.2.0
             Thread model: posix
         """
-        if comp not in _version_cache:
+        def detect():
             compiler = Executable(comp)
-            output = compiler('--version', output=str, error=str)
+            output = compiler('--version', output=str, error=str,
+                              timeout=compiler_probe_timeout())
 
             ver = 'unknown'
             match = re.search(r'^Apple LLVM version ([^ )]+)', output)
@@ -153,10 +155,9 @@ class Clang(Compiler):
                 match = re.search(r'clang version ([^ )]+)', output)
                 if match:
                     ver = match.group(1)
+            return ver
 
-            _version_cache[comp] = ver
-
-        return _version_cache[comp]
+        return cached_compiler_version(comp, 'clang --version', detect)
 
     @classmethod
     def fc_version(cls, fc):
@@ -25,6 +25,7 @@
 import llnl.util.tty as tty
 
 import spack
+import spack.compilers.clang
 from spack.compiler import Compiler, get_compiler_version
 from spack.version import ver
 
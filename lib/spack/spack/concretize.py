@@ -34,17 +34,34 @@ TODO: make this customizable and allow users to configure
       concretization  policies.
 """
 from __future__ import print_function
+import collections
+import hashlib
+import json
+import multiprocessing
+import time
 from itertools import chain
 from functools_backport import reverse_order
 from six import iteritems
 
+import llnl.util.lang
+import llnl.util.tty as tty
+
 import spack
 import spack.spec
 import spack.compilers
 import spack.architecture
+import spack.config
 import spack.error
+import spack.repository
+import spack.util.spack_json as sjson
 from spack.version import ver, Version, VersionList, VersionRange
 from spack.package_prefs import PackagePrefs, spec_externals, is_spec_buildable
+from spack.util.timing import timed
+
+
+def _spec_name(concretizer, spec, *args, **kwargs):
+    """Charge the time of a concretizer method to the spec's package."""
+    return spec.name
 
 
 class DefaultConcretizer(object):
@@ -104,6 +121,7 @@ class DefaultConcretizer(object):
             spec                                          # natural order
         ))
 
+    @timed('choose virtual or external', package=_spec_name)
     def choose_virtual_or_external(self, spec):
         """Given a list of candidate virtual and external packages, try to
            find one that is most ABI compatible.
@@ -127,6 +145,7 @@ class DefaultConcretizer(object):
                           spack.abi.compatible(spec, abi_exemplar, loose=True),
                           spack.abi.compatible(spec, abi_exemplar)))
 
+    @timed('concretize version', package=_spec_name)
     def concretize_version(self, spec):
         """If the spec is already concrete, return.  Otherwise take
            the preferred version from spackconfig, and default to the package's
@@ -203,6 +222,7 @@ class DefaultConcretizer(object):
 
         return True   # Things changed
 
+    @timed('concretize architecture', package=_spec_name)
     def concretize_architecture(self, spec):
         """If the spec is empty provide the defaults of the platform. If the
         architecture is not a string type, then check if either the platform,
@@ -238,6 +258,7 @@ class DefaultConcretizer(object):
 
         return spec_changed
 
+    @timed('concretize variants', package=_spec_name)
     def concretize_variants(self, spec):
         """If the spec already has variants filled in, return.  Otherwise, add
            the user preferences from packages.yaml or the default variants from
@@ -256,6 +277,7 @@ class DefaultConcretizer(object):
 
         return changed
 
+    @timed('concretize compiler', package=_spec_name)
     def concretize_compiler(self, spec):
         """If the spec already has a compiler, we're done.  If not, then take
            the compiler used for the nearest ancestor with a compiler
@@ -336,6 +358,7 @@ class DefaultConcretizer(object):
         assert(spec.compiler.concrete)
         return True  # things changed.
 
+    @timed('concretize compiler flags', package=_spec_name)
     def concretize_compiler_flags(self, spec):
         """
         The compiler flags are updated to match those of the spec whose
@@ -419,6 +442,234 @@ def find_spec(spec, condition, default=None):
     return default   # Nothing matched the condition; return default.
 
 
+#: Version of the format of concretization cache entries
+_concretization_cache_version = 1
+
+#: Configuration sections that can change the result of concretization
+_concretization_config_sections = ('compilers', 'packages', 'repos')
+
+
+def concretization_cache_enabled():
+    """Whether concretization results are cached in the misc cache."""
+    config = spack.config.get_config('config')
+    return config.get('concretization_cache', False)
+
+
+@llnl.util.lang.memoized
+def _repo_fingerprint(packages_path):
+    """Hash of the names and stat info of all package.py files in a repo.
+
+    This uses the same stat info as the provider and tag indexes, which
+    is gathered once per process.  With ``package_stats_cache``, only the
+    list of packages comes from the misc cache; each package.py is still
+    stat'ed, so an edited package changes the fingerprint.
+    """
+    checker = spack.repository.FastPackageChecker(packages_path)
+    stats = sorted((name, sinfo.st_mtime, sinfo.st_size)
+                   for name, sinfo in checker.items())
+    return hashlib.sha256(json.dumps(stats).encode('utf-8')).hexdigest()
+
+
+def concretization_cache_key(spec):
+    """Key of the concretization cache entry for an abstract spec.
+
+    The key covers the spec itself and everything else that can change
+    how it is concretized: the Spack version, the host architecture,
+    the merged ``compilers``, ``packages`` and ``repos`` configuration,
+    and the stat info of the package.py files in all repositories.
+
+    Returns:
+        str or None: the key, or None if the cache is disabled
+    """
+    if not concretization_cache_enabled():
+        return None
+
+    config = [spack.config.get_config(section)
+              for section in _concretization_config_sections]
+    repos = [(repo.namespace, _repo_fingerprint(repo.packages_path))
+             for repo in spack.repo.repos]
+
+    fingerprint = json.dumps([
+        _concretization_cache_version,
+        str(spack.spack_version),
+        str(spack.architecture.sys_type()),
+        type(spack.concretizer).__name__,
+        spec.dag_hash(),
+        config,
+        repos
+    ], sort_keys=True)
+    digest = hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()
+    return 'concretization/{0}.json'.format(digest)
+
+
+def _concretization_to_dict(spec):
+    """Serialize a concrete spec for the concretization cache.
+
+    Unlike ``spec.yaml`` files, this keeps build dependencies, the names
+    of external modules and the order of patches, so that a spec read
+    back is the same as a freshly concretized one.
+    """
+    nodes = []
+    for s in spec.traverse(deptype='all'):
+        node = s.to_node_dict()
+        node[s.name].pop('dependencies', None)
+
+        patches = None
+        if 'patches' in s.variants:
+            patches = getattr(s.variants['patches'],
+                              '_patches_in_order_of_appearance', None)
+
+        nodes.append({
+            'node': node,
+            'dependencies': sorted(
+                [name, list(dspec.deptypes)]
+                for name, dspec in s.dependencies_dict().items()),
+            'external_module': s.external_module,
+            'patches': patches
+        })
+    return {'nodes': nodes}
+
+
+def _concretization_from_dict(data, spec):
+    """Make ``spec`` the concrete spec serialized in ``data``.
+
+    Raises ValueError, KeyError, TypeError, IndexError or SpackError if
+    ``data`` is malformed, in which case ``spec`` is not changed.
+    """
+    nodes = data['nodes']
+    specs = [spack.spec.Spec.from_node_dict(n['node']) for n in nodes]
+    by_name = dict((s.name, s) for s in specs)
+    for s, node in zip(specs, nodes):
+        s.external_module = node['external_module']
+        for name, deptypes in node['dependencies']:
+            s._add_dependency(by_name[name], tuple(deptypes))
+    cached = specs[0]
+    cached._mark_concrete()
+
+    spec._dup(cached, caches=True)
+
+    # Variant copies don't keep the order of patches, so restore it.
+    by_name = dict((s.name, s) for s in spec.traverse(deptype='all'))
+    for node in nodes:
+        if node['patches'] is not None:
+            name = next(iter(node['node']))
+            variant = by_name[name].variants['patches']
+            variant._patches_in_order_of_appearance = node['patches']
+
+    for s in spec.traverse():
+        s.package.spec = s
+
+
+def write_concretization(key, spec):
+    """Store a concrete spec under a concretization cache key."""
+    spack.misc_cache.init_entry(key)
+    with spack.misc_cache.write_transaction(key) as (old, new):
+        sjson.dump(_concretization_to_dict(spec), new)
+
+
+def read_concretization(key, spec):
+    """Concretize ``spec`` from a concretization cache entry.
+
+    Returns:
+        bool: True if there was a valid entry and ``spec`` is now
+        concrete, False if ``spec`` was not changed
+    """
+    if not spack.misc_cache.init_entry(key):
+        return False
+
+    try:
+        with spack.misc_cache.read_transaction(key) as f:
+            _concretization_from_dict(sjson.load(f), spec)
+    except (ValueError, KeyError, TypeError, IndexError,
+            spack.error.SpackError) as e:
+        tty.debug('Ignoring bad concretization cache entry %s: %s'
+                  % (key, e))
+        return False
+    return True
+
+
+#: Result of concretizing one spec with ``concretize_specs()``.  ``error``
+#: is the SpackError that was raised, and ``concrete`` is None if there
+#: was one.
+ConcretizationResult = collections.namedtuple(
+    'ConcretizationResult', ['abstract', 'concrete', 'seconds', 'error'])
+
+
+def _concretize_one(abstract):
+    """Concretize a copy of an abstract spec and time it."""
+    start = time.time()
+    concrete, error = abstract.copy(), None
+    try:
+        concrete.concretize()
+    except spack.error.SpackError as e:
+        concrete, error = None, e
+    return ConcretizationResult(
+        abstract, concrete, time.time() - start, error)
+
+
+def _concretize_in_worker(text):
+    """Concretize a spec string in a worker process of concretize_specs().
+
+    Returns the serialized concrete spec, the time it took, and any error
+    as a plain SpackError, since subclasses may not survive pickling.
+    """
+    result = _concretize_one(spack.spec.Spec(text))
+    if result.error:
+        error = spack.error.SpackError(
+            result.error.message, result.error.long_message)
+        return None, result.seconds, error
+    return _concretization_to_dict(result.concrete), result.seconds, None
+
+
+def concretize_specs(specs, jobs=1):
+    """Concretize many abstract specs in one go.
+
+    The provider index, compiler configuration and package preferences
+    are loaded once and shared by all the specs.  With ``jobs > 1``, the
+    specs are concretized by a pool of worker processes, which are
+    forked after those are loaded.  The abstract specs are not modified.
+
+    Args:
+        specs (list): abstract specs, as Spec objects or strings
+        jobs (int): number of processes to concretize with
+
+    Returns:
+        list: a ConcretizationResult for each spec, in the same order
+    """
+    specs = [s if isinstance(s, spack.spec.Spec) else spack.spec.Spec(s)
+             for s in specs]
+
+    # Load what every concretization needs before the workers fork.
+    spack.repo.provider_index
+    spack.compilers.all_compiler_specs()
+    PackagePrefs._packages_config
+
+    jobs = min(jobs, len(specs))
+    if jobs <= 1:
+        return [_concretize_one(s) for s in specs]
+
+    pool = multiprocessing.Pool(jobs)
+    try:
+        outputs = pool.map(
+            _concretize_in_worker, [str(s) for s in specs], chunksize=1)
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+    results = []
+    for abstract, (data, seconds, error) in zip(specs, outputs):
+        concrete = None
+        if data is not None:
+            concrete = abstract.copy()
+            _concretization_from_dict(data, concrete)
+        results.append(
+            ConcretizationResult(abstract, concrete, seconds, error))
+    return results
+
+
 def _compiler_concretization_failure(compiler_spec, arch):
     # Distinguish between the case that there are compilers for
     # the arch but not with the given compiler spec and the case that
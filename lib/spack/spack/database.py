@@ -43,6 +43,9 @@ import os
 import sys
 import socket
 import contextlib
+import functools
+import json
+import uuid
 from six import string_types
 from six import iteritems
 
@@ -67,7 +70,11 @@ from spack.version import Version
 _db_dirname = '.spack-db'
 
 # DB version.  This is stuck in the DB file to track changes in format.
-_db_version = Version('0.9.3')
+_db_version = Version('0.9.4')
+
+# The journal is compacted into the index once it has more entries than
+# the DB has records, but never when it has fewer than this many.
+_journal_min_entries = 256
 
 # Timeout for spack database locks in seconds
 _db_lock_timeout = 60
@@ -103,18 +110,55 @@ class InstallRecord(object):
     actually remove from the database until a spec has no installed
     dependents left.
 
+    Records read from the index file are created without a spec; it is
+    built from the record's node dict the first time it is accessed.
+
     """
 
     def __init__(self, spec, path, installed, ref_count=0, explicit=False):
-        self.spec = spec
+        self._spec = spec
         self.path = str(path)
         self.installed = bool(installed)
         self.ref_count = ref_count
         self.explicit = explicit
 
+        # Node dict and callback used to build the spec lazily.
+        self._spec_dict = None
+        self._materialize = None
+
+    @property
+    def spec(self):
+        if self._spec is None and self._materialize is not None:
+            self._materialize()
+        return self._spec
+
+    @property
+    def materialized(self):
+        """Whether the Spec for this record has been built."""
+        return self._spec is not None
+
+    def _index_names(self):
+        """Package and compiler name of this record, for the DB indexes.
+
+        Unlike ``self.spec.name``, this does not build the spec.
+        """
+        if not self.materialized:
+            name = next(iter(self._spec_dict))
+            compiler = self._spec_dict[name].get('compiler')
+            return name, compiler and compiler['name']
+
+        compiler = self.spec.compiler
+        return self.spec.name, compiler and compiler.name
+
     def to_dict(self):
+        # Records that were never accessed are written back verbatim.
+        if self.materialized:
+            spec_dict = self.spec.to_node_dict()
+        else:
+            spec_dict = self._spec_dict
+
         return {
-            'spec': self.spec.to_node_dict(),
+            'spec': spec_dict,
             'path': self.path,
             'installed': self.installed,
             'ref_count': self.ref_count,
@@ -167,6 +211,8 @@ class Database(object):
         # Set up layout of database files within the db dir
         self._old_yaml_index_path = join_path(self._db_dir, 'index.yaml')
         self._index_path = join_path(self._db_dir, 'index.json')
+        self._verifier_path = join_path(self._db_dir, 'index_verifier')
+        self._journal_path = join_path(self._db_dir, 'index.journal')
         self._lock_path = join_path(self._db_dir, 'lock')
 
         # This is for other classes to use to lock prefix directories.
@@ -180,9 +226,34 @@ class Database(object):
         self.lock = Lock(self._lock_path)
         self._data = {}
 
+        # Secondary indexes on ``_data``, mapping package and compiler
+        # names to DAG hashes.  They narrow down the records a query has
+        # to run ``satisfies()`` on.
+        self._by_name = {}
+        self._by_compiler = {}
+
         # whether there was an error at the start of a read transaction
         self._error = None
 
+        # Stamp of the index file contents currently held in ``_data``.
+        # If it still matches what is on disk at the start of the next
+        # transaction, the index is not read and parsed again.
+        self._last_seen_stamp = None
+
+        # Changes made by write transactions are appended to a journal
+        # instead of rewriting the whole index.  Journal entries carry
+        # the generation of the index they apply to; ``_journal_offset``
+        # is how far we have read the journal, ``_journal_entries`` how
+        # many entries there are for the current generation.
+        self._generation = None
+        self._journal_offset = 0
+        self._journal_entries = 0
+
+        # Keys of records changed in the current write transaction, and
+        # whether the whole index must be rewritten instead (reindex).
+        self._dirty_keys = set()
+        self._rewrite_index = False
+
     def write_transaction(self, timeout=_db_lock_timeout):
         """Get a write lock context manager for use in a `with` block."""
         return WriteTransaction(self.lock, self._read, self._write, timeout)
@@ -249,7 +320,8 @@ class Database(object):
         database = {
             'database': {
                 'installs': installs,
-                'version': str(_db_version)
+                'version': str(_db_version),
+                'generation': self._generation
             }
         }
 
@@ -259,13 +331,11 @@ class Database(object):
             raise syaml.SpackYAMLError(
                 "error writing YAML database:", str(e))
 
-    def _read_spec_from_dict(self, hash_key, installs):
-        """Recursively construct a spec from a hash in a YAML database.
+    def _read_spec_from_dict(self, hash_key, spec_dict):
+        """Construct a spec node from its node dict in the database.
 
         Does not do any locking.
         """
-        spec_dict = installs[hash_key]['spec']
-
         # Install records don't include hash with spec, so we add it in here
         # to ensure it is read properly.
         for name in spec_dict:
@@ -275,11 +345,10 @@ class Database(object):
         spec = spack.spec.Spec.from_node_dict(spec_dict)
         return spec
 
-    def _assign_dependencies(self, hash_key, installs, data):
+    def _assign_dependencies(self, hash_key, spec_dict, data):
         # Add dependencies from other records in the install DB to
         # form a full spec.
         spec = data[hash_key].spec
-        spec_dict = installs[hash_key]['spec']
 
         if 'dependencies' in spec_dict[spec.name]:
             yaml_deps = spec_dict[spec.name]['dependencies']
@@ -304,7 +373,7 @@ class Database(object):
         if format.lower() == 'json':
             load = sjson.load
         elif format.lower() == 'yaml':
-            load = syaml.load
+            load = syaml.load_fast
         else:
             raise ValueError("Invalid database format: %s" % format)
 
@@ -335,6 +404,10 @@ class Database(object):
         check('version' in db, "No 'version' in YAML DB.")
 
         installs = db['installs']
+        self._generation = db.get('generation')
+        self._journal_offset = 0
+        self._journal_entries = 0
+        self._dirty_keys.clear()
 
         # TODO: better version checking semantics.
         version = Version(db['version'])
@@ -344,59 +417,111 @@ class Database(object):
             self.reindex(spack.store.layout)
             installs = dict((k, v.to_dict()) for k, v in self._data.items())
 
-        def invalid_record(hash_key, error):
-            msg = ("Invalid record in Spack database: "
-                   "hash: %s, cause: %s: %s")
-            msg %= (hash_key, type(e).__name__, str(e))
-            raise CorruptDatabaseError(msg, self._index_path)
-
-        # Build up the database in three passes:
-        #
-        #   1. Read in all specs without dependencies.
-        #   2. Hook dependencies up among specs.
-        #   3. Mark all specs concrete.
-        #
-        # The database is built up so that ALL specs in it share nodes
-        # (i.e., its specs are a true Merkle DAG, unlike most specs.)
-
-        # Pass 1: Iterate through database and build specs w/o dependencies
+        # Only create the records here.  Their specs are built when they
+        # are first accessed, so that commands looking at a handful of
+        # specs do not pay for building all of them.  Specs are built
+        # so that ALL specs in the DB share nodes (i.e., its specs are a
+        # true Merkle DAG, unlike most specs.)
         data = {}
         for hash_key, rec in installs.items():
-            try:
-                # This constructs a spec DAG from the list of all installs
-                spec = self._read_spec_from_dict(hash_key, installs)
+            data[hash_key] = self._lazy_record(hash_key, rec, data)
 
-                # Insert the brand new spec in the database.  Each
-                # spec has its own copies of its dependency specs.
-                # TODO: would a more immmutable spec implementation simplify
-                #       this?
-                data[hash_key] = InstallRecord.from_dict(spec, rec)
+        self._data = data
+        self._rebuild_indexes()
 
-            except Exception as e:
-                invalid_record(hash_key, e)
+    def _lazy_record(self, hash_key, rec_dict, data):
+        """Create a record whose spec is built from ``rec_dict`` later.
 
-        # Pass 2: Assign dependencies once all specs are created.
-        for hash_key in data:
-            try:
-                self._assign_dependencies(hash_key, installs, data)
-            except Exception as e:
-                invalid_record(hash_key, e)
+        ``data`` is the mapping the record is going to be part of, where
+        its dependencies are looked up.
+        """
+        try:
+            record = InstallRecord.from_dict(None, rec_dict)
+            record._spec_dict = rec_dict['spec']
+            record._index_names()
+        except Exception as e:
+            self._invalid_record(hash_key, e)
 
-        # Pass 3: Mark all specs concrete.  Specs representing real
-        # installations must be explicitly marked.
-        # We do this *after* all dependencies are connected because if we
-        # do it *while* we're constructing specs,it causes hashes to be
-        # cached prematurely.
-        for hash_key, rec in data.items():
-            rec.spec._mark_concrete()
+        record._materialize = functools.partial(
+            self._materialize_spec, hash_key, data)
+        return record
 
-        self._data = data
+    def _materialize_spec(self, hash_key, data):
+        """Build the spec of a record read from the index file.
 
-    def reindex(self, directory_layout):
+        Dependencies are taken from (and, if needed, built for) the
+        other records in ``data``.  Does not do any locking.
+        """
+        rec = data[hash_key]
+        spec_dict = rec._spec_dict
+        try:
+            rec._spec = self._read_spec_from_dict(hash_key, spec_dict)
+            self._assign_dependencies(hash_key, spec_dict, data)
+        except CorruptDatabaseError:
+            rec._spec = None
+            raise
+        except Exception as e:
+            rec._spec = None
+            self._invalid_record(hash_key, e)
+
+        # Dependencies are already concrete, so only this node needs to
+        # be marked.  We do this *after* the dependencies are connected,
+        # because otherwise the hash would be cached prematurely.
+        rec._spec._normal = True
+        rec._spec._concrete = True
+        rec._spec_dict = None
+        rec._materialize = None
+
+    def _materialize_all(self):
+        """Build the specs of all records.
+
+        Specs only get links to their dependents when those are built,
+        so this is needed before following dependents in the DB.
+        """
+        for rec in self._data.values():
+            rec.spec
+
+    def _invalid_record(self, hash_key, error):
+        msg = ("Invalid record in Spack database: "
+               "hash: %s, cause: %s: %s")
+        msg %= (hash_key, type(error).__name__, str(error))
+        raise CorruptDatabaseError(msg, self._index_path)
+
+    def _index_record(self, key, rec):
+        """Add the record for ``key`` to the secondary indexes."""
+        name, compiler = rec._index_names()
+        self._by_name.setdefault(name, set()).add(key)
+        if compiler:
+            self._by_compiler.setdefault(compiler, set()).add(key)
+
+    def _delete_record(self, key):
+        """Remove the record for ``key`` from the DB and its indexes."""
+        rec = self._data.pop(key)
+        self._dirty_keys.add(key)
+        for index, name in zip((self._by_name, self._by_compiler),
+                               rec._index_names()):
+            keys = index.get(name)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[name]
+
+    def _rebuild_indexes(self):
+        """Recompute the secondary indexes after ``_data`` was replaced."""
+        self._by_name = {}
+        self._by_compiler = {}
+        for key, rec in self._data.items():
+            self._index_record(key, rec)
+
+    def reindex(self, directory_layout, jobs=1, progress=None):
         """Build database index from scratch based on a directory layout.
 
         Locks the DB if it isn't locked already.
 
+        Spec files in the layout are read by up to ``jobs`` processes.
+        The records are added to the DB in this process, under the write
+        lock.  ``progress`` is passed on to ``directory_layout.all_specs``.
+
         """
         # Special transaction to avoid recursive reindex calls and to
         # ignore errors if we need to rebuild a corrupt database.
@@ -404,15 +529,21 @@ class Database(object):
             try:
                 if os.path.isfile(self._index_path):
                     self._read_from_file(self._index_path)
+                    self._read_journal()
+                    self._materialize_all()
             except CorruptDatabaseError as e:
                 self._error = e
                 self._data = {}
+                self._rebuild_indexes()
 
         transaction = WriteTransaction(
             self.lock, _read_suppress_error, self._write, _db_lock_timeout
         )
 
         with transaction:
+            # The index is rebuilt from scratch, so write all of it.
+            self._rewrite_index = True
+
             if self._error:
                 tty.warn(
                     "Spack database was corrupt. Will rebuild. Error was:",
@@ -430,11 +561,14 @@ class Database(object):
             try:
                 # Initialize data in the reconstructed DB
                 self._data = {}
+                self._rebuild_indexes()
 
                 # Start inspecting the installed prefixes
                 processed_specs = set()
 
-                for spec in directory_layout.all_specs():
+                all_specs = directory_layout.all_specs(
+                    jobs=jobs, progress=progress)
+                for spec in all_specs:
                     # Try to recover explicit value from old DB, but
                     # default it to True if DB was corrupt. This is
                     # just to be conservative in case a command like
@@ -494,6 +628,7 @@ class Database(object):
             except BaseException:
                 # If anything explodes, restore old data, skip write.
                 self._data = old_data
+                self._rebuild_indexes()
                 raise
 
     def _check_ref_counts(self):
@@ -521,7 +656,7 @@ class Database(object):
                     (key, found, expected, self._index_path))
 
     def _write(self, type, value, traceback):
-        """Write the in-memory database index to its file path.
+        """Write changes to the in-memory database to its file path.
 
         This is a helper function called by the WriteTransaction context
         manager. If there is an exception while the write lock is active,
@@ -529,27 +664,174 @@ class Database(object):
         database *may* be left in an inconsistent state.  It will be consistent
         after the start of the next transaction, when it read from disk again.
 
+        Records changed in the transaction are appended to the journal.
+        The whole index is only rewritten if it does not exist yet, after
+        a reindex, or when the journal has grown large enough to compact.
+
         This routine does no locking.
 
         """
-        # Do not write if exceptions were raised
+        # Do not write if exceptions were raised.  The in-memory data may
+        # be inconsistent now, so force a re-read on the next transaction.
         if type is not None:
+            self._last_seen_stamp = None
+            self._dirty_keys.clear()
+            self._rewrite_index = False
             return
 
+        try:
+            compact = self._journal_entries + len(self._dirty_keys) > max(
+                _journal_min_entries, len(self._data))
+            if (self._rewrite_index or compact or
+                    not os.path.isfile(self._index_path)):
+                self._write_index()
+            elif self._dirty_keys:
+                self._append_journal()
+        finally:
+            self._dirty_keys.clear()
+            self._rewrite_index = False
+
+    def _write_index(self):
+        """Write the whole in-memory database to the index file.
+
+        This starts a new generation, so the journal is emptied.
+        """
         temp_file = self._index_path + (
             '.%s.%s.temp' % (socket.getfqdn(), os.getpid()))
 
         # Write a temporary database file them move it into place
         try:
+            self._generation = str(uuid.uuid4())
             with open(temp_file, 'w') as f:
                 self._write_to_file(f)
             os.rename(temp_file, self._index_path)
+
+            # Record the new generation for the index, so that readers
+            # know they have to re-read it.
+            with open(self._verifier_path, 'w') as f:
+                f.write(self._generation)
+
+            # Entries in the journal are all part of the new index now.
+            with open(self._journal_path, 'w'):
+                pass
         except BaseException:
             # Clean up temp file if something goes wrong.
+            self._last_seen_stamp = None
             if os.path.exists(temp_file):
                 os.remove(temp_file)
             raise
 
+        # We wrote the index from our in-memory data, so it is current.
+        self._last_seen_stamp = self._index_stamp()
+        self._journal_offset = 0
+        self._journal_entries = 0
+
+    def _append_journal(self):
+        """Append the records changed in this transaction to the journal.
+
+        Each entry holds the new state of one record, or null if the
+        record was removed, so replaying entries is idempotent.
+        """
+        lines = []
+        for key in sorted(self._dirty_keys):
+            rec = self._data.get(key)
+            entry = {
+                'generation': self._generation,
+                'key': key,
+                'record': rec.to_dict() if rec else None
+            }
+            lines.append(json.dumps(entry, separators=(',', ':')) + '\n')
+
+        try:
+            with open(self._journal_path, 'a+') as f:
+                # Drop any partial entry left by a writer that died.
+                f.truncate(self._journal_offset)
+                f.write(''.join(lines))
+                f.flush()
+                self._journal_offset = f.tell()
+        except BaseException:
+            self._last_seen_stamp = None
+            raise
+
+        self._journal_entries += len(lines)
+
+    def _read_journal(self):
+        """Apply journal entries written since we last read the journal.
+
+        Entries for other generations of the index were written before
+        the index was last rewritten, and are ignored.  Does no locking.
+        """
+        try:
+            with open(self._journal_path, 'r') as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() < self._journal_offset:
+                    # Truncated without a new index; read everything.
+                    self._last_seen_stamp = None
+                    self._read_from_file(self._index_path, format='json')
+                f.seek(self._journal_offset)
+                tail = f.read()
+        except (IOError, OSError):
+            return
+
+        # Only complete lines are entries; a partial last line is from a
+        # writer that is gone, and the next writer will drop it.
+        for line in tail.splitlines(True):
+            if not line.endswith('\n'):
+                break
+            self._journal_offset += len(line)
+
+            try:
+                entry = sjson.load(line)
+                if entry['generation'] != self._generation:
+                    continue
+                self._apply_journal_entry(entry['key'], entry['record'])
+            except CorruptDatabaseError:
+                raise
+            except Exception as e:
+                raise CorruptDatabaseError(
+                    "error reading database journal:", str(e))
+            self._journal_entries += 1
+
+    def _apply_journal_entry(self, key, rec_dict):
+        """Set the record for ``key`` to the state in a journal entry."""
+        if rec_dict is None:
+            if key in self._data:
+                self._delete_record(key)
+                self._dirty_keys.discard(key)
+            return
+
+        rec = self._data.get(key)
+        if rec is None:
+            rec = self._lazy_record(key, rec_dict, self._data)
+            self._data[key] = rec
+            self._index_record(key, rec)
+        else:
+            # The spec for a hash never changes, so keep the existing one.
+            rec.path = str(rec_dict['path'])
+            rec.installed = bool(rec_dict['installed'])
+            rec.ref_count = rec_dict['ref_count']
+            rec.explicit = rec_dict.get('explicit', False)
+
+    def _index_stamp(self):
+        """Return a stamp identifying the current contents of the index.
+
+        The stamp combines the generation written to the verifier file
+        on every write with the ``stat`` data of the index file, so that
+        indexes written by Spack versions without a verifier are also
+        detected as changed.  Returns None if no stamp can be computed,
+        which means the index must always be read.
+        """
+        try:
+            with open(self._verifier_path, 'r') as f:
+                verifier = f.read().strip()
+            st = os.stat(self._index_path)
+        except (IOError, OSError):
+            return None
+
+        if not verifier:
+            return None
+        return (verifier, st.st_ino, st.st_size, st.st_mtime)
+
     def _read(self):
         """Re-read Database from the data in the set location.
 
@@ -559,8 +841,15 @@ class Database(object):
 
         """
         if os.path.isfile(self._index_path):
-            # Read from JSON file if a JSON database exists
-            self._read_from_file(self._index_path, format='json')
+            # Read from JSON file if a JSON database exists, unless the
+            # in-memory data is already current.  Then catch up with the
+            # changes in the journal.
+            stamp = self._index_stamp()
+            if stamp is None or stamp != self._last_seen_stamp:
+                self._last_seen_stamp = None
+                self._read_from_file(self._index_path, format='json')
+                self._last_seen_stamp = stamp
+            self._read_journal()
 
         elif os.path.isfile(self._old_yaml_index_path):
             if os.access(self._db_dir, os.R_OK | os.W_OK):
@@ -615,12 +904,14 @@ class Database(object):
             new_spec = spec.copy(deps=False)
             self._data[key] = InstallRecord(
                 new_spec, path, installed, ref_count=0, explicit=explicit)
+            self._index_record(key, self._data[key])
 
             # Connect dependencies from the DB to the new copy.
             for name, dep in iteritems(spec.dependencies_dict(_tracked_deps)):
                 dkey = dep.spec.dag_hash()
                 new_spec._add_dependency(self._data[dkey].spec, dep.deptypes)
                 self._data[dkey].ref_count += 1
+                self._dirty_keys.add(dkey)
 
             # Mark concrete once everything is built, and preserve
             # the original hash of concrete specs.
@@ -632,6 +923,7 @@ class Database(object):
             self._data[key].installed = True
 
         self._data[key].explicit = explicit
+        self._dirty_keys.add(key)
 
     @_autospec
     def add(self, spec, directory_layout, explicit=False):
@@ -670,9 +962,10 @@ class Database(object):
 
         rec = self._data[key]
         rec.ref_count -= 1
+        self._dirty_keys.add(key)
 
         if rec.ref_count == 0 and not rec.installed:
-            del self._data[key]
+            self._delete_record(key)
             for dep in spec.dependencies(_tracked_deps):
                 self._decrement_ref_count(dep)
 
@@ -684,9 +977,10 @@ class Database(object):
 
         if rec.ref_count > 0:
             rec.installed = False
+            self._dirty_keys.add(key)
             return rec.spec
 
-        del self._data[key]
+        self._delete_record(key)
         for dep in rec.spec.dependencies(_tracked_deps):
             self._decrement_ref_count(dep)
 
@@ -710,12 +1004,29 @@ class Database(object):
         with self.write_transaction():
             return self._remove(spec)
 
+    @_autospec
+    def update_explicit(self, spec, explicit):
+        """Update whether a spec in the database was installed explicitly."""
+        with self.write_transaction():
+            key = self._get_matching_spec_key(spec)
+            rec = self._data[key]
+            if rec.explicit != explicit:
+                rec.explicit = explicit
+                self._dirty_keys.add(key)
+
     @_autospec
     def installed_relatives(self, spec, direction='children', transitive=True):
         """Return installed specs related to this one."""
         if direction not in ('parents', 'children'):
             raise ValueError("Invalid direction: %s" % direction)
 
+        with self.read_transaction():
+            if direction == 'parents':
+                self._materialize_all()
+            return self._installed_relatives(spec, direction, transitive)
+
+    def _installed_relatives(self, spec, direction, transitive):
+        """Non-locking version of installed_relatives()."""
         relatives = set()
         for spec in self.query(spec):
             if transitive:
@@ -802,6 +1113,9 @@ class Database(object):
 
         """
         with self.read_transaction():
+            if isinstance(query_spec, string_types):
+                query_spec = spack.spec.Spec(query_spec)
+
             # Just look up concrete specs with hashes; no fancy search.
             if (isinstance(query_spec, spack.spec.Spec) and
                 query_spec._concrete):
@@ -812,10 +1126,11 @@ class Database(object):
                 else:
                     return []
 
-            # Abstract specs require more work -- currently we test
-            # against everything.
+            # Abstract specs require more work -- use the indexes to
+            # find candidates, then test against each of them.
             results = []
-            for key, rec in self._data.items():
+            for key in self._query_candidates(query_spec):
+                rec = self._data[key]
                 if installed is not any and rec.installed != installed:
                     continue
                 if explicit is not any and rec.explicit != explicit:
@@ -828,6 +1143,56 @@ class Database(object):
 
             return sorted(results)
 
+    def _query_candidates(self, query_spec):
+        """Return keys of records that could satisfy ``query_spec``.
+
+        This is a superset of the records matching the query, computed
+        from the secondary indexes.  Does no locking.
+        """
+        if query_spec is any:
+            return list(self._data)
+
+        candidates = None
+        if query_spec.name:
+            names = set([query_spec.name])
+            if query_spec.virtual:
+                providers = self._provider_names(query_spec.name)
+                if providers is None:
+                    return list(self._data)
+                names.update(providers)
+
+            candidates = set()
+            for name in names:
+                candidates.update(self._by_name.get(name, ()))
+
+        if query_spec.compiler:
+            by_compiler = self._by_compiler.get(query_spec.compiler.name, ())
+            if candidates is None:
+                candidates = set(by_compiler)
+            else:
+                candidates.intersection_update(by_compiler)
+
+        if candidates is None:
+            return list(self._data)
+        return candidates
+
+    def _provider_names(self, vpkg_name):
+        """Names of packages that may provide the virtual ``vpkg_name``.
+
+        Returns None if the providers cannot be determined from the
+        current repository, in which case queries fall back to testing
+        every record.
+        """
+        try:
+            provider_map = spack.repo.provider_index.providers
+        except AttributeError:
+            return None
+
+        names = set()
+        for provider_specs in provider_map.get(vpkg_name, {}).values():
+            names.update(s.name for s in provider_specs)
+        return names
+
     def query_one(self, query_spec, known=any, installed=True):
         """Query for exactly one spec that matches the query spec.
 
@@ -25,6 +25,7 @@
 import os
 import shutil
 import glob
+import multiprocessing
 import tempfile
 import yaml
 import re
@@ -33,8 +34,13 @@ from llnl.util.filesystem import join_path, mkdirp
 
 import spack
 import spack.spec
+import spack.util.spack_yaml as syaml
 from spack.error import SpackError
 
+# Below this many spec files, all_specs() does not bother with a
+# process pool, since starting it costs more than reading the files.
+_min_spec_files_for_pool = 64
+
 
 def _check_concrete(spec):
     """If the spec is not concrete, raise a ValueError"""
@@ -42,6 +48,19 @@ def _check_concrete(spec):
         raise ValueError('Specs passed to a DirectoryLayout must be concrete!')
 
 
+def _load_spec_file(path):
+    """Load the raw YAML data in a spec file.
+
+    This runs in worker processes, so it returns a (path, data, error)
+    tuple instead of raising, and the parent reports the error.
+    """
+    try:
+        with open(path) as f:
+            return path, syaml.load_fast(f), None
+    except Exception as e:
+        return path, None, str(e)
+
+
 class DirectoryLayout(object):
     """A directory layout is used to associate unique paths with specs.
        Different installations are going to want differnet layouts for their
@@ -64,9 +83,13 @@ class DirectoryLayout(object):
         """
         raise NotImplementedError()
 
-    def all_specs(self):
+    def all_specs(self, jobs=1, progress=None):
         """To be implemented by subclasses to traverse all specs for which there is
            a directory within the root.
+
+           ``jobs`` is the number of processes that may be used to read
+           specs, and ``progress``, if given, is called with the number
+           of specs read so far and the total number of specs.
         """
         raise NotImplementedError()
 
@@ -225,7 +248,7 @@ class YamlDirectoryLayout(DirectoryLayout):
         """Read the contents of a file and parse them as a spec"""
         try:
             with open(path) as f:
-                spec = spack.spec.Spec.from_yaml(f)
+                spec = spack.spec.Spec.from_yaml(f, fast=True)
         except Exception as e:
             if spack.debug:
                 raise
@@ -236,6 +259,19 @@ class YamlDirectoryLayout(DirectoryLayout):
         spec._mark_concrete()
         return spec
 
+    def _spec_from_data(self, path, data):
+        """Build a spec from the YAML data loaded from ``path``."""
+        try:
+            spec = spack.spec.Spec.from_dict(data)
+        except Exception as e:
+            if spack.debug:
+                raise
+            raise SpecReadError(
+                'Unable to read file: %s' % path, 'Cause: ' + str(e))
+
+        spec._mark_concrete()
+        return spec
+
     def spec_file_path(self, spec):
         """Gets full path to spec file"""
         _check_concrete(spec)
@@ -296,15 +332,48 @@ class YamlDirectoryLayout(DirectoryLayout):
             raise InconsistentInstallDirectoryError(
                 'Spec file in %s does not match hash!' % spec_file_path)
 
-    def all_specs(self):
+    def all_spec_files(self):
+        """Paths of the spec files of all prefixes within the root."""
         if not os.path.isdir(self.root):
             return []
 
         path_elems = ["*"] * len(self.path_scheme.split(os.sep))
         path_elems += [self.metadata_dir, self.spec_file_name]
         pattern = join_path(self.root, *path_elems)
-        spec_files = glob.glob(pattern)
-        return [self.read_spec(s) for s in spec_files]
+        return glob.glob(pattern)
+
+    def all_specs(self, jobs=1, progress=None):
+        spec_files = self.all_spec_files()
+        total = len(spec_files)
+
+        if jobs == 1 or total < _min_spec_files_for_pool:
+            specs = []
+            for path in spec_files:
+                specs.append(self.read_spec(path))
+                if progress:
+                    progress(len(specs), total)
+            return specs
+
+        # Parsing YAML dominates the cost of reading a spec file, so do
+        # that in worker processes and build the specs in this one.
+        specs = []
+        pool = multiprocessing.Pool(jobs)
+        try:
+            chunksize = max(1, total // (4 * jobs))
+            results = pool.imap(_load_spec_file, spec_files, chunksize)
+            for path, data, error in results:
+                if error is not None:
+                    raise SpecReadError(
+                        'Unable to read file: %s' % path, 'Cause: ' + error)
+                specs.append(self._spec_from_data(path, data))
+                if progress:
+                    progress(len(specs), total)
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+
+        return specs
 
     def specs_by_hash(self):
         by_hash = {}
@@ -974,6 +974,21 @@ def from_list_url(pkg):
             tty.msg("Could not determine url from list_url.")
 
 
+def atomic_archive(fetcher, destination):
+    """Call ``fetcher.archive(destination)``, but archive to a temporary
+    file and move it in place, so that other processes never see a
+    partial archive.
+    """
+    tmp = join_path(os.path.dirname(destination),
+                    '.%d.%s' % (os.getpid(), os.path.basename(destination)))
+    try:
+        fetcher.archive(tmp)
+        os.rename(tmp, destination)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
 class FsCache(object):
 
     def __init__(self, root):
@@ -990,7 +1005,7 @@ class FsCache(object):
 
         dst = join_path(self.root, relativeDst)
         mkdirp(os.path.dirname(dst))
-        fetcher.archive(dst)
+        atomic_archive(fetcher, dst)
 
     def fetcher(self, targetPath, digest, **kwargs):
         path = join_path(self.root, targetPath)
@@ -64,10 +64,10 @@ can take a number of specs as input.
 import sys
 
 from heapq import heapify, heappop, heappush
-from six import iteritems
 
 from llnl.util.tty.color import ColorStream
 
+import spack
 from spack.spec import Spec
 from spack.dependency import all_deptypes, canonical_deptype
 
@@ -543,7 +543,9 @@ def graph_dot(specs, deptype='all', static=False, out=None):
 
     # Static graph includes anything a package COULD depend on.
     if static:
-        names = set.union(*[s.package.possible_dependencies() for s in specs])
+        names = set.union(*[
+            spack.repo.get_metadata(s.name).possible_dependencies()
+            for s in specs])
         specs = [Spec(name) for name in names]
 
     labeled = set()
@@ -562,12 +564,15 @@ def graph_dot(specs, deptype='all', static=False, out=None):
             if spec.virtual:
                 continue
 
+            # Read the package's directives from the metadata index
+            metadata = spack.repo.get_metadata(spec.name)
+
             # Add edges for each depends_on in the package.
-            for dep_name, dep in iteritems(spec.package.dependencies):
+            for dep_name in metadata.dependencies:
                 deps.add((spec.name, dep_name))
 
             # If the package provides something, add an edge for that.
-            for provider in set(s.name for s in spec.package.provided):
+            for provider in set(s.name for s in metadata.provided):
                 deps.add((provider, spec.name))
 
         else:
@@ -0,0 +1,309 @@
+##############################################################################
+# Copyright (c) 2013-2017, Lawrence Livermore National Security, LLC.
+# Produced at the Lawrence Livermore National Laboratory.
+#
+# This file is part of Spack.
+# Created by Todd Gamblin, tgamblin@llnl.gov, All rights reserved.
+# LLNL-CODE-647188
+#
+# For details, see https://github.com/spack/spack
+# Please also see the NOTICE and LICENSE files for our notice and the LGPL.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License (as
+# published by the Free Software Foundation) version 2.1, February 1999.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the IMPLIED WARRANTY OF
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the terms and
+# conditions of the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+##############################################################################
+"""Install the dependencies of a package, possibly in several processes.
+
+``PackageBase.do_install()`` uses ``install_dependencies()`` to install
+each package in the DAG as soon as all of its dependencies are
+installed.  By default, it installs them one at a time, in post-order.
+If ``concurrent_builds`` is more than one, up to ``concurrent_builds``
+are installed at once in worker processes.  Each worker just calls
+``do_install()`` for one package, so every build still runs in its own
+``build_environment.fork()`` child.
+
+The make jobs (``build_jobs``, or ``spack install -j``) are split
+between the builds that run at the same time, so that together they
+don't oversubscribe the cores.
+
+Several ``spack install`` processes, e.g. on different nodes that share
+the install tree, can work on the same DAG.  Before installing a
+package, a process *claims* it by taking its prefix write lock without
+waiting.  If another process holds the lock, it moves on to other
+packages, and checks back with increasing delays until the lock is
+released.  If the package was installed in the meantime, it is not
+built again.
+"""
+import contextlib
+import multiprocessing
+import time
+
+from six.moves import cPickle
+from six.moves.queue import Empty
+
+import llnl.util.tty as tty
+from llnl.util.lock import LockError
+
+import spack
+import spack.prefetch
+import spack.store
+from spack.build_environment import InstallError
+
+__all__ = ['concurrent_builds', 'split_make_jobs', 'installed', 'claim',
+           'release', 'claim_when_free', 'install_dependencies']
+
+
+#: Seconds to wait for a result before checking for crashed workers
+_poll_interval = 1
+
+#: Shortest and longest time to wait for packages other processes install
+_min_wait = 0.1
+_max_wait = 5
+
+
+def concurrent_builds():
+    """Number of packages to build at once, from ``config.yaml``."""
+    import spack.config
+    config = spack.config.get_config('config')
+    return config.get('concurrent_builds', 1)
+
+
+def split_make_jobs(free_jobs, starting):
+    """Make jobs for the next of ``starting`` builds that start now.
+
+    Args:
+        free_jobs (int): make jobs not used by running builds
+        starting (int): number of builds that start now, including the
+            one to get jobs for
+
+    Returns:
+        int: make jobs for the build, at least one
+    """
+    return max(1, free_jobs // starting)
+
+
+def installed(spec):
+    """Whether the database says ``spec`` is installed.
+
+    The database is read again, in case another process installed it.
+    """
+    with spack.store.db.read_transaction():
+        try:
+            return spack.store.db.get_record(spec).installed
+        except KeyError:
+            return False
+
+
+def claim(spec):
+    """Take the prefix write lock of ``spec``, if no one else holds it.
+
+    Returns:
+        bool: True if the lock was taken; release it with ``release()``
+    """
+    try:
+        spack.store.db.prefix_lock(spec).acquire_write(0)
+        return True
+    except LockError:
+        return False
+
+
+def release(spec):
+    """Release a prefix write lock taken with ``claim()``."""
+    spack.store.db.prefix_lock(spec).release_write()
+
+
+def _waiting_for(spec):
+    tty.msg('Waiting for {0}, which another process is installing'
+            .format(spec.name))
+
+
+@contextlib.contextmanager
+def claim_when_free(spec):
+    """Claim ``spec``, waiting while another process holds it."""
+    wait = _min_wait
+    while not claim(spec):
+        if wait == _min_wait:
+            _waiting_for(spec)
+        time.sleep(wait)
+        wait = min(2 * wait, _max_wait)
+
+    try:
+        yield
+    finally:
+        release(spec)
+
+
+def _install_in_worker(spec, kwargs, results):
+    """Install one package in a worker process, and report back."""
+    error = None
+    try:
+        spec.package.do_install(**kwargs)
+    except BaseException as e:
+        # The parent knows the package; don't send it through the queue.
+        if isinstance(e, InstallError):
+            e.pkg = None
+        error = e
+
+    if error is not None:
+        try:
+            cPickle.dumps(error)
+        except Exception:
+            error = InstallError(
+                '%s: %s' % (type(error).__name__, error))
+
+    results.put((spec.dag_hash(), error))
+
+
+def install_dependencies(spec, builds, **kwargs):
+    """Install the dependencies of ``spec``, up to ``builds`` at once.
+
+    Packages are started in the order a post-order traversal would
+    install them, as soon as their dependencies are installed, but
+    packages whose sources are still being prefetched wait for packages
+    that are ready to build.  Packages that another process has claimed
+    are skipped until it releases them.
+    If one fails, no more are started; the builds that are already
+    running are allowed to finish, and then the first error is raised.
+
+    Args:
+        spec (Spec): concrete spec to install the dependencies of
+        builds (int): maximum number of packages to build at once.  If
+            one, they are installed in this process.
+        **kwargs: passed to ``do_install()`` for each dependency.  Its
+            ``make_jobs`` are split between the builds.
+    """
+    pending = list(spec.traverse(order='post', root=False))
+    waiting_for = dict(
+        (s.dag_hash(), set(d.dag_hash() for d in s.dependencies()))
+        for s in pending)
+    total_jobs = kwargs.get('make_jobs') or spack.build_jobs
+
+    def done(dag_hash):
+        for deps in waiting_for.values():
+            deps.discard(dag_hash)
+
+    results = multiprocessing.Queue()
+    running = {}    # dag hash -> (spec, worker process, make jobs)
+    elsewhere = set()   # dag hashes claimed by other processes
+    wait = _min_wait
+    error = None
+
+    try:
+        while running or (pending and error is None):
+            ready = []
+            if error is None:
+                ready = [s for s in pending if not waiting_for[s.dag_hash()]]
+
+            if not ready and not running:
+                raise InstallError(
+                    'Cannot install dependencies of %s: %s are waiting on '
+                    'packages that are not in the DAG' % (
+                        spec.name, ', '.join(s.name for s in pending)))
+
+            # Build packages whose sources are fetched first.  Wait for
+            # the others only if there is nothing else to do.
+            ready.sort(key=lambda s: not spack.prefetch.done(s))
+
+            started = False
+            for s in list(ready):
+                if len(running) >= builds:
+                    break
+
+                if not spack.prefetch.done(s):
+                    if running:
+                        ready.remove(s)
+                        continue
+                    spack.prefetch.wait(s)
+
+                if not claim(s):
+                    if s.dag_hash() not in elsewhere:
+                        _waiting_for(s)
+                        elsewhere.add(s.dag_hash())
+                    ready.remove(s)
+                    continue
+
+                started = True
+                pending.remove(s)
+
+                # Installed packages only need their database entry
+                # checked, so don't start a worker for them.
+                if builds == 1 or installed(s):
+                    try:
+                        s.package.do_install(**kwargs)
+                    finally:
+                        release(s)
+                    done(s.dag_hash())
+
+                    # Go on in post-order with whatever is ready now
+                    break
+
+                free_jobs = total_jobs - sum(
+                    jobs for _, _, jobs in running.values())
+                starting = min(len(ready), builds - len(running))
+                jobs = split_make_jobs(free_jobs, starting)
+                ready.remove(s)
+
+                tty.debug('Starting install of {0} with {1} make jobs'
+                          .format(s.name, jobs))
+                worker = multiprocessing.Process(
+                    target=_install_in_worker,
+                    args=(s, dict(kwargs, make_jobs=jobs), results))
+                try:
+                    worker.start()
+                except BaseException:
+                    release(s)
+                    raise
+                running[s.dag_hash()] = (s, worker, jobs)
+
+            if not running:
+                # Everything that is ready is claimed by other processes.
+                # Check back later, less and less often.
+                if not started:
+                    time.sleep(wait)
+                    wait = min(2 * wait, _max_wait)
+                else:
+                    wait = _min_wait
+                continue
+
+            try:
+                dag_hash, e = results.get(timeout=_poll_interval)
+            except Empty:
+                # Make sure no worker died without telling us
+                for dag_hash, (s, worker, jobs) in list(running.items()):
+                    if not worker.is_alive() and worker.exitcode:
+                        del running[dag_hash]
+                        release(s)
+                        error = error or InstallError(
+                            'Install of %s died with exit code %d' % (
+                                s.name, worker.exitcode))
+                continue
+
+            s, worker, jobs = running.pop(dag_hash)
+            worker.join()
+            release(s)
+            if e is not None:
+                if isinstance(e, InstallError):
+                    e.pkg = s.package
+                error = error or e
+            else:
+                done(dag_hash)
+
+        if error is not None:
+            raise error
+
+    finally:
+        # Only left over if we were interrupted
+        for s, worker, jobs in running.values():
+            worker.terminate()
+            worker.join()
+            release(s)
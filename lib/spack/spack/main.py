@@ -33,6 +33,7 @@ import sys
 import os
 import inspect
 import pstats
+import time
 import argparse
 from six import StringIO
 
@@ -41,6 +42,8 @@ from llnl.util.tty.log import log_output
 
 import spack
 import spack.cmd
+import spack.hooks
+import spack.util.timing
 from spack.error import SpackError
 
 
@@ -98,20 +101,20 @@ def set_working_dir():
 
 
 def add_all_commands(parser):
-    """Add all spack subcommands to the parser."""
-    for cmd in spack.cmd.commands:
-        parser.add_command(cmd)
+    """Add summaries of all spack subcommands to the parser, for help."""
+    for cmd in spack.cmd.all_commands:
+        parser.add_command_summary(cmd)
 
 
 def index_commands():
     """create an index of commands by section for this help level"""
     index = {}
-    for command in spack.cmd.commands:
-        cmd_module = spack.cmd.get_module(command)
+    for command in spack.cmd.all_commands:
+        cmd_info = spack.cmd.get_command_info(command)
 
         # make sure command modules have required properties
         for p in required_command_properties:
-            prop = getattr(cmd_module, p, None)
+            prop = getattr(cmd_info, p, None)
             if not prop:
                 tty.die("Command doesn't define a property '%s': %s"
                         % (p, command))
@@ -119,9 +122,9 @@ def index_commands():
         # add commands to lists for their level and higher levels
         for level in reversed(levels):
             level_sections = index.setdefault(level, {})
-            commands = level_sections.setdefault(cmd_module.section, [])
+            commands = level_sections.setdefault(cmd_info.section, [])
             commands.append(command)
-            if level == cmd_module.level:
+            if level == cmd_info.level:
                 break
 
     return index
@@ -149,7 +152,7 @@ class SpackArgumentParser(argparse.ArgumentParser):
             self.actions = self._subparsers._actions[-1]._get_subactions()
 
         # make a set of commands not yet added.
-        remaining = set(spack.cmd.commands)
+        remaining = set(spack.cmd.all_commands)
 
         def add_group(group):
             formatter.start_section(group.title)
@@ -235,12 +238,8 @@ class SpackArgumentParser(argparse.ArgumentParser):
         # determine help from format above
         return formatter.format_help()
 
-    def add_command(self, name):
-        """Add one subcommand to this parser."""
-        # convert CLI command name to python module name
-        name = spack.cmd.get_python_name(name)
-
-        # lazily initialize any subparsers
+    def _init_subparsers(self):
+        """Lazily initialize the subparsers for commands."""
         if not hasattr(self, 'subparsers'):
             # remove the dummy "command" argument.
             if self._actions[-1].dest == 'command':
@@ -248,6 +247,12 @@ class SpackArgumentParser(argparse.ArgumentParser):
             self.subparsers = self.add_subparsers(metavar='COMMAND',
                                                   dest="command")
 
+    def add_command(self, name):
+        """Add one subcommand to this parser."""
+        # convert CLI command name to python module name
+        name = spack.cmd.get_python_name(name)
+        self._init_subparsers()
+
         # each command module implements a parser() function, to which we
         # pass its subparser for setup.
         module = spack.cmd.get_module(name)
@@ -257,6 +262,19 @@ class SpackArgumentParser(argparse.ArgumentParser):
         module.setup_parser(subparser)
         return module
 
+    def add_command_summary(self, name):
+        """Add a subcommand that is only described in help.
+
+        The description comes from the command manifest, so the command's
+        module is not imported, and its arguments are not set up.
+        """
+        info = spack.cmd.get_command_info(name)
+        self._init_subparsers()
+        if info.name not in self.subparsers.choices:
+            self.subparsers.add_parser(
+                info.name, help=info.description,
+                description=info.description)
+
     def format_help(self, level='short'):
         if self.prog == 'spack':
             # use format_help_sections for the main spack parser, but not
@@ -298,6 +316,8 @@ def make_argument_parser():
                         ',\n '.join([', '.join(line) for line in stat_lines]))
     parser.add_argument('--lines', default=20, action='store',
                         help="lines of profile output; default 20; or 'all'")
+    parser.add_argument('--timing', action='store_true',
+                        help="show where concretization spends its time")
     parser.add_argument('-v', '--verbose', action='store_true',
                         help="print additional output during builds")
     parser.add_argument('-s', '--stacktrace', action='store_true',
@@ -434,6 +454,10 @@ def _main(command, parser, args, unknown_args):
     setup_main_options(args)
     spack.hooks.pre_run()
 
+    if args.timing:
+        spack.util.timing.enable()
+        spack.util.timing.record('startup', time.time() - spack.start_time)
+
     # Now actually execute the command
     try:
         return _invoke_spack_command(command, parser, args, unknown_args)
@@ -446,6 +470,9 @@ def _main(command, parser, args, unknown_args):
     except KeyboardInterrupt:
         sys.stderr.write('\n')
         tty.die("Keyboard interrupt.")
+    finally:
+        if args.timing:
+            spack.util.timing.print_report()
 
 
 def _profile_wrapper(command, parser, args, unknown_args):
@@ -30,15 +30,22 @@ the main server for a particular package is down.  Or, if the computer
 where spack is run is not connected to the internet, it allows spack
 to download packages directly from a mirror (e.g., on an intranet).
 """
+import multiprocessing
 import sys
 import os
+import time
+
 import llnl.util.tty as tty
 from llnl.util.filesystem import mkdirp, join_path
 
 import spack
 import spack.error
+import spack.patch
+import spack.prefetch
 import spack.url as url
 import spack.fetch_strategy as fs
+import spack.util.crypto as crypto
+import spack.util.spack_json as sjson
 from spack.spec import Spec
 from spack.version import VersionList
 from spack.util.compression import allowed_archive
@@ -148,6 +155,10 @@ def suggest_archive_basename(resource):
     return basename
 
 
+#: Arguments of the mirror being created, for pool workers to look up
+_create_args = None
+
+
 def create(path, specs, **kwargs):
     """Create a directory to be used as a spack mirror, and fill it with
     package archives.
@@ -161,6 +172,10 @@ def create(path, specs, **kwargs):
         no_checksum: If True, do not checkpoint when fetching (default False)
         num_versions: Max number of versions to fetch per spec, \
             if spec is ambiguous (default is 0 for all of them)
+        jobs: Number of package versions to fetch at once, in worker \
+            processes (default is ``fetch_jobs`` in config.yaml)
+        report: If given, path of a JSON file to write a report of what \
+            was mirrored to
 
     Return Value:
         Returns a tuple of lists: (present, mirrored, error)
@@ -171,8 +186,12 @@ def create(path, specs, **kwargs):
 
     This routine iterates through all known package versions, and
     it creates specs for those versions.  If the version satisfies any spec
-    in the specs list, it is downloaded and added to the mirror.
+    in the specs list, it is downloaded and added to the mirror.  Archives
+    that are already in the mirror, with the right size and checksum, are
+    not downloaded again.
     """
+    global _create_args
+
     # Make sure nothing is in the way.
     if os.path.isfile(path):
         raise MirrorError("%s already exists and is a file." % path)
@@ -202,65 +221,168 @@ def create(path, specs, **kwargs):
         'error': []
     }
 
-    # Iterate through packages and download all safe tarballs for each
-    for spec in version_specs:
-        add_single_spec(spec, mirror_root, categories, **kwargs)
+    # Iterate through packages and download all safe tarballs for each,
+    # in worker processes if asked to.  Workers are forked after
+    # _create_args is set, and look the specs up there.
+    jobs = kwargs.get('jobs') or spack.prefetch.fetch_jobs()
+    jobs = min(jobs, len(version_specs))
+    start_time = time.time()
+    if jobs > 1:
+        _create_args = (version_specs, mirror_root, kwargs)
+        pool = multiprocessing.Pool(jobs)
+        try:
+            results = pool.map(_mirror_spec_at, range(len(version_specs)))
+        finally:
+            pool.terminate()
+            pool.join()
+            _create_args = None
+    else:
+        results = [_mirror_spec(spec, mirror_root, **kwargs)
+                   for spec in version_specs]
+
+    for spec, result in zip(version_specs, results):
+        categories[result['status']].append(spec)
+
+    if kwargs.get('report'):
+        _write_report(kwargs['report'], mirror_root, results,
+                      time.time() - start_time)
 
     return categories['present'], categories['mirrored'], categories['error']
 
 
+def _mirror_spec_at(index):
+    """Mirror the index-th spec given to ``create()``, in a pool worker."""
+    specs, mirror_root, kwargs = _create_args
+    return _mirror_spec(specs[index], mirror_root, **kwargs)
+
+
+def _write_report(filename, mirror_root, results, seconds):
+    """Write a JSON report on the results of ``_mirror_spec()``."""
+    summary = dict((status, 0) for status in ('present', 'mirrored', 'error'))
+    for result in results:
+        summary[result['status']] += 1
+    summary['bytes'] = sum(a['size'] for r in results for a in r['archives']
+                           if a['status'] == 'added')
+    summary['seconds'] = seconds
+
+    with open(filename, 'w') as f:
+        sjson.dump({'mirror': mirror_root,
+                    'summary': summary,
+                    'specs': results}, f)
+
+
+def _archive_present(archive_path, digest):
+    """Whether a complete archive is at ``archive_path`` already.
+
+    The archive must not be empty, and must match ``digest`` if there is
+    one, so that archives left over from interrupted runs are fetched
+    again.
+    """
+    if not os.path.isfile(archive_path):
+        return False
+    if os.path.getsize(archive_path) == 0:
+        return False
+    return not digest or crypto.Checker(digest).check(archive_path)
+
+
+def _mirror_archives(spec):
+    """Yield what to mirror for a spec.
+
+    Yields:
+        tuple: name to show, stage to fetch in, path in the mirror, and
+            whether the stage is a temporary one that must be entered
+    """
+    pkg = spec.package
+    for ii, stage in enumerate(pkg.stage):
+        fetcher = stage.fetcher
+        if ii == 0:
+            archive_path = mirror_archive_path(spec, fetcher)
+            name = spec.cformat("$_$@")
+        else:
+            resource = stage.resource
+            archive_path = mirror_archive_path(spec, fetcher, resource.name)
+            name = "{resource} ({pkg}).".format(
+                resource=resource.name, pkg=spec.cformat("$_$@"))
+        yield name, stage, archive_path, False
+
+    for patch in spec.patches:
+        if isinstance(patch, spack.patch.UrlPatch):
+            stage = patch.fetch_stage(pkg.stage)
+            name = "{patch} ({pkg})".format(
+                patch=os.path.basename(patch.url), pkg=spec.cformat("$_$@"))
+            yield name, stage, stage.mirror_path, True
+
+
+def _add_archive(name, fetcher, archive_path, **kwargs):
+    """Fetch an archive and put it in the mirror at ``archive_path``."""
+    fetcher.fetch()
+    if not kwargs.get('no_checksum', False):
+        fetcher.check()
+        tty.msg("{name} : checksum passed".format(name=name))
+
+    # Fetchers have to know how to archive their files.  Use that to
+    # move/copy/create an archive in the mirror.
+    fs.atomic_archive(fetcher, archive_path)
+    tty.msg("{name} : added".format(name=name))
+
+
 def add_single_spec(spec, mirror_root, categories, **kwargs):
+    result = _mirror_spec(spec, mirror_root, **kwargs)
+    categories[result['status']].append(spec)
+
+
+def _mirror_spec(spec, mirror_root, **kwargs):
+    """Add the archives of one spec to a mirror.
+
+    Returns:
+        dict: report on the spec, with its ``status`` (the category of
+            ``create()`` it belongs to) and its ``archives``
+    """
     tty.msg("Adding package {pkg} to mirror".format(pkg=spec.format("$_$@")))
-    spec_exists_in_mirror = True
+    result = {'spec': spec.format("$_$@"),
+              'status': 'present',
+              'archives': [],
+              'error': None}
+    start_time = time.time()
     try:
         with spec.package.stage:
-            # fetcher = stage.fetcher
-            # fetcher.fetch()
-            # ...
-            # fetcher.archive(archive_path)
-            for ii, stage in enumerate(spec.package.stage):
-                fetcher = stage.fetcher
-                if ii == 0:
-                    # create a subdirectory for the current package@version
-                    archive_path = os.path.abspath(join_path(
-                        mirror_root, mirror_archive_path(spec, fetcher)))
-                    name = spec.cformat("$_$@")
-                else:
-                    resource = stage.resource
-                    archive_path = os.path.abspath(join_path(
-                        mirror_root,
-                        mirror_archive_path(spec, fetcher, resource.name)))
-                    name = "{resource} ({pkg}).".format(
-                        resource=resource.name, pkg=spec.cformat("$_$@"))
+            for name, stage, path, temporary in _mirror_archives(spec):
+                fetcher = stage.default_fetcher
+                archive_path = os.path.abspath(join_path(mirror_root, path))
                 subdir = os.path.dirname(archive_path)
                 mkdirp(subdir)
 
-                if os.path.exists(archive_path):
+                digest = getattr(fetcher, 'digest', None)
+                if _archive_present(archive_path, digest):
                     tty.msg("{name} : already added".format(name=name))
+                    status = 'present'
                 else:
-                    spec_exists_in_mirror = False
-                    fetcher.fetch()
-                    if not kwargs.get('no_checksum', False):
-                        fetcher.check()
-                        tty.msg("{name} : checksum passed".format(name=name))
-
-                    # Fetchers have to know how to archive their files.  Use
-                    # that to move/copy/create an archive in the mirror.
-                    fetcher.archive(archive_path)
-                    tty.msg("{name} : added".format(name=name))
-
-        if spec_exists_in_mirror:
-            categories['present'].append(spec)
-        else:
-            categories['mirrored'].append(spec)
+                    if temporary:
+                        with stage:
+                            _add_archive(
+                                name, fetcher, archive_path, **kwargs)
+                    else:
+                        _add_archive(name, fetcher, archive_path, **kwargs)
+                    status = 'added'
+                    result['status'] = 'mirrored'
+
+                result['archives'].append({
+                    'name': name,
+                    'path': path,
+                    'status': status,
+                    'size': os.path.getsize(archive_path)})
 
     except Exception as e:
         if spack.debug:
             sys.excepthook(*sys.exc_info())
         else:
             tty.warn(
-                "Error while fetching %s" % spec.cformat('$_$@'), e.message)
-        categories['error'].append(spec)
+                "Error while fetching %s" % spec.cformat('$_$@'), str(e))
+        result['status'] = 'error'
+        result['error'] = str(e)
+
+    result['seconds'] = time.time() - start_time
+    return result
 
 
 class MirrorError(spack.error.SpackError):
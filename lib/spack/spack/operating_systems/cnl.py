@@ -26,10 +26,8 @@ import re
 
 import llnl.util.tty as tty
 
-import spack.spec
-import spack.compilers
 from spack.architecture import OperatingSystem
-from spack.util.multiproc import parmap
+from spack.util.multiproc import thread_map
 from spack.util.module_cmd import get_module_cmd
 
 
@@ -50,16 +48,17 @@ class Cnl(OperatingSystem):
         return self.name
 
     def find_compilers(self, *paths):
+        # NOTE: we import spack.compilers here to avoid init order cycles
+        import spack.compilers
         types = spack.compilers.all_compiler_types()
-        compiler_lists = parmap(
+        compiler_lists = thread_map(
             lambda cmp_cls: self.find_compiler(cmp_cls, *paths), types)
 
-        # ensure all the version calls we made are cached in the parent
-        # process, as well.  This speeds up Spack a lot.
         clist = [comp for cl in compiler_lists for comp in cl]
         return clist
 
     def find_compiler(self, cmp_cls, *paths):
+        import spack.spec
         compilers = []
         if cmp_cls.PrgEnv:
             if not cmp_cls.PrgEnv_compiler:
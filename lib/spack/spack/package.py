@@ -55,7 +55,9 @@ import spack.directives
 import spack.error
 import spack.fetch_strategy as fs
 import spack.hooks
+import spack.installer
 import spack.mirror
+import spack.prefetch
 import spack.repository
 import spack.url
 import spack.util.web
@@ -621,30 +623,15 @@ class PackageBase(with_metaclass(PackageMeta, object)):
     def possible_dependencies(self, transitive=True, visited=None):
         """Return set of possible transitive dependencies of this package.
 
+        Dependencies are looked up in the package metadata index, so this
+        doesn't need to load the packages it finds.
+
         Args:
             transitive (bool): include all transitive dependencies if True,
                 only direct dependencies if False.
         """
-        if visited is None:
-            visited = set()
-
-        visited.add(self.name)
-        for name in self.dependencies:
-            spec = spack.spec.Spec(name)
-
-            if not spec.virtual:
-                visited.add(name)
-                if transitive:
-                    pkg = spack.repo.get(name)
-                    pkg.possible_dependencies(transitive, visited)
-            else:
-                for provider in spack.repo.providers_for(spec):
-                    visited.add(provider.name)
-                    if transitive:
-                        pkg = spack.repo.get(provider.name)
-                        pkg.possible_dependencies(transitive, visited)
-
-        return visited
+        return spack.repository.possible_dependencies(
+            self, transitive, visited)
 
     @property
     def package_dir(self):
@@ -1263,11 +1250,9 @@ class PackageBase(with_metaclass(PackageMeta, object)):
 
     def _update_explicit_entry_in_db(self, rec, explicit):
         if explicit and not rec.explicit:
-            with spack.store.db.write_transaction():
-                rec = spack.store.db.get_record(self.spec)
-                rec.explicit = True
-                message = '{s.name}@{s.version} : marking the package explicit'
-                tty.msg(message.format(s=self))
+            spack.store.db.update_explicit(self.spec, True)
+            message = '{s.name}@{s.version} : marking the package explicit'
+            tty.msg(message.format(s=self))
 
     def try_install_from_binary_cache(self, explicit):
         tty.msg('Searching for binary cache of %s' % self.name)
@@ -1294,6 +1279,7 @@ class PackageBase(with_metaclass(PackageMeta, object)):
                    fake=False,
                    explicit=False,
                    dirty=None,
+                   concurrent_builds=None,
                    **kwargs):
         """Called by commands to install a package and its dependencies.
 
@@ -1319,6 +1305,9 @@ class PackageBase(with_metaclass(PackageMeta, object)):
             explicit (bool): True if package was explicitly installed, False
                 if package was implicitly installed (as a dependency).
             dirty (bool): Don't clean the build environment before installing.
+            concurrent_builds (int): Number of dependencies to build at
+                once.  Defaults to ``concurrent_builds`` in config.yaml.
+                If more than one, ``make_jobs`` are split between them.
             force (bool): Install again, even if already installed.
         """
         if not self.spec.concrete:
@@ -1330,6 +1319,53 @@ class PackageBase(with_metaclass(PackageMeta, object)):
         if self.spec.external:
             return self._process_external_package(explicit)
 
+        # First, install dependencies, unless this package is installed.
+        # Then install it, once no other process is installing it.
+        if install_deps:
+            tty.debug('Installing {0} dependencies'.format(self.name))
+            dep_kwargs = dict(
+                install_deps=False,
+                explicit=False,
+                keep_prefix=keep_prefix,
+                keep_stage=keep_stage,
+                install_source=install_source,
+                fake=fake,
+                skip_patch=skip_patch,
+                verbose=verbose,
+                make_jobs=make_jobs,
+                dirty=dirty,
+                **kwargs)
+            dep_kwargs.pop('stop_at', None)
+
+            if concurrent_builds is None:
+                concurrent_builds = spack.installer.concurrent_builds()
+
+            if not spack.installer.installed(self.spec):
+                spack.installer.install_dependencies(
+                    self.spec, concurrent_builds, **dep_kwargs)
+
+        spack.prefetch.wait(self.spec)
+        with spack.installer.claim_when_free(self.spec):
+            return self._do_install_claimed(
+                keep_prefix=keep_prefix,
+                keep_stage=keep_stage,
+                install_source=install_source,
+                skip_patch=skip_patch,
+                verbose=verbose,
+                make_jobs=make_jobs,
+                fake=fake,
+                explicit=explicit,
+                dirty=dirty,
+                **kwargs)
+
+    def _do_install_claimed(self, keep_prefix, keep_stage, install_source,
+                            skip_patch, verbose, make_jobs, fake, explicit,
+                            dirty, **kwargs):
+        """Install this package, with its prefix lock held.
+
+        Takes the arguments of ``do_install()``.  The dependencies must
+        already be installed.
+        """
         restage = kwargs.get('restage', False)
         partial = self.check_for_unfinished_installation(keep_prefix, restage)
 
@@ -1347,23 +1383,6 @@ class PackageBase(with_metaclass(PackageMeta, object)):
 
         self._do_install_pop_kwargs(kwargs)
 
-        # First, install dependencies recursively.
-        if install_deps:
-            tty.debug('Installing {0} dependencies'.format(self.name))
-            for dep in self.spec.traverse(order='post', root=False):
-                dep.package.do_install(
-                    install_deps=False,
-                    explicit=False,
-                    keep_prefix=keep_prefix,
-                    keep_stage=keep_stage,
-                    install_source=install_source,
-                    fake=fake,
-                    skip_patch=skip_patch,
-                    verbose=verbose,
-                    make_jobs=make_jobs,
-                    dirty=dirty,
-                    **kwargs)
-
         tty.msg(colorize('@*{Installing} @*g{%s}' % self.name))
 
         if kwargs.get('use_cache', False):
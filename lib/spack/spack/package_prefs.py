@@ -29,6 +29,7 @@ from llnl.util.lang import classproperty
 
 import spack
 import spack.error
+import spack.spec
 from spack.util.path import canonicalize_path
 from spack.version import VersionList
 
@@ -188,20 +189,29 @@ class PackagePrefs(object):
     @classmethod
     def preferred_variants(cls, pkg_name):
         """Return a VariantMap of preferred variants/values for a spec."""
-        for pkg in (pkg_name, 'all'):
-            variants = cls._packages_config.get(pkg, {}).get('variants', '')
-            if variants:
-                break
-
-        # allow variants to be list or string
-        if not isinstance(variants, string_types):
-            variants = " ".join(variants)
-
-        # Only return variants that are actually supported by the package
-        pkg = spack.repo.get(pkg_name)
-        spec = spack.spec.Spec("%s %s" % (pkg_name, variants))
-        return dict((name, variant) for name, variant in spec.variants.items()
-                    if name in pkg.variants)
+        key = (pkg_name, 'variants', None)
+
+        spec = cls._spec_cache.get(key)
+        if spec is None:
+            for pkg in (pkg_name, 'all'):
+                variants = cls._packages_config.get(pkg, {}).get(
+                    'variants', '')
+                if variants:
+                    break
+
+            # allow variants to be list or string
+            if not isinstance(variants, string_types):
+                variants = " ".join(variants)
+
+            spec = spack.spec.Spec("%s %s" % (pkg_name, variants))
+            cls._spec_cache[key] = spec
+
+        # Only return variants that are actually supported by the package.
+        # Callers put these into specs, so they get their own copies.
+        pkg_cls = spack.repo.get_pkg_class(pkg_name)
+        return dict((name, variant.copy())
+                    for name, variant in spec.variants.items()
+                    if name in pkg_cls.variants)
 
 
 class PackageTesting(object):
@@ -142,9 +142,8 @@ class UrlPatch(Patch):
             raise PatchDirectiveError("URL patches require a sha256 checksum")
         self.sha256 = kwargs.get('sha256')
 
-    def apply(self, stage):
-        """Retrieve the patch in a temporary stage, computes
-        self.path and calls `super().apply(stage)`
+    def fetch_stage(self, stage):
+        """Temporary stage to fetch the patch in.
 
         Args:
             stage: stage for the package that needs to be patched
@@ -159,7 +158,16 @@ class UrlPatch(Patch):
             os.path.dirname(stage.mirror_path),
             os.path.basename(self.url))
 
-        with spack.stage.Stage(fetcher, mirror_path=mirror) as patch_stage:
+        return spack.stage.Stage(fetcher, mirror_path=mirror)
+
+    def apply(self, stage):
+        """Retrieve the patch in a temporary stage, computes
+        self.path and calls `super().apply(stage)`
+
+        Args:
+            stage: stage for the package that needs to be patched
+        """
+        with self.fetch_stage(stage) as patch_stage:
             patch_stage.fetch()
             patch_stage.check()
             patch_stage.cache_local()
@@ -0,0 +1,263 @@
+##############################################################################
+# Copyright (c) 2013-2017, Lawrence Livermore National Security, LLC.
+# Produced at the Lawrence Livermore National Laboratory.
+#
+# This file is part of Spack.
+# Created by Todd Gamblin, tgamblin@llnl.gov, All rights reserved.
+# LLNL-CODE-647188
+#
+# For details, see https://github.com/spack/spack
+# Please also see the NOTICE and LICENSE files for our notice and the LGPL.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License (as
+# published by the Free Software Foundation) version 2.1, February 1999.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the IMPLIED WARRANTY OF
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the terms and
+# conditions of the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+##############################################################################
+"""Fetch the sources of many packages at once, in the background.
+
+By default, each package is fetched right before it is built, so
+downloads and builds never overlap.  If ``fetch_jobs`` is more than one,
+``spack install`` and ``spack fetch`` first start to download the
+archives, resources and patches of all the packages they need, up to
+``fetch_jobs`` at a time, in a pool of worker processes.  Builds start
+as soon as the sources they need are fetched.
+
+Workers fetch into the local download cache (``source_cache`` in
+``config.yaml``), with the checksums checked, so a package that is
+fetched later just uses the cached archive.  Only archives that can be
+cached, i.e. that have a checksum or a fixed revision, are prefetched.
+Anything else, and anything that fails to prefetch, is fetched as usual
+when the package is built.
+"""
+import contextlib
+import multiprocessing
+import os
+import time
+
+import llnl.util.tty as tty
+
+import spack
+import spack.patch
+import spack.stage
+
+__all__ = ['fetch_jobs', 'Prefetcher', 'prefetching', 'done', 'wait']
+
+
+#: Specs being prefetched, for the pool workers to get them by index
+_specs = []
+
+#: The Prefetcher of the current ``prefetching()`` block, if any
+_prefetcher = None
+
+
+def fetch_jobs():
+    """Number of archives to download at once, from ``config.yaml``."""
+    import spack.config
+    config = spack.config.get_config('config')
+    return config.get('fetch_jobs', 1)
+
+
+def _quiet():
+    """Send the output of a pool worker to ``/dev/null``.
+
+    Errors are reported through the results instead.
+    """
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+    os.close(devnull)
+
+
+def _fetch_stages(spec):
+    """Temporary stages for everything ``spec`` downloads to build."""
+    pkg = spec.package
+    stages = [spack.stage.Stage(s.default_fetcher, mirror_path=s.mirror_path)
+              for s in pkg.stage]
+    for patch in spec.patches:
+        if isinstance(patch, spack.patch.UrlPatch):
+            stages.append(patch.fetch_stage(pkg.stage))
+
+    return stages
+
+
+def _prefetch(index):
+    """Fetch the sources of ``_specs[index]`` into the download cache.
+
+    Runs in a pool worker.
+
+    Returns:
+        tuple: bytes downloaded, number of archives downloaded, number
+            already in the cache, and error messages
+    """
+    downloaded, fetched, cached, errors = 0, 0, 0, []
+    spec = _specs[index]
+    try:
+        stages = _fetch_stages(spec)
+    except Exception as e:
+        return downloaded, fetched, cached, ['%s: %s' % (spec.name, e)]
+
+    for stage in stages:
+        if not stage.default_fetcher.cachable:
+            continue
+
+        cache_path = os.path.join(spack.fetch_cache.root, stage.mirror_path)
+        if os.path.exists(cache_path):
+            cached += 1
+            continue
+
+        try:
+            with stage:
+                stage.fetch()
+                stage.check()
+                stage.cache_local()
+            downloaded += os.path.getsize(cache_path)
+            fetched += 1
+        except Exception as e:
+            errors.append('%s: %s' % (stage.default_fetcher, e))
+
+    return downloaded, fetched, cached, errors
+
+
+def _size(num_bytes):
+    """Human readable size, e.g. ``1.2 MB``."""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if num_bytes < 1024 or unit == 'GB':
+            break
+        num_bytes /= 1024.0
+    return '%.1f %s' % (num_bytes, unit)
+
+
+class Prefetcher(object):
+    """Fetches the sources of some specs in a pool of worker processes."""
+
+    def __init__(self, specs, jobs):
+        """Create a prefetcher; ``start()`` starts it.
+
+        Args:
+            specs (list): concrete specs to fetch the sources of.  Their
+                dependencies are not fetched unless they are in the list.
+            jobs (int): maximum number of archives to download at once
+        """
+        self.specs = []
+        seen = set()
+        for s in specs:
+            if s.external or s.dag_hash() in seen:
+                continue
+            seen.add(s.dag_hash())
+            self.specs.append(s)
+
+        self.jobs = jobs
+        self._pool = None
+        self._results = {}     # dag hash -> AsyncResult
+        self._start_time = None
+
+    def start(self):
+        """Start to fetch all the specs in the background."""
+        global _specs
+        if not self.specs:
+            return
+
+        # Workers are forked now, and look their specs up in _specs.
+        _specs = self.specs
+        self._start_time = time.time()
+        self._pool = multiprocessing.Pool(
+            min(self.jobs, len(self.specs)), initializer=_quiet)
+        for i, s in enumerate(self.specs):
+            self._results[s.dag_hash()] = self._pool.apply_async(
+                _prefetch, (i,))
+        self._pool.close()
+
+    def done(self, spec):
+        """Whether ``spec`` is fetched, or is not fetched by this."""
+        result = self._results.get(spec.dag_hash())
+        return result is None or result.ready()
+
+    def wait(self, spec):
+        """Wait until ``spec`` is fetched, if it is fetched by this."""
+        result = self._results.get(spec.dag_hash())
+        if result is not None and not result.ready():
+            tty.debug('Waiting for the sources of {0}'.format(spec.name))
+            result.wait()
+
+    def finish(self):
+        """Wait for all fetches to finish, and report on them."""
+        if self._pool is None:
+            return
+
+        self._pool.join()
+        elapsed = time.time() - self._start_time
+        downloaded, fetched, cached = 0, 0, 0
+        for s in self.specs:
+            nbytes, nfetched, ncached, errors = self._results[
+                s.dag_hash()].get()
+            downloaded += nbytes
+            fetched += nfetched
+            cached += ncached
+            for error in errors:
+                tty.warn('Could not prefetch sources of %s' % s.name, error)
+
+        tty.msg('Prefetched %d archives (%s) in %.1fs, %s/s. '
+                '%d were already in the download cache.' % (
+                    fetched, _size(downloaded), elapsed,
+                    _size(downloaded / max(elapsed, 1e-3)), cached))
+
+    def terminate(self):
+        """Stop all fetches."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+
+
+@contextlib.contextmanager
+def prefetching(specs, jobs=None):
+    """Fetch the sources of ``specs`` in the background within a block.
+
+    While the block runs, ``done()`` and ``wait()`` tell about the
+    fetches.  At the end of the block, all fetches are finished and
+    reported on.  If ``jobs`` is less than two, nothing is prefetched.
+
+    Args:
+        specs (list): concrete specs to fetch the sources of
+        jobs (int): maximum number of archives to download at once.
+            Defaults to ``fetch_jobs`` in config.yaml.
+    """
+    global _prefetcher
+    if jobs is None:
+        jobs = fetch_jobs()
+
+    if jobs < 2:
+        yield None
+        return
+
+    prefetcher = Prefetcher(specs, jobs)
+    prefetcher.start()
+    _prefetcher = prefetcher
+    try:
+        yield prefetcher
+    except BaseException:
+        prefetcher.terminate()
+        raise
+    else:
+        prefetcher.finish()
+    finally:
+        _prefetcher = None
+
+
+def done(spec):
+    """Whether the sources of ``spec`` are not being prefetched."""
+    return _prefetcher is None or _prefetcher.done(spec)
+
+
+def wait(spec):
+    """Wait until the sources of ``spec`` are not being prefetched."""
+    if _prefetcher is not None:
+        _prefetcher.wait(spec)
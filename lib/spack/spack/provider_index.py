@@ -29,11 +29,17 @@ from itertools import product as iproduct
 from six import iteritems
 from pprint import pformat
 
+import spack.util.spack_json as sjson
 import spack.util.spack_yaml as syaml
 from yaml.error import MarkedYAMLError
 
 import spack
 import spack.error
+from spack.util.timing import timed
+
+#: Version of the JSON format of ProviderIndex.  Bump it whenever the
+#: format changes, so that old index caches are rebuilt.
+json_format_version = 1
 
 
 class ProviderIndex(object):
@@ -78,6 +84,9 @@ class ProviderIndex(object):
         self.restrict = restrict
         self.providers = {}
 
+        # Results of providers_for(), by the strings of the virtual specs
+        self._providers_for_cache = {}
+
         for spec in specs:
             if not isinstance(spec, spack.spec.Spec):
                 spec = spack.spec.Spec(spec)
@@ -96,6 +105,7 @@ class ProviderIndex(object):
             return
 
         assert(not spec.virtual)
+        self._providers_for_cache.clear()
 
         pkg_provided = spec.package_class.provided
         for provided_spec, provider_specs in iteritems(pkg_provided):
@@ -131,9 +141,23 @@ class ProviderIndex(object):
                         constrained.constrain(provider_spec)
                         provider_map[provided_spec].add(constrained)
 
+    @timed('providers for')
     def providers_for(self, *vpkg_specs):
         """Gives specs of all packages that provide virtual packages
            with the supplied specs."""
+        # Concretization asks for the same virtuals over and over, so the
+        # results are remembered until the index changes.
+        key = tuple(str(s) for s in vpkg_specs)
+        providers = self._providers_for_cache.get(key)
+        if providers is None:
+            providers = self._find_providers(vpkg_specs)
+            self._providers_for_cache[key] = providers
+
+        # Return providers in order. Defensively copy.
+        return [s.copy() for s in providers]
+
+    def _find_providers(self, vpkg_specs):
+        """Sorted specs of the packages providing any of the virtuals."""
         providers = set()
         for vspec in vpkg_specs:
             # Allow string names to be passed as input, as well as specs
@@ -146,8 +170,7 @@ class ProviderIndex(object):
                     if p_spec.satisfies(vspec, deps=False):
                         providers.update(spec_set)
 
-        # Return providers in order. Defensively copy.
-        return sorted(s.copy() for s in providers)
+        return sorted(providers)
 
     # TODO: this is pretty darned nasty, and inefficient, but there
     # are not that many vdeps in most specs.
@@ -190,13 +213,55 @@ class ProviderIndex(object):
 
         return all(c in result for c in common)
 
-    def to_yaml(self, stream=None):
+    def _to_dict(self):
         provider_list = self._transform(
             lambda vpkg, pset: [
                 vpkg.to_node_dict(), [p.to_node_dict() for p in pset]], list)
+        return {'providers': provider_list}
+
+    @staticmethod
+    def _from_dict(d):
+        index = ProviderIndex()
+        providers = d['providers']
+        index.providers = _transform(
+            providers,
+            lambda vpkg, plist: (
+                spack.spec.Spec.from_node_dict(vpkg),
+                set(spack.spec.Spec.from_node_dict(p) for p in plist)))
+        return index
+
+    def to_json(self, stream=None):
+        """Write the index as JSON, which is much faster to read than YAML.
+
+        This is the format used for the index caches.
+        """
+        d = self._to_dict()
+        d['version'] = json_format_version
+        return sjson.dump({'provider_index': d}, stream)
+
+    @staticmethod
+    def from_json(stream):
+        try:
+            jfile = sjson.load(stream)
+        except ValueError as e:
+            raise ProviderIndexError(
+                "error parsing JSON ProviderIndex cache:", str(e))
+
+        if not isinstance(jfile, dict) or 'provider_index' not in jfile:
+            raise ProviderIndexError(
+                "JSON ProviderIndex does not start with 'provider_index'")
+
+        version = jfile['provider_index'].get('version')
+        if version != json_format_version:
+            raise ProviderIndexError(
+                "JSON ProviderIndex has format version %s, expected %s"
+                % (version, json_format_version))
 
-        syaml.dump({'provider_index': {'providers': provider_list}},
-                   stream=stream)
+        return ProviderIndex._from_dict(jfile['provider_index'])
+
+    def to_yaml(self, stream=None):
+        """Write the index as YAML, which is easier to read when debugging."""
+        syaml.dump({'provider_index': self._to_dict()}, stream=stream)
 
     @staticmethod
     def from_yaml(stream):
@@ -213,18 +278,12 @@ class ProviderIndex(object):
             raise ProviderIndexError(
                 "YAML ProviderIndex does not start with 'provider_index'")
 
-        index = ProviderIndex()
-        providers = yfile['provider_index']['providers']
-        index.providers = _transform(
-            providers,
-            lambda vpkg, plist: (
-                spack.spec.Spec.from_node_dict(vpkg),
-                set(spack.spec.Spec.from_node_dict(p) for p in plist)))
-        return index
+        return ProviderIndex._from_dict(yfile['provider_index'])
 
     def merge(self, other):
         """Merge `other` ProviderIndex into this one."""
         other = other.copy()   # defensive copy.
+        self._providers_for_cache.clear()
 
         for pkg in other.providers:
             if pkg not in self.providers:
@@ -242,6 +301,7 @@ class ProviderIndex(object):
 
     def remove_provider(self, pkg_name):
         """Remove a provider from the ProviderIndex."""
+        self._providers_for_cache.clear()
         empty_pkg_dict = []
         for pkg, pkg_dict in self.providers.items():
             empty_pset = []
@@ -23,6 +23,9 @@
 # Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
 ##############################################################################
 import collections
+import hashlib
+import marshal
+import multiprocessing
 import os
 import stat
 import shutil
@@ -32,6 +35,7 @@ import inspect
 import imp
 import re
 import traceback
+import textwrap
 import json
 
 try:
@@ -41,6 +45,8 @@ except ImportError:
 
 from types import ModuleType
 
+from six import StringIO
+
 import yaml
 
 import llnl.util.lang
@@ -49,11 +55,15 @@ from llnl.util.filesystem import mkdirp, join_path, install
 
 import spack
 import spack.error
+import spack.provider_index
 import spack.spec
+import spack.util.spack_json as sjson
+from spack.version import Version
 from spack.provider_index import ProviderIndex
 from spack.util.path import canonicalize_path
 from spack.util.naming import NamespaceTrie, valid_module_name
 from spack.util.naming import mod_to_class, possible_spack_module_names
+from spack.util.timing import timed
 
 #
 # Super-namespace for all packages.
@@ -72,6 +82,99 @@ package_file_name  = 'package.py'  # Filename for packages in a repository.
 # Guaranteed unused default value for some functions.
 NOT_PROVIDED = object()
 
+#: Directory in the misc cache with the bytecode of package modules
+bytecode_cache_dir = 'bytecode'
+
+
+def _bytecode_cache_file(fullname, file_path):
+    """Path of the bytecode cache file for a package module."""
+    # Interpreters with different bytecode, and package.py files in
+    # different repositories or Spack instances, get different files, so
+    # that they don't keep overwriting each other's.
+    tag = 'py%d%d' % sys.version_info[:2]
+    path_hash = hashlib.sha1(os.path.abspath(file_path).encode('utf-8'))
+    key = '%s/%s.%s.%s.pyc' % (
+        bytecode_cache_dir, fullname, path_hash.hexdigest()[:16], tag)
+    return spack.misc_cache.cache_path(key)
+
+
+def _bytecode_cache_stamp(file_path):
+    """Identifies the source and interpreter that bytecode was made from.
+
+    Cached bytecode is only used if the stamp is the same, i.e. if the
+    package.py file has the same path, mtime and size, and if it was
+    compiled by the same interpreter version.
+    """
+    sinfo = os.stat(file_path)
+    return hashlib.sha1(repr((
+        imp.get_magic(), sys.version, os.path.realpath(file_path),
+        sinfo.st_mtime, sinfo.st_size)).encode('utf-8')).hexdigest()
+
+
+def _read_cached_bytecode(cache_file, stamp):
+    """Return the cached code object if it matches stamp, or None."""
+    try:
+        with open(cache_file, 'rb') as f:
+            if marshal.load(f) != stamp:
+                return None
+            return marshal.load(f)
+    except (IOError, OSError, EOFError, ValueError, TypeError):
+        return None
+
+
+def _write_cached_bytecode(cache_file, stamp, code):
+    """Write a code object to the cache; failures are not fatal."""
+    tmp_file = '%s.%d.tmp' % (cache_file, os.getpid())
+    try:
+        mkdirp(os.path.dirname(cache_file))
+        with open(tmp_file, 'wb') as f:
+            marshal.dump(stamp, f)
+            marshal.dump(code, f)
+        # Rename so that readers never see a partial file.
+        os.rename(tmp_file, cache_file)
+    except (IOError, OSError) as e:
+        tty.debug("Could not cache bytecode in %s: %s" % (cache_file, e))
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
+def load_package_source(fullname, file_path):
+    """Load a package.py file as a module, like ``imp.load_source()``.
+
+    ``imp.load_source()`` compiles the file on every call and, depending
+    on the Python version and the permissions of the repository, may
+    never write the bytecode anywhere.  This keeps the bytecode in the
+    misc cache instead, so each package is compiled once.
+
+    Like ``imp.load_source()``, this executes the code in the module
+    that is already in ``sys.modules`` under ``fullname``, if any.
+    """
+    stamp = _bytecode_cache_stamp(file_path)
+    cache_file = _bytecode_cache_file(fullname, file_path)
+
+    code = _read_cached_bytecode(cache_file, stamp)
+    if code is None:
+        with open(file_path, 'rb') as f:
+            source = f.read()
+        code = compile(source, file_path, 'exec', dont_inherit=True)
+        _write_cached_bytecode(cache_file, stamp, code)
+
+    module = sys.modules.get(fullname)
+    created = module is None
+    if created:
+        module = imp.new_module(fullname)
+        sys.modules[fullname] = module
+    module.__file__ = file_path
+
+    try:
+        exec(code, module.__dict__)
+    except BaseException:
+        if created:
+            del sys.modules[fullname]
+        raise
+
+    return sys.modules[fullname]
+
 
 def _autospec(function):
     """Decorator that automatically converts the argument of a single-arg
@@ -102,13 +205,29 @@ class SpackNamespace(ModuleType):
         return getattr(self, name)
 
 
+#: Stat info kept by FastPackageChecker for each package.py file
+PackageStats = collections.namedtuple('PackageStats', ['st_mtime', 'st_size'])
+
+
+def package_stats_cache_enabled():
+    """Whether FastPackageChecker keeps its stats in the misc cache."""
+    import spack.config
+    config = spack.config.get_config('config')
+    return config.get('package_stats_cache', False)
+
+
 class FastPackageChecker(Mapping):
     """Cache that maps package names to the stats obtained on the
     'package.py' files associated with them.
 
     For each repository a cache is maintained at class level, and shared among
-    all instances referring to it. Update of the global cache is done lazily
-    during instance initialization.
+    all instances referring to it. Update of the global cache is done lazily,
+    the first time an instance is accessed.
+
+    If ``package_stats_cache`` is enabled in ``config.yaml``, the list of
+    packages is also kept in the misc cache, and reused by later
+    invocations of Spack as long as the mtime of the packages directory
+    is unchanged.
     """
     #: Global cache, reused by every instance
     _paths_cache = {}
@@ -118,12 +237,69 @@ class FastPackageChecker(Mapping):
         #: The path of the repository managed by this instance
         self.packages_path = packages_path
 
+    @property
+    def _packages_to_stats(self):
+        """Reference to the appropriate entry in the global cache."""
         # If the cache we need is not there yet, then build it appropriately
-        if packages_path not in self._paths_cache:
-            self._paths_cache[packages_path] = self._create_new_cache()
+        if self.packages_path not in self._paths_cache:
+            self._paths_cache[self.packages_path] = self._load_cache()
+
+        return self._paths_cache[self.packages_path]
+
+    @timed('package stats')
+    def _load_cache(self):
+        """Get the stats for packages in a repo, from wherever is fastest."""
+        if package_stats_cache_enabled():
+            return self._read_or_create_cache()
+        return self._create_new_cache()
+
+    def _read_or_create_cache(self):
+        """Read the stats kept in the misc cache, or create them anew.
+
+        Adding or removing a package changes the mtime of the packages
+        directory.  As long as it is unchanged, the cached list of
+        packages is reused, and only their package.py files are stat'ed
+        again, so that edits are noticed without listing and checking
+        every entry of the directory.
+        """
+        path_hash = hashlib.sha1(self.packages_path.encode('utf-8'))
+        cache_filename = 'package-stats/{0}.json'.format(
+            path_hash.hexdigest())
+
+        # Taken before scanning, so that a change during the scan
+        # invalidates the new entry.
+        dir_mtime = os.stat(self.packages_path).st_mtime
+
+        cached = None
+        if spack.misc_cache.init_entry(cache_filename):
+            with spack.misc_cache.read_transaction(cache_filename) as f:
+                try:
+                    data = sjson.load(f)
+                    if data['mtime'] == dir_mtime:
+                        cached = dict(
+                            (name, PackageStats(*stats))
+                            for name, stats in data['packages'].items())
+                except (ValueError, KeyError, TypeError):
+                    # A corrupt or old cache is replaced below
+                    pass
+
+        if cached is None:
+            cache = self._create_new_cache()
+        else:
+            cache = {}
+            for pkg_name in cached:
+                stats = self._package_stats(pkg_name)
+                if stats is not None:
+                    cache[pkg_name] = stats
+            if cache == cached:
+                return cache
 
-        #: Reference to the appropriate entry in the global cache
-        self._packages_to_stats = self._paths_cache[packages_path]
+        with spack.misc_cache.write_transaction(cache_filename) as (old, new):
+            json.dump({'path': self.packages_path,
+                       'mtime': dir_mtime,
+                       'packages': cache}, new)
+
+        return cache
 
     def _create_new_cache(self):
         """Create a new cache for packages in a repo.
@@ -147,33 +323,39 @@ class FastPackageChecker(Mapping):
                 tty.warn(msg.format(pkg_dir, pkg_name))
                 continue
 
-            # Construct the file name from the directory
-            pkg_file = os.path.join(
-                self.packages_path, pkg_name, package_file_name
-            )
-
-            # Use stat here to avoid lots of calls to the filesystem.
-            try:
-                sinfo = os.stat(pkg_file)
-            except OSError as e:
-                if e.errno == errno.ENOENT:
-                    # No package.py file here.
-                    continue
-                elif e.errno == errno.EACCES:
-                    tty.warn("Can't read package file %s." % pkg_file)
-                    continue
-                raise e
-
-            # If it's not a file, skip it.
-            if stat.S_ISDIR(sinfo.st_mode):
-                continue
-
             # If it is a file, then save the stats under the
             # appropriate key
-            cache[pkg_name] = sinfo
+            stats = self._package_stats(pkg_name)
+            if stats is not None:
+                cache[pkg_name] = stats
 
         return cache
 
+    def _package_stats(self, pkg_name):
+        """Stats of a package's package.py file, or None if it has none."""
+        # Construct the file name from the directory
+        pkg_file = os.path.join(
+            self.packages_path, pkg_name, package_file_name
+        )
+
+        # Use stat here to avoid lots of calls to the filesystem.
+        try:
+            sinfo = os.stat(pkg_file)
+        except OSError as e:
+            if e.errno == errno.ENOENT:
+                # No package.py file here.
+                return None
+            elif e.errno == errno.EACCES:
+                tty.warn("Can't read package file %s." % pkg_file)
+                return None
+            raise e
+
+        # If it's not a file, skip it.
+        if stat.S_ISDIR(sinfo.st_mode):
+            return None
+
+        return PackageStats(sinfo.st_mtime, sinfo.st_size)
+
     def __getitem__(self, item):
         return self._packages_to_stats[item]
 
@@ -224,14 +406,350 @@ class TagIndex(Mapping):
         package = spack.repo.get(pkg_name)
 
         # Remove the package from the list of packages, if present
-        for pkg_list in self._tag_dict.values():
-            if pkg_name in pkg_list:
-                pkg_list.remove(pkg_name)
+        self.remove_package(pkg_name)
 
         # Add it again under the appropriate tags
         for tag in getattr(package, 'tags', []):
             self._tag_dict[tag].append(package.name)
 
+    def remove_package(self, pkg_name):
+        """Removes a package from the tag index, if present.
+
+        Args:
+            pkg_name (str): name of the package, with or without namespace
+        """
+        # Packages are listed without their namespace
+        pkg_name = pkg_name.rpartition('.')[2]
+        for pkg_list in self._tag_dict.values():
+            if pkg_name in pkg_list:
+                pkg_list.remove(pkg_name)
+
+    def merge(self, other):
+        """Merge another TagIndex into this one."""
+        for tag, pkg_list in other._tag_dict.items():
+            own_list = self._tag_dict[tag]
+            own_list.extend(p for p in pkg_list if p not in own_list)
+
+
+#: Variant information kept in a PackageMetadata
+VariantMetadata = collections.namedtuple(
+    'VariantMetadata', ['default', 'allowed_values', 'description'])
+
+
+class PackageMetadata(object):
+    """Declarative information about a package that can be used without
+    importing its ``package.py`` file.
+
+    This holds what the directives and the class attributes of a package
+    record: versions, variants, dependencies, virtual packages provided,
+    extendees, tags, docstring, homepage and url.  It mimics the parts of
+    the ``Package`` interface needed by commands like ``spack info``.
+    """
+
+    def __init__(self, d):
+        self._dict = d
+
+        self.name = d['name']
+        self.namespace = d['namespace']
+        self.build_system_class = d['build_system_class']
+        self.homepage = d['homepage']
+        self.url = d['url']
+        self.list_url = d['list_url']
+        self.maintainers = d['maintainers']
+        self.tags = d['tags']
+        self.phases = d['phases']
+        self.extendees = d['extendees']
+        self.__doc__ = d['doc']
+
+        #: Maps dependency names to the possible types of the dependency
+        self.dependencies = dict(
+            (name, tuple(types)) for name, types in d['dependencies'].items())
+
+        self.variants = dict(
+            (name, VariantMetadata(**v)) for name, v in d['variants'].items())
+
+        self.versions = {}
+        self.fetchers = {}
+        for v in d['versions']:
+            version = Version(v["version"])
+            self.versions[version] = {'preferred': v['preferred']}
+            self.fetchers[version] = v['fetcher']
+
+    @property
+    def fullname(self):
+        return '{0}.{1}'.format(self.namespace, self.name)
+
+    @property
+    def provided(self):
+        """Maps provided virtual specs to the set of specs saying when."""
+        return dict(
+            (spack.spec.Spec(vspec), set(spack.spec.Spec(w) for w in whens))
+            for vspec, whens in self._dict['provided'].items())
+
+    def dependencies_of_type(self, *deptypes):
+        """Names of the dependencies that can have any of these deptypes."""
+        return [name for name, types in self.dependencies.items()
+                if any(dt in types for dt in deptypes)]
+
+    def format_doc(self, **kwargs):
+        """Wrap doc string at 72 characters and format nicely"""
+        indent = kwargs.get('indent', 0)
+
+        if not self.__doc__:
+            return ""
+
+        doc = re.sub(r'\s+', ' ', self.__doc__)
+        lines = textwrap.wrap(doc, 72)
+        return ''.join((" " * indent) + line + "\n" for line in lines)
+
+    def possible_dependencies(self, transitive=True, visited=None):
+        """Return set of possible transitive dependencies of this package.
+
+        See ``PackageBase.possible_dependencies``.
+        """
+        return possible_dependencies(self, transitive, visited)
+
+    def to_dict(self):
+        return self._dict
+
+    @staticmethod
+    def from_package(pkg):
+        """Collect the metadata of a package instance."""
+        import spack.fetch_strategy as fs
+
+        versions = []
+        for v in sorted(pkg.versions):
+            try:
+                fetcher = str(fs.for_package_version(pkg, v))
+            except spack.error.SpackError:
+                fetcher = None
+            versions.append({
+                'version': str(v),
+                'preferred': pkg.versions[v].get('preferred', False),
+                'fetcher': fetcher
+            })
+
+        dependencies = {}
+        for name, conditions in pkg.dependencies.items():
+            types = set()
+            for dep in conditions.values():
+                types.update(dep.type)
+            dependencies[name] = sorted(types)
+
+        variants = {}
+        for name, v in pkg.variants.items():
+            variants[name] = {
+                'default': v.default,
+                'allowed_values': v.allowed_values,
+                'description': v.description
+            }
+
+        provided = dict(
+            (str(vspec), sorted(str(w) for w in whens))
+            for vspec, whens in pkg.provided.items())
+
+        return PackageMetadata({
+            'name': pkg.name,
+            'namespace': pkg.namespace,
+            'build_system_class': pkg.build_system_class,
+            'doc': pkg.__doc__,
+            'homepage': getattr(pkg, 'homepage', None),
+            'url': getattr(pkg, 'url', None),
+            'list_url': getattr(pkg, 'list_url', None),
+            'maintainers': list(pkg.maintainers),
+            'tags': sorted(getattr(pkg, 'tags', [])),
+            'phases': list(pkg.phases),
+            'extendees': sorted(pkg.extendees),
+            'versions': versions,
+            'variants': variants,
+            'dependencies': dependencies,
+            'provided': provided
+        })
+
+
+def possible_dependencies(pkg, transitive=True, visited=None):
+    """Return set of possible transitive dependencies of a package.
+
+    Dependencies of dependencies are looked up in the package metadata
+    indexes, so no package other than ``pkg`` needs to be loaded.
+
+    Args:
+        pkg: a package, or the metadata of a package
+        transitive (bool): include all transitive dependencies if True,
+            only direct dependencies if False.
+        visited (set): names already found, which are not searched again
+    """
+    if visited is None:
+        visited = set()
+
+    visited.add(pkg.name)
+    for name in pkg.dependencies:
+        spec = spack.spec.Spec(name)
+
+        if not spec.virtual:
+            names = [name]
+        else:
+            names = [p.name for p in spack.repo.providers_for(spec)]
+
+        for dep_name in names:
+            if dep_name in visited:
+                continue
+            visited.add(dep_name)
+            if transitive:
+                dep = spack.repo.get_metadata(dep_name)
+                possible_dependencies(dep, transitive, visited)
+
+    return visited
+
+
+class MetadataIndex(Mapping):
+    """Maps package names to their PackageMetadata."""
+
+    def __init__(self):
+        # Metadata is kept as plain dictionaries, and only wrapped
+        # in PackageMetadata objects when it is looked up.
+        self._metadata = {}
+
+    def to_json(self, stream):
+        json.dump({'packages': self._metadata}, stream)
+
+    @staticmethod
+    def from_json(stream):
+        d = json.load(stream)
+
+        r = MetadataIndex()
+        r._metadata.update(d['packages'])
+
+        return r
+
+    def __getitem__(self, item):
+        return PackageMetadata(self._metadata[item])
+
+    def __iter__(self):
+        return iter(self._metadata)
+
+    def __len__(self):
+        return len(self._metadata)
+
+    def update_package(self, pkg_name):
+        """Updates a package in the metadata index.
+
+        Args:
+            pkg_name (str): name of the package to be updated
+        """
+        package = spack.repo.get(pkg_name)
+        metadata = PackageMetadata.from_package(package)
+        self._metadata[package.name] = metadata.to_dict()
+
+    def remove_package(self, pkg_name):
+        """Removes a package from the metadata index, if present.
+
+        Args:
+            pkg_name (str): name of the package, with or without namespace
+        """
+        self._metadata.pop(pkg_name.rpartition('.')[2], None)
+
+    def merge(self, other):
+        """Merge another MetadataIndex into this one."""
+        self._metadata.update(other._metadata)
+
+
+#: How update_index() builds, changes and serializes a kind of index
+IndexKind = collections.namedtuple(
+    'IndexKind', ['index_class', 'add', 'remove', 'dump', 'load'])
+
+#: The kinds of index kept for each repository, by name
+index_kinds = {
+    'providers': IndexKind(
+        ProviderIndex, ProviderIndex.update, ProviderIndex.remove_provider,
+        ProviderIndex.to_json, ProviderIndex.from_json),
+    'tags': IndexKind(
+        TagIndex, TagIndex.update_package, TagIndex.remove_package,
+        TagIndex.to_json, TagIndex.from_json),
+    'metadata': IndexKind(
+        MetadataIndex, MetadataIndex.update_package,
+        MetadataIndex.remove_package, MetadataIndex.to_json,
+        MetadataIndex.from_json),
+}
+
+#: Below this number of stale packages, indexes are updated serially,
+#: as starting worker processes would take longer than that.
+parallel_index_threshold = 64
+
+
+def _index_in_worker(args):
+    """Index some packages in a worker process of update_index().
+
+    The partial index is returned serialized, since the specs in it
+    can't be pickled.
+    """
+    kind, pkg_names = args
+    index_kind = index_kinds[kind]
+
+    index = index_kind.index_class()
+    for pkg_name in pkg_names:
+        index_kind.add(index, pkg_name)
+
+    stream = StringIO()
+    index_kind.dump(index, stream)
+    return stream.getvalue()
+
+
+def update_index(index, kind, pkg_names, jobs=None):
+    """Update the entries of some packages in an index of a repository.
+
+    Each package has to be loaded to index it, which is slow.  So when
+    there are many of them, e.g. after a ``git pull``, they are indexed
+    by a pool of worker processes, and the partial indexes they return
+    are merged into ``index``.
+
+    Args:
+        index: index to be updated in place
+        kind (str): kind of the index, a key of ``index_kinds``
+        pkg_names (list): fully qualified names of the packages to update
+        jobs (int): number of processes to use; by default there is one
+            per CPU if there are at least ``parallel_index_threshold``
+            packages, and the update is serial otherwise
+    """
+    index_kind = index_kinds[kind]
+
+    if jobs is None:
+        jobs = 1
+        if len(pkg_names) >= parallel_index_threshold:
+            jobs = multiprocessing.cpu_count()
+
+    # Worker processes of a pool can't start pools of their own
+    if multiprocessing.current_process().daemon:
+        jobs = 1
+
+    jobs = min(jobs, len(pkg_names))
+    if jobs <= 1:
+        for pkg_name in pkg_names:
+            index_kind.remove(index, pkg_name)
+            index_kind.add(index, pkg_name)
+        return
+
+    # Several small chunks per process even out slow packages
+    nchunks = min(jobs * 4, len(pkg_names))
+    chunks = [pkg_names[i::nchunks] for i in range(nchunks)]
+
+    pool = multiprocessing.Pool(jobs)
+    try:
+        outputs = pool.map(
+            _index_in_worker, [(kind, c) for c in chunks], chunksize=1)
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+    for pkg_name in pkg_names:
+        index_kind.remove(index, pkg_name)
+
+    for output in outputs:
+        index.merge(index_kind.load(StringIO(output)))
+
 
 @llnl.util.lang.memoized
 def make_provider_index_cache(packages_path, namespace):
@@ -248,8 +766,10 @@ def make_provider_index_cache(packages_path, namespace):
     # Map that goes from package names to stat info
     fast_package_checker = FastPackageChecker(packages_path)
 
-    # Filename of the provider index cache
-    cache_filename = 'providers/{0}-index.yaml'.format(namespace)
+    # Filename of the provider index cache.  It changes with the format
+    # version, so that caches in an older format are not read.
+    cache_filename = 'providers/{0}-index.v{1}.json'.format(
+        namespace, spack.provider_index.json_format_version)
 
     # Compute which packages needs to be updated in the cache
     index_mtime = spack.misc_cache.mtime(cache_filename)
@@ -267,21 +787,19 @@ def make_provider_index_cache(packages_path, namespace):
         # If the provider index exists and doesn't need an update
         # just read from it
         with spack.misc_cache.read_transaction(cache_filename) as f:
-            index = ProviderIndex.from_yaml(f)
+            index = ProviderIndex.from_json(f)
 
     else:
 
         # Otherwise we need a write transaction to update it
         with spack.misc_cache.write_transaction(cache_filename) as (old, new):
 
-            index = ProviderIndex.from_yaml(old) if old else ProviderIndex()
+            index = ProviderIndex.from_json(old) if old else ProviderIndex()
 
-            for pkg_name in needs_update:
-                namespaced_name = '{0}.{1}'.format(namespace, pkg_name)
-                index.remove_provider(namespaced_name)
-                index.update(namespaced_name)
+            update_index(index, 'providers', [
+                '{0}.{1}'.format(namespace, x) for x in needs_update])
 
-            index.to_yaml(new)
+            index.to_json(new)
 
     return index
 
@@ -329,9 +847,69 @@ def make_tag_index_cache(packages_path, namespace):
 
             index = TagIndex.from_json(old) if old else TagIndex()
 
-            for pkg_name in needs_update:
-                namespaced_name = '{0}.{1}'.format(namespace, pkg_name)
-                index.update_package(namespaced_name)
+            update_index(index, 'tags', [
+                '{0}.{1}'.format(namespace, x) for x in needs_update])
+
+            index.to_json(new)
+
+    return index
+
+
+@llnl.util.lang.memoized
+def make_metadata_index_cache(packages_path, namespace):
+    """Lazily updates the package metadata index cache associated with a
+    repository, if need be, then returns it. Caches results for later
+    look-ups.
+
+    Args:
+        packages_path: path of the repository
+        namespace: namespace of the repository
+
+    Returns:
+        instance of MetadataIndex
+    """
+    # Map that goes from package names to stat info
+    fast_package_checker = FastPackageChecker(packages_path)
+
+    # Filename of the metadata index cache
+    cache_filename = 'metadata/{0}-index.json'.format(namespace)
+
+    # Compute which packages needs to be updated in the cache
+    index_mtime = spack.misc_cache.mtime(cache_filename)
+
+    needs_update = [
+        x for x, sinfo in fast_package_checker.items()
+        if sinfo.st_mtime > index_mtime
+    ]
+
+    # Read the old MetadataIndex, or make a new one.
+    index_existed = spack.misc_cache.init_entry(cache_filename)
+
+    if index_existed and not needs_update:
+
+        # If the metadata index exists and doesn't need an update
+        # just read from it
+        with spack.misc_cache.read_transaction(cache_filename) as f:
+            index = MetadataIndex.from_json(f)
+
+        # Packages removed from the repository don't change any mtime
+        # that is checked above, so they are only dropped in memory
+        stale = set(index) - set(fast_package_checker)
+        for pkg_name in stale:
+            index.remove_package(pkg_name)
+
+    else:
+
+        # Otherwise we need a write transaction to update it
+        with spack.misc_cache.write_transaction(cache_filename) as (old, new):
+
+            index = MetadataIndex.from_json(old) if old else MetadataIndex()
+
+            for pkg_name in set(index) - set(fast_package_checker):
+                index.remove_package(pkg_name)
+
+            update_index(index, 'metadata', [
+                '{0}.{1}'.format(namespace, x) for x in needs_update])
 
             index.to_json(new)
 
@@ -580,6 +1158,10 @@ class RepoPath(object):
         """Find a class for the spec's package and return the class object."""
         return self.repo_for_pkg(pkg_name).get_pkg_class(pkg_name)
 
+    def get_metadata(self, pkg_name):
+        """Find the PackageMetadata of a package, without loading it."""
+        return self.repo_for_pkg(pkg_name).get_metadata(pkg_name)
+
     @_autospec
     def dump_provenance(self, spec, path):
         """Dump provenance information for a spec to a particular path.
@@ -691,6 +1273,9 @@ class Repo(object):
         # Index of tags, computed lazily
         self._tag_index = None
 
+        # Index of package metadata, computed lazily
+        self._metadata_index = None
+
         # make sure the namespace for packages in this repo exists.
         self._create_namespace()
 
@@ -896,6 +1481,29 @@ class Repo(object):
 
         return self._tag_index
 
+    @property
+    def metadata_index(self):
+        """A package metadata index with packages from this repo."""
+
+        if self._metadata_index is None:
+            self._metadata_index = make_metadata_index_cache(
+                self.packages_path, self.namespace
+            )
+
+        return self._metadata_index
+
+    def get_metadata(self, pkg_name):
+        """Get the PackageMetadata of a package, without loading it."""
+        namespace, _, pkg_name = pkg_name.rpartition('.')
+        if namespace and (namespace != self.namespace):
+            raise InvalidNamespaceError('Invalid namespace for %s repo: %s'
+                                        % (self.namespace, namespace))
+
+        if not self.exists(pkg_name):
+            raise UnknownPackageError(pkg_name, self)
+
+        return self.metadata_index[pkg_name]
+
     @_autospec
     def providers_for(self, vpkg_spec):
         providers = self.provider_index.providers_for(vpkg_spec)
@@ -973,26 +1581,32 @@ class Repo(object):
 
         """
         if pkg_name not in self._modules:
-            file_path = self.filename_for_package_name(pkg_name)
+            self._modules[pkg_name] = self._load_pkg_module(pkg_name)
 
-            if not os.path.exists(file_path):
-                raise UnknownPackageError(pkg_name, self)
+        return self._modules[pkg_name]
 
-            if not os.path.isfile(file_path):
-                tty.die("Something's wrong. '%s' is not a file!" % file_path)
+    @timed('load package',
+           package=lambda self, pkg_name, **kwargs: pkg_name)
+    def _load_pkg_module(self, pkg_name):
+        """Load the module for a package from its package.py file."""
+        file_path = self.filename_for_package_name(pkg_name)
 
-            if not os.access(file_path, os.R_OK):
-                tty.die("Cannot read '%s'!" % file_path)
+        if not os.path.exists(file_path):
+            raise UnknownPackageError(pkg_name, self)
 
-            # e.g., spack.pkg.builtin.mpich
-            fullname = "%s.%s" % (self.full_namespace, pkg_name)
+        if not os.path.isfile(file_path):
+            tty.die("Something's wrong. '%s' is not a file!" % file_path)
 
-            module = imp.load_source(fullname, file_path)
-            module.__package__ = self.full_namespace
-            module.__loader__ = self
-            self._modules[pkg_name] = module
+        if not os.access(file_path, os.R_OK):
+            tty.die("Cannot read '%s'!" % file_path)
 
-        return self._modules[pkg_name]
+        # e.g., spack.pkg.builtin.mpich
+        fullname = "%s.%s" % (self.full_namespace, pkg_name)
+
+        module = load_package_source(fullname, file_path)
+        module.__package__ = self.full_namespace
+        module.__loader__ = self
+        return module
 
     def get_pkg_class(self, pkg_name):
         """Get the class for the package out of its module.
@@ -67,6 +67,12 @@ schema = {
                 'checksum': {'type': 'boolean'},
                 'dirty': {'type': 'boolean'},
                 'build_jobs': {'type': 'integer', 'minimum': 1},
+                'concurrent_builds': {'type': 'integer', 'minimum': 1},
+                'fetch_jobs': {'type': 'integer', 'minimum': 1},
+                'concretization_cache': {'type': 'boolean'},
+                'package_stats_cache': {'type': 'boolean'},
+                'compiler_version_cache': {'type': 'boolean'},
+                'compiler_probe_timeout': {'type': 'integer', 'minimum': 0},
             }
         },
     },
@@ -103,6 +103,7 @@ import hashlib
 import itertools
 import os
 import re
+import threading
 
 from operator import attrgetter
 from six import StringIO
@@ -116,7 +117,7 @@ from llnl.util.tty.color import cwrite, colorize, cescape, get_color_when
 
 import spack
 import spack.architecture
-import spack.compilers as compilers
+import spack.compilers
 import spack.error
 import spack.parse
 import spack.store
@@ -132,6 +133,7 @@ from spack.util.executable import Executable
 from spack.util.prefix import Prefix
 from spack.util.spack_yaml import syaml_dict
 from spack.util.string import comma_or
+from spack.util.timing import timed
 from spack.variant import MultiValuedVariant, AbstractVariant
 from spack.variant import BoolValuedVariant, substitute_abstract_variants
 from spack.variant import VariantMap, UnknownVariantError
@@ -204,6 +206,10 @@ _any_version = VersionList([':'])
 #: Max integer helps avoid passing too large a value to cyaml.
 maxint = 2 ** (ctypes.sizeof(ctypes.c_int) * 8 - 1) - 1
 
+#: Hashes of non-concrete specs computed within the outermost ongoing
+#: ``dag_hash()`` call of each thread.
+_abstract_hashes = threading.local()
+
 
 def colorize_spec(spec):
     """Returns a spec colorized according to the colors specified in
@@ -1385,18 +1391,44 @@ class Spec(object):
         """Return a hash of the entire spec DAG, including connectivity."""
         if self._hash:
             return self._hash[:length]
-        else:
-            yaml_text = syaml.dump(
-                self.to_node_dict(), default_flow_style=True, width=maxint)
-            sha = hashlib.sha1(yaml_text.encode('utf-8'))
 
-            b32_hash = base64.b32encode(sha.digest()).lower()
-            if sys.version_info[0] >= 3:
-                b32_hash = b32_hash.decode('utf-8')
+        # Hashes of non-concrete specs can't be kept on the spec, as it
+        # may still change.  A spec can't change while it is hashed,
+        # though, so while the outermost call runs we remember hashes
+        # of the non-concrete dependencies shared in the DAG.
+        memo = getattr(_abstract_hashes, 'memo', None)
+        outermost = memo is None
+        if outermost:
+            memo = _abstract_hashes.memo = {}
 
-            if self.concrete:
-                self._hash = b32_hash
-            return b32_hash[:length]
+        try:
+            b32_hash = memo.get(id(self))
+            if b32_hash is None:
+                b32_hash = self._compute_dag_hash()
+                if self.concrete:
+                    self._hash = b32_hash
+                else:
+                    memo[id(self)] = b32_hash
+        finally:
+            if outermost:
+                _abstract_hashes.memo = None
+
+        return b32_hash[:length]
+
+    def _compute_dag_hash(self):
+        """Hash the flow-style YAML of this spec's node dict."""
+        node_dict = self.to_node_dict()
+        try:
+            yaml_text = syaml.dump_flow(node_dict, width=maxint)
+        except ValueError:
+            yaml_text = syaml.dump(
+                node_dict, default_flow_style=True, width=maxint)
+        sha = hashlib.sha1(yaml_text.encode('utf-8'))
+
+        b32_hash = base64.b32encode(sha.digest()).lower()
+        if sys.version_info[0] >= 3:
+            b32_hash = b32_hash.decode('utf-8')
+        return b32_hash
 
     def dag_hash_bit_prefix(self, bits):
         """Get the first <bits> bits of the DAG hash as an integer type."""
@@ -1573,14 +1605,16 @@ class Spec(object):
         return spec
 
     @staticmethod
-    def from_yaml(stream):
+    def from_yaml(stream, fast=False):
         """Construct a spec from YAML.
 
         Parameters:
         stream -- string or file object to read from.
+        fast -- read without line information, using LibYAML if it is
+                available.  Use this for machine-written files.
         """
         try:
-            data = syaml.load(stream)
+            data = syaml.load_fast(stream) if fast else syaml.load(stream)
             return Spec.from_dict(data)
         except MarkedYAMLError as e:
             raise syaml.SpackYAMLError("error parsing YAML spec:", str(e))
@@ -1598,6 +1632,7 @@ class Spec(object):
         except Exception as e:
             raise sjson.SpackJSONError("error parsing JSON spec:", str(e))
 
+    @timed('concretize node', package=lambda self, *args, **kwargs: self.name)
     def _concretize_helper(self, presets=None, visited=None):
         """Recursive helper function for concretize().
            This concretizes everything bottom-up.  As things are
@@ -1657,6 +1692,7 @@ class Spec(object):
             if concrete.name not in dependent._dependencies:
                 dependent._add_dependency(concrete, deptypes)
 
+    @timed('expand virtual packages')
     def _expand_virtual_packages(self):
         """Find virtual packages in this spec, replace them with providers,
            and normalize again to include the provider's (potentially virtual)
@@ -1760,6 +1796,7 @@ class Spec(object):
 
         return changed
 
+    @timed('concretize', package=lambda self, **kwargs: self.name)
     def concretize(self):
         """A spec is concrete if it describes one build of a package uniquely.
         This will ensure that this spec is concrete.
@@ -1787,6 +1824,13 @@ class Spec(object):
         if self._concrete:
             return
 
+        # Reuse an earlier result for the same spec and configuration
+        # NOTE: we import spack.concretize here to avoid init order cycles
+        import spack.concretize
+        cache_key = spack.concretize.concretization_cache_key(self)
+        if cache_key and spack.concretize.read_concretization(cache_key, self):
+            return
+
         changed = True
         force = False
 
@@ -1850,7 +1894,8 @@ class Spec(object):
                 mvar.value = mvar.value + tuple(patches)
                 # FIXME: Monkey patches mvar to store patches order
                 p = getattr(mvar, '_patches_in_order_of_appearance', [])
-                mvar._patches_in_order_of_appearance = dedupe(p + patches)
+                mvar._patches_in_order_of_appearance = list(
+                    dedupe(p + patches))
 
         for s in self.traverse():
             if s.external_module:
@@ -1881,6 +1926,9 @@ class Spec(object):
         for x in self.traverse():
             x.package.spec = x
 
+        if cache_key:
+            spack.concretize.write_concretization(cache_key, self)
+
     def _mark_concrete(self, value=True):
         """Mark this spec and its dependencies as concrete.
 
@@ -2016,6 +2064,9 @@ class Spec(object):
             elif required:
                 raise UnsatisfiableProviderSpecError(required[0], vdep)
 
+    @timed('merge dependency',
+           package=lambda self, dependency, *args, **kwargs: (
+               dependency.spec.name))
     def _merge_dependency(
             self, dependency, visited, spec_deps, provider_index):
         """Merge dependency information from a Package into this Spec.
@@ -2147,6 +2198,7 @@ class Spec(object):
 
         return any_change
 
+    @timed('normalize')
     def normalize(self, force=False):
         """When specs are parsed, any dependencies specified are hanging off
            the root, and ONLY the ones that were explicitly provided are there.
@@ -2223,7 +2275,7 @@ class Spec(object):
 
             # validate compiler in addition to the package name.
             if spec.compiler:
-                if not compilers.supported(spec.compiler):
+                if not spack.compilers.supported(spec.compiler):
                     raise UnsupportedCompilerError(spec.compiler.name)
 
             # Ensure correctness of variants (if the spec is not virtual)
@@ -43,38 +43,67 @@ configuration.
 
 """
 import os
+import sys
+
+from llnl.util.lang import LazyModule
+
 import spack
 import spack.config
 from spack.util.path import canonicalize_path
-from spack.database import Database
-from spack.directory_layout import YamlDirectoryLayout
-from spack.directory_layout import YamlExtensionsLayout
 
 __author__ = "Benedikt Hegner (CERN)"
 __all__ = ['db', 'extensions', 'layout', 'root']
 
 #
-# Read in the config
+# The store is set up on first use.  Building the database and layouts
+# needs most of Spack, and spack.spec imports this module, so doing it at
+# import time would make the import order of those modules matter.
+# The placeholders are replaced by the lazy attributes below.
 #
-config = spack.config.get_config("config")
+root = db = layout = extensions = None
+
+_module = LazyModule(sys.modules[__name__])
+sys.modules[__name__] = _module
+
+
+def _config():
+    return spack.config.get_config("config")
+
 
 #
 # Set up the install path
 #
-root = canonicalize_path(
-    config.get('install_tree', os.path.join(spack.opt_path, 'spack')))
+def _root():
+    return canonicalize_path(
+        _config().get('install_tree', os.path.join(spack.opt_path, 'spack')))
+
 
 #
 # Set up the installed packages database
 #
-db = Database(root)
+def _db():
+    from spack.database import Database
+    return Database(_module.root)
+
 
 #
 # This controls how spack lays out install prefixes and
 # stage directories.
 #
-layout = YamlDirectoryLayout(root,
-                             hash_len=config.get('install_hash_length'),
-                             path_scheme=config.get('install_path_scheme'))
+def _layout():
+    from spack.directory_layout import YamlDirectoryLayout
+    config = _config()
+    return YamlDirectoryLayout(_module.root,
+                               hash_len=config.get('install_hash_length'),
+                               path_scheme=config.get('install_path_scheme'))
+
+
+def _extensions():
+    from spack.directory_layout import YamlExtensionsLayout
+    return YamlExtensionsLayout(_module.root, _module.layout)
+
 
-extensions = YamlExtensionsLayout(root, layout)
+_module.add_lazy_attribute('root', _root)
+_module.add_lazy_attribute('db', _db)
+_module.add_lazy_attribute('layout', _layout)
+_module.add_lazy_attribute('extensions', _extensions)
@@ -0,0 +1,57 @@
+##############################################################################
+# Copyright (c) 2013-2017, Lawrence Livermore National Security, LLC.
+# Produced at the Lawrence Livermore National Laboratory.
+#
+# This file is part of Spack.
+# Created by Todd Gamblin, tgamblin@llnl.gov, All rights reserved.
+# LLNL-CODE-647188
+#
+# For details, see https://github.com/spack/spack
+# Please also see the NOTICE and LICENSE files for our notice and the LGPL.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License (as
+# published by the Free Software Foundation) version 2.1, February 1999.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the IMPLIED WARRANTY OF
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the terms and
+# conditions of the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+##############################################################################
+from six import StringIO
+
+import spack.cmd
+import spack.main
+from spack.main import SpackCommand
+
+commands = SpackCommand('commands')
+
+
+def test_manifest_is_up_to_date():
+    """If this fails, run 'spack commands --update'."""
+    expected = StringIO()
+    spack.cmd.write_manifest(expected)
+
+    with open(spack.cmd.manifest_path) as f:
+        assert f.read() == expected.getvalue()
+
+
+def test_commands_lists_all_commands():
+    out = commands()
+    assert out.split() == [
+        name.replace('_', '-') for name in spack.cmd.all_commands]
+
+
+def test_help_does_not_import_commands(monkeypatch):
+    def get_module(name):
+        raise AssertionError('imported command module: %s' % name)
+    monkeypatch.setattr(spack.cmd, 'get_module', get_module)
+
+    parser = spack.main.make_argument_parser()
+    out = parser.format_help(level='long')
+    for name in ('install', 'commands', 'url'):
+        assert spack.cmd.get_command_info(name).description in out
@@ -0,0 +1,53 @@
+##############################################################################
+# Copyright (c) 2013-2017, Lawrence Livermore National Security, LLC.
+# Produced at the Lawrence Livermore National Laboratory.
+#
+# This file is part of Spack.
+# Created by Todd Gamblin, tgamblin@llnl.gov, All rights reserved.
+# LLNL-CODE-647188
+#
+# For details, see https://github.com/spack/spack
+# Please also see the NOTICE and LICENSE files for our notice and the LGPL.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License (as
+# published by the Free Software Foundation) version 2.1, February 1999.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the IMPLIED WARRANTY OF
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the terms and
+# conditions of the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+##############################################################################
+import pytest
+
+from spack.main import SpackCommand
+
+concretize = SpackCommand('concretize')
+
+
+@pytest.mark.usefixtures('config', 'builtin_mock')
+def test_concretize_from_file(tmpdir, capfd):
+    spec_file = tmpdir.join('specs.txt')
+    spec_file.write('mpileaks  # comment\n\nlibelf\n')
+
+    # capfd interferes with Spack's capturing
+    with capfd.disabled():
+        out = concretize('-f', str(spec_file), 'zmpi')
+    assert 'mpileaks@2.3' in out
+    assert 'libelf@0.8.13' in out
+    assert 'zmpi@1.0' in out
+    assert 'Concretized 3 specs in' in out
+
+
+@pytest.mark.usefixtures('config', 'builtin_mock')
+def test_concretize_reports_failures(capfd):
+    with capfd.disabled():
+        out = concretize('libelf', 'conflict%clang', fail_on_error=False)
+    assert 'libelf@0.8.13' in out
+    assert 'conflict%clang' in out
+    assert '1 specs could not be concretized' in out
+    assert concretize.returncode == 1
@@ -22,11 +22,20 @@
 # License along with this program; if not, write to the Free Software
 # Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
 ##############################################################################
+import os
+import time
+
 import pytest
 from six import iteritems
 
+import llnl.util.filesystem
+
+import spack
+import spack.architecture
+import spack.compiler
 import spack.spec
 import spack.compilers as compilers
+from spack.file_cache import FileCache
 
 
 @pytest.mark.usefixtures('config')
@@ -67,3 +76,113 @@ def test_compiler_flags_from_config_are_grouped():
 
     compiler = compilers.compiler_from_config_entry(compiler_entry)
     assert any(x == '-foo-flag foo-val' for x in compiler.flags['cflags'])
+
+
+@pytest.fixture()
+def version_cache(tmpdir, monkeypatch):
+    """Keep compiler versions in a temporary misc cache."""
+    monkeypatch.setattr(spack, 'misc_cache', FileCache(str(tmpdir)))
+    monkeypatch.setattr(
+        spack.compiler, 'compiler_version_cache_enabled', lambda: True)
+    monkeypatch.setattr(spack.compiler, '_version_cache', {})
+    spack.compiler._read_version_cache.clear()
+    yield
+    spack.compiler._read_version_cache.clear()
+
+
+def test_compiler_version_cache(tmpdir, version_cache):
+    """Compilers are only run again when the binary changes."""
+    log = tmpdir.join('runs')
+    fake_gcc = tmpdir.join('gcc')
+    fake_gcc.write("""\
+#!/bin/sh
+echo run >> %s
+echo 4.5.0
+""" % log)
+    llnl.util.filesystem.set_executable(str(fake_gcc))
+
+    def detect():
+        # Start from what a new Spack process would see
+        spack.compiler._version_cache.clear()
+        spack.compiler._read_version_cache.clear()
+        return spack.compiler.dumpversion(str(fake_gcc))
+
+    def runs():
+        return len(log.readlines()) if log.exists() else 0
+
+    assert detect() == '4.5.0'
+    assert runs() == 1
+
+    # Cached in the misc cache, and found through symlinks, too
+    assert detect() == '4.5.0'
+    link = tmpdir.join('gcc-link')
+    link.mksymlinkto(fake_gcc)
+    assert spack.compiler.dumpversion(str(link)) == '4.5.0'
+    assert runs() == 1
+
+    # A changed binary is run again
+    fake_gcc.write(fake_gcc.read().replace('4.5.0', '4.6.1'))
+    os.utime(str(fake_gcc), (0, 0))
+    assert detect() == '4.6.1'
+    assert runs() == 2
+
+
+def test_find_compilers_with_hung_compiler(tmpdir, version_cache,
+                                           monkeypatch):
+    """A compiler that never reports its version doesn't stall detection.
+    """
+    fake_gcc = tmpdir.join('gcc')
+    fake_gcc.write('#!/bin/sh\necho 4.5.0\n')
+    fake_icc = tmpdir.join('icc')
+    fake_icc.write('#!/bin/sh\nsleep 60\n')
+    for exe in (fake_gcc, fake_icc):
+        llnl.util.filesystem.set_executable(str(exe))
+
+    warnings = []
+    monkeypatch.setattr(spack.compiler, 'compiler_probe_timeout', lambda: 1)
+    monkeypatch.setattr(
+        spack.compiler.tty, 'warn', lambda *args: warnings.append(args))
+
+    start = time.time()
+    fake_os = spack.architecture.OperatingSystem('fake', '1')
+    found = fake_os.find_compilers(str(tmpdir))
+
+    assert time.time() - start < 30
+    assert [str(c.spec) for c in found] == ['gcc@4.5.0']
+    assert found[0].cc == str(fake_gcc)
+
+    # The hung compiler is reported, and its version isn't cached
+    assert len(warnings) == 1
+    assert str(fake_icc) in warnings[0]
+    assert not any(path == str(fake_icc)
+                   for path, probe in spack.compiler._version_cache)
+
+
+def test_probed_versions_are_cached_at_once(tmpdir, version_cache,
+                                            monkeypatch):
+    """The versions of all the probed compilers are written together."""
+    paths = []
+    for version in ('4.5.0', '4.6.1', '5.1.0'):
+        fake_gcc = tmpdir.join('gcc-' + version)
+        fake_gcc.write('#!/bin/sh\necho %s\n' % version)
+        llnl.util.filesystem.set_executable(str(fake_gcc))
+        paths.append(str(fake_gcc))
+
+    writes = []
+    write_transaction = spack.misc_cache.write_transaction
+
+    def count_writes(key):
+        writes.append(key)
+        return write_transaction(key)
+    monkeypatch.setattr(spack.misc_cache, 'write_transaction', count_writes)
+
+    probes = [(spack.compiler.dumpversion, p) for p in paths]
+    versions = spack.compiler.probe_compiler_versions(probes)
+    assert versions == ['4.5.0', '4.6.1', '5.1.0']
+    assert writes == [spack.compiler.version_cache_filename]
+
+    # A new Spack process finds all of them in the cache
+    spack.compiler._version_cache.clear()
+    spack.compiler._read_version_cache.clear()
+    cached = spack.compiler._read_version_cache()
+    assert sorted(cached) == sorted(os.path.realpath(p) for p in paths)
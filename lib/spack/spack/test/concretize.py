@@ -25,7 +25,12 @@
 import pytest
 import spack
 import spack.architecture
+import spack.concretize
+import spack.config
+import spack.error
+import spack.repository
 from spack.concretize import find_spec
+from spack.file_cache import FileCache
 from spack.spec import Spec, CompilerSpec
 from spack.spec import ConflictsInSpecError, SpecError
 from spack.version import ver
@@ -457,3 +462,118 @@ class TestConcretize(object):
         s._concrete = False
 
         assert not s.concrete
+
+
+@pytest.fixture()
+def concretization_cache(tmpdir, monkeypatch):
+    """Enables the concretization cache in a temporary misc cache"""
+    monkeypatch.setattr(spack, 'misc_cache', FileCache(str(tmpdir)))
+    monkeypatch.setattr(
+        spack.concretize, 'concretization_cache_enabled', lambda: True)
+    return tmpdir
+
+
+@pytest.mark.usefixtures('config', 'builtin_mock', 'concretization_cache')
+class TestConcretizationCache(object):
+
+    @pytest.mark.parametrize('abstract', [
+        'mpileaks', 'mpi', 'externaltool%gcc',
+        'patch-several-dependencies', 'dt-diamond'
+    ])
+    def test_cached_result_is_identical(self, abstract, monkeypatch):
+        expected = Spec(abstract)
+        expected.concretize()
+
+        # A second concretization must not run the concretizer
+        def fail(*args, **kwargs):
+            raise AssertionError('concretizer called on a cache hit')
+        monkeypatch.setattr(Spec, 'normalize', fail)
+
+        spec = Spec(abstract)
+        spec.concretize()
+
+        assert spec.concrete
+        assert spec.eq_dag(expected, deptypes=True)
+        assert spec.tree(deptypes='all') == expected.tree(deptypes='all')
+        assert spec.dag_hash() == expected.dag_hash()
+        for s in spec.traverse():
+            assert s.package.spec is s
+            assert s.patches == expected[s.name].patches
+
+    def test_key_depends_on_spec_and_configuration(self, monkeypatch):
+        key = spack.concretize.concretization_cache_key(Spec('mpileaks'))
+        other = spack.concretize.concretization_cache_key(Spec('callpath'))
+        assert key != other
+
+        get_config = spack.config.get_config
+
+        def prefer_clang(section, scope=None):
+            if section == 'packages':
+                return {'all': {'compiler': ['clang']}}
+            return get_config(section, scope)
+        monkeypatch.setattr(spack.config, 'get_config', prefer_clang)
+
+        changed = spack.concretize.concretization_cache_key(Spec('mpileaks'))
+        assert changed != key
+
+    def test_bad_entry_is_ignored(self, concretization_cache):
+        spec = Spec('mpileaks')
+        key = spack.concretize.concretization_cache_key(spec)
+        spack.misc_cache.init_entry(key)
+        with open(spack.misc_cache.cache_path(key), 'w') as f:
+            f.write('{"nodes": []}')
+
+        spec.concretize()
+        assert spec.concrete
+        with open(spack.misc_cache.cache_path(key)) as f:
+            assert 'mpileaks' in f.read()
+
+
+def test_fingerprint_with_package_stats_cache(tmpdir, monkeypatch):
+    """Editing a package changes the key, even with cached stats."""
+    monkeypatch.setattr(spack, 'misc_cache', FileCache(str(tmpdir)))
+    monkeypatch.setattr(
+        spack.repository, 'package_stats_cache_enabled', lambda: True)
+    packages = tmpdir.join('packages')
+    pkg_file = packages.ensure('a', 'package.py')
+    packages.setmtime(1000000000)
+    packages_path = str(packages)
+
+    def fingerprint():
+        # Start from what a new Spack process would see
+        spack.repository.FastPackageChecker._paths_cache.pop(
+            packages_path, None)
+        return spack.concretize._repo_fingerprint.func(packages_path)
+
+    first = fingerprint()
+    assert fingerprint() == first
+
+    # The edit doesn't change the mtime of the packages directory
+    pkg_file.write('# edited\n')
+    pkg_file.setmtime(pkg_file.mtime() + 10)
+    packages.setmtime(1000000000)
+    assert fingerprint() != first
+    spack.repository.FastPackageChecker._paths_cache.pop(packages_path, None)
+
+
+@pytest.mark.usefixtures('config', 'builtin_mock')
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_concretize_specs(jobs):
+    abstract = ['mpileaks', Spec('dt-diamond'), 'patch-a-dependency',
+                'conflict%clang']
+    results = spack.concretize.concretize_specs(abstract, jobs=jobs)
+    assert [str(r.abstract) for r in results] == [str(s) for s in abstract]
+
+    for result in results[:3]:
+        assert not result.abstract.concrete
+        assert result.error is None
+        assert result.seconds >= 0
+
+        expected = result.abstract.concretized()
+        assert result.concrete.concrete
+        assert result.concrete.tree(deptypes='all') == expected.tree(
+            deptypes='all')
+        assert result.concrete.dag_hash() == expected.dag_hash()
+
+    assert results[3].concrete is None
+    assert isinstance(results[3].error, spack.error.SpackError)
@@ -24,6 +24,7 @@
 ##############################################################################
 import collections
 import copy
+import hashlib
 import os
 import shutil
 import re
@@ -37,11 +38,14 @@ from llnl.util.filesystem import remove_linked_tree
 
 import spack
 import spack.architecture
+import spack.config
 import spack.database
 import spack.directory_layout
+import spack.package_prefs
 import spack.platforms.test
 import spack.repository
 import spack.stage
+import spack.store
 import spack.util.executable
 import spack.util.pattern
 from spack.dependency import Dependency
@@ -49,8 +53,14 @@ from spack.package import PackageBase
 from spack.fetch_strategy import FetchStrategyComposite, URLFetchStrategy
 from spack.fetch_strategy import FetchError
 from spack.spec import Spec
+from spack.util.crypto import checksum
 from spack.version import Version
 
+# spack.repo is set up on first use.  Fixtures below swap its contents and
+# the configuration it is read from, so build it now from Spack's own
+# configuration.
+spack.repo.repos
+
 
 #
 # These fixtures are applied to all tests
@@ -399,6 +409,16 @@ def mock_fetch(mock_archive):
     PackageBase.fetcher = orig_fn
 
 
+@pytest.fixture()
+def checksummed_fetch(mock_archive, monkeypatch):
+    """Fetch every package from the mock archive, with a checksum, so
+    that its archives can be cached and mirrored."""
+    digest = checksum(hashlib.md5, mock_archive.archive_file)
+    fetcher = FetchStrategyComposite()
+    fetcher.append(URLFetchStrategy(mock_archive.url, digest=digest))
+    monkeypatch.setattr(PackageBase, 'fetcher', property(lambda s: fetcher))
+
+
 ##########
 # Fake archives and repositories
 ##########
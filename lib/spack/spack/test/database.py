@@ -422,3 +422,232 @@ def test_external_entries_in_db(database):
     assert rec.spec.external_path == '/path/to/external_tool'
     assert rec.spec.external_module is None
     assert rec.explicit is True
+
+
+def test_unchanged_index_is_not_read_again(database, monkeypatch):
+    install_db = database.mock.db
+
+    # Make sure the in-memory data is current before we start counting
+    with install_db.read_transaction():
+        pass
+
+    calls = []
+    original = spack.database.Database._read_from_file
+
+    def counting_read(self, *args, **kwargs):
+        if self is install_db:
+            calls.append(args)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(
+        spack.database.Database, '_read_from_file', counting_read)
+
+    for _ in range(10):
+        with install_db.read_transaction():
+            assert len(install_db.query('mpileaks')) == 3
+    assert len(calls) == 0
+
+    # Rewrite the index through another instance, as another process would
+    other_db = spack.database.Database(install_db.root)
+    other_db.reindex(spack.store.layout)
+
+    with install_db.read_transaction():
+        assert len(install_db.query('mpileaks')) == 3
+    assert len(calls) == 1
+
+
+def test_failed_write_forces_read_on_next_transaction(database):
+    install_db = database.mock.db
+
+    with pytest.raises(Exception):
+        with install_db.write_transaction():
+            install_db._data.clear()
+            raise Exception()
+
+    with install_db.read_transaction():
+        assert len(install_db.query('mpileaks')) == 3
+
+
+def test_query_uses_indexes(database, monkeypatch):
+    install_db = database.mock.db
+
+    checked = []
+    original = spack.spec.Spec.satisfies
+
+    def counting_satisfies(self, other, *args, **kwargs):
+        if self.concrete:
+            checked.append(self.name)
+        return original(self, other, *args, **kwargs)
+
+    with install_db.read_transaction():
+        monkeypatch.setattr(spack.spec.Spec, 'satisfies', counting_satisfies)
+
+        # Only records with a matching name are tested
+        assert len(install_db.query('libelf')) == 1
+        assert set(checked) == set(['libelf'])
+
+        # Virtual queries test only records of possible providers
+        del checked[:]
+        assert len(install_db.query('mpi')) == 3
+        assert set(checked) == set(['mpich', 'mpich2', 'zmpi'])
+
+        # Compiler queries narrow down candidates as well
+        del checked[:]
+        assert install_db.query('%nonexistent') == []
+        assert checked == []
+
+        # Anonymous queries without a compiler still test everything
+        del checked[:]
+        assert len(install_db.query('@1.0:', installed=any)) > 0
+        assert len(checked) == len(install_db._data)
+
+
+def test_indexes_follow_add_and_remove(database, refresh_db_on_exit):
+    install_db = database.mock.db
+
+    concrete_spec = install_db.remove('mpileaks ^zmpi')
+    assert install_db.query('mpileaks ^zmpi', installed=any) == []
+    assert concrete_spec.dag_hash() not in install_db._by_name['mpileaks']
+
+    install_db.add(concrete_spec, spack.store.layout)
+    assert len(install_db.query('mpileaks ^zmpi')) == 1
+    assert concrete_spec.dag_hash() in install_db._by_name['mpileaks']
+
+    compiler = concrete_spec.compiler.name
+    assert len(install_db.query('mpileaks %' + compiler)) == 3
+
+
+def test_reindex_with_process_pool(database, refresh_db_on_exit, monkeypatch):
+    install_db = database.mock.db
+    monkeypatch.setattr(
+        spack.directory_layout, '_min_spec_files_for_pool', 1)
+
+    original = sorted(install_db.query(installed=any))
+
+    progress = []
+    install_db.reindex(
+        spack.store.layout, jobs=2,
+        progress=lambda done, total: progress.append((done, total)))
+
+    assert sorted(install_db.query(installed=any)) == original
+    total = len(spack.store.layout.all_spec_files())
+    assert progress[-1] == (total, total)
+    _check_db_sanity(install_db)
+    install_db._check_ref_counts()
+
+
+def test_specs_are_built_lazily(database):
+    install_db = database.mock.db
+
+    # Read the index into a fresh instance, as a new process would
+    fresh_db = spack.database.Database(install_db.root)
+    with fresh_db.read_transaction():
+        assert not any(r.materialized for r in fresh_db._data.values())
+
+        # Only the spec queried for and its dependencies are built
+        libdwarf = fresh_db.query_one('libdwarf')
+        built = set(k for k, r in fresh_db._data.items() if r.materialized)
+        assert built == set(s.dag_hash() for s in libdwarf.traverse())
+        assert libdwarf.concrete
+        assert libdwarf == install_db.query_one('libdwarf')
+
+        # Writing does not build the remaining specs
+        fresh_db._write(None, None, None)
+        assert len(built) == len(
+            [r for r in fresh_db._data.values() if r.materialized])
+
+    # Dependents are found even if they had not been built yet
+    fresh_db = spack.database.Database(install_db.root)
+    parents = fresh_db.installed_relatives('libelf', 'parents')
+    assert set(s.name for s in parents) == set(
+        ['libdwarf', 'dyninst', 'callpath', 'mpileaks'])
+
+    # Lazily built specs still share their dependency nodes
+    with fresh_db.read_transaction():
+        for rec in fresh_db._data.values():
+            for dep in rec.spec.dependencies():
+                assert fresh_db._data[dep.dag_hash()].spec is dep
+        fresh_db._check_ref_counts()
+
+
+def _journal_lines(db):
+    with open(db._journal_path) as f:
+        return f.readlines()
+
+
+def test_changes_are_journaled(database, refresh_db_on_exit, monkeypatch):
+    install_db = database.mock.db
+    install_db.reindex(spack.store.layout)
+    assert _journal_lines(install_db) == []
+
+    with open(install_db._index_path) as f:
+        index_contents = f.read()
+
+    # Removing a spec appends entries instead of rewriting the index
+    concrete_spec = install_db.remove('mpileaks ^zmpi')
+    with open(install_db._index_path) as f:
+        assert f.read() == index_contents
+    # mpileaks is gone, callpath and zmpi have lower ref counts
+    assert len(_journal_lines(install_db)) == 3
+
+    # Another instance sees the change by replaying the journal
+    other_db = spack.database.Database(install_db.root)
+    with other_db.read_transaction():
+        assert other_db.query('mpileaks ^zmpi', installed=any) == []
+        other_db._check_ref_counts()
+
+    # ... and so does this one, without reading the index again
+    def fail(*args, **kwargs):
+        raise AssertionError('index should not be read again')
+
+    monkeypatch.setattr(other_db, '_read_from_file', fail)
+    install_db.add(concrete_spec, spack.store.layout)
+    install_db.update_explicit(concrete_spec, False)
+    with other_db.read_transaction():
+        assert len(other_db.query('mpileaks ^zmpi')) == 1
+        assert other_db.get_record(concrete_spec).explicit is False
+        other_db._check_ref_counts()
+
+
+def test_journal_is_compacted(database, refresh_db_on_exit, monkeypatch):
+    install_db = database.mock.db
+    install_db.reindex(spack.store.layout)
+    monkeypatch.setattr(spack.database, '_journal_min_entries', 0)
+
+    # Make the journal grow beyond the number of records in the DB
+    spec = install_db.query_one('mpileaks ^mpich')
+    for _ in range(len(install_db._data)):
+        install_db.update_explicit(spec, False)
+        install_db.update_explicit(spec, True)
+
+    assert len(_journal_lines(install_db)) <= len(install_db._data)
+
+    fresh_db = spack.database.Database(install_db.root)
+    with fresh_db.read_transaction():
+        assert fresh_db.get_record(spec).explicit is True
+        assert len(fresh_db._data) == len(install_db._data)
+
+
+def test_journal_ignores_partial_and_stale_entries(
+        database, refresh_db_on_exit):
+    install_db = database.mock.db
+    install_db.reindex(spack.store.layout)
+    install_db.remove('mpileaks ^zmpi')
+
+    # An entry for another generation of the index and a partial entry
+    # from a writer that died are not applied
+    with open(install_db._journal_path, 'a') as f:
+        f.write('{"generation":"stale","key":"%s","record":null}\n' %
+                install_db.query_one('libelf').dag_hash())
+        f.write('{"generation":')
+
+    fresh_db = spack.database.Database(install_db.root)
+    with fresh_db.read_transaction():
+        assert fresh_db.query('mpileaks ^zmpi', installed=any) == []
+        assert len(fresh_db.query('libelf')) == 1
+
+    # The next writer drops the partial entry
+    fresh_db.update_explicit('libelf', True)
+    assert all(line.endswith('}\n') for line in _journal_lines(install_db))
+    with install_db.read_transaction():
+        assert install_db.get_record('libelf').explicit is True
@@ -0,0 +1,126 @@
+##############################################################################
+# Copyright (c) 2013-2017, Lawrence Livermore National Security, LLC.
+# Produced at the Lawrence Livermore National Laboratory.
+#
+# This file is part of Spack.
+# Created by Todd Gamblin, tgamblin@llnl.gov, All rights reserved.
+# LLNL-CODE-647188
+#
+# For details, see https://github.com/spack/spack
+# Please also see the NOTICE and LICENSE files for our notice and the LGPL.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License (as
+# published by the Free Software Foundation) version 2.1, February 1999.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the IMPLIED WARRANTY OF
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the terms and
+# conditions of the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+##############################################################################
+"""Tests for what ``import spack`` loads, and how long it takes."""
+from __future__ import print_function
+
+import os
+import sys
+
+import spack
+import spack.directives
+from spack.util.executable import Executable
+
+#: Imports spack, then prints a ``python -X importtime``-style report of
+#: the modules it loaded and a list of everything in ``sys.modules``.
+import_time_script = """
+import sys
+import time
+
+try:
+    import __builtin__ as builtins
+except ImportError:
+    import builtins
+
+real_import = builtins.__import__
+nested_times = []
+report = []
+
+
+def timed_import(name, *args, **kwargs):
+    if name in sys.modules:
+        return real_import(name, *args, **kwargs)
+
+    nested_times.append(0.0)
+    start = time.time()
+    try:
+        return real_import(name, *args, **kwargs)
+    finally:
+        cumulative = time.time() - start
+        own = cumulative - nested_times.pop()
+        if nested_times:
+            nested_times[-1] += cumulative
+        report.append((own, cumulative, '  ' * len(nested_times) + name))
+
+
+builtins.__import__ = timed_import
+import spack
+builtins.__import__ = real_import
+
+print('import time: self [us] | cumulative | imported package')
+for own, cumulative, name in report:
+    print('import time: %9d | %10d | %s' % (own * 1e6, cumulative * 1e6, name))
+print('modules: ' + ' '.join(sorted(sys.modules)))
+"""
+
+#: Modules that ``import spack`` should leave for their first use
+deferred_modules = [
+    'spack.build_systems',
+    'spack.concretize',
+    'spack.config',
+    'spack.fetch_strategy',
+    'spack.package',
+    'spack.repository',
+    'spack.spec',
+    'spack.store',
+]
+
+
+def test_import_time():
+    """Report what ``import spack`` costs in a fresh interpreter.
+
+    Run ``spack test -s imports.py`` to see the report.
+    """
+    python = Executable(sys.executable)
+    python.add_default_env('PYTHONPATH', os.pathsep.join(sys.path))
+    output = python('-c', import_time_script, output=str)
+
+    report, _, modules = output.rpartition('modules: ')
+    print(report)
+
+    modules = modules.split()
+    assert 'spack' in modules
+    for name in deferred_modules:
+        assert name not in modules
+
+
+def test_lazy_exports():
+    """Names that packages import lazily must match their modules."""
+    for module_name, names in spack.lazy_exports:
+        module = __import__(module_name, fromlist=names)
+        for name in names:
+            assert getattr(spack, name) is getattr(module, name)
+
+    assert set(spack.directives.__all__) <= set(spack.__all__)
+
+
+def test_directives_shadow_submodules():
+    """Packages get directives, not modules, for ``patch`` and friends."""
+    import spack.patch
+    import spack.variant  # noqa: F401
+
+    namespace = {}
+    exec('from spack import *', namespace)
+    for name in ('version', 'patch', 'variant'):
+        assert callable(namespace[name])
@@ -22,10 +22,15 @@
 # License along with this program; if not, write to the Free Software
 # Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
 ##############################################################################
+import multiprocessing
 import os
+import time
+
 import pytest
 
 import spack
+import spack.build_environment
+import spack.installer
 import spack.store
 from spack.spec import Spec
 
@@ -207,3 +212,88 @@ def test_failing_build(install_mockery, mock_fetch):
 
 class MockInstallError(spack.error.SpackError):
     pass
+
+
+def test_concurrent_install(install_mockery, mock_fetch):
+    spec = Spec('mpileaks').concretized()
+    spec.package.do_install(
+        concurrent_builds=3, make_jobs=4, fake=True, explicit=True)
+
+    assert all(s.package.installed for s in spec.traverse())
+    assert all(spack.store.db.get_record(s).explicit == (s is spec)
+               for s in spec.traverse())
+
+
+@pytest.mark.disable_clean_stage_check
+def test_concurrent_install_failure(install_mockery, mock_fetch,
+                                    monkeypatch):
+    """Nothing that depends on a failed package is installed."""
+    spec = Spec('mpileaks').concretized()
+    do_fake_install = spack.package.PackageBase.do_fake_install
+
+    def fail_on_libelf(pkg):
+        if pkg.name == 'libelf':
+            raise spack.build_environment.InstallError('libelf failed')
+        do_fake_install(pkg)
+
+    monkeypatch.setattr(
+        spack.package.PackageBase, 'do_fake_install', fail_on_libelf)
+
+    with pytest.raises(spack.build_environment.InstallError):
+        spec.package.do_install(concurrent_builds=3, fake=True)
+
+    for name in ('libelf', 'libdwarf', 'dyninst', 'callpath', 'mpileaks'):
+        assert not spec[name].package.installed
+    assert spec['mpi'].package.installed
+
+
+def test_install_skips_claimed_dependency(install_mockery, mock_fetch,
+                                          monkeypatch, tmpdir):
+    """A dependency another process claimed is installed by that process."""
+    spec = Spec('mpileaks').concretized()
+    libelf = spec['libelf']
+    claimed = multiprocessing.Event()
+
+    def install_libelf():
+        assert spack.installer.claim(libelf)
+        claimed.set()
+        time.sleep(0.5)
+        libelf.package.do_install(fake=True, install_deps=False)
+        spack.installer.release(libelf)
+
+    other = multiprocessing.Process(target=install_libelf)
+    other.start()
+    assert claimed.wait(10)
+
+    # Builds run in child processes, so record them in a file
+    built_log = tmpdir.join('built')
+    do_fake_install = spack.package.PackageBase.do_fake_install
+
+    def record_install(pkg):
+        built_log.write(pkg.name + '\n', mode='a')
+        do_fake_install(pkg)
+
+    monkeypatch.setattr(
+        spack.package.PackageBase, 'do_fake_install', record_install)
+    monkeypatch.setattr(spack.installer, '_max_wait', 0.2)
+
+    try:
+        spec.package.do_install(fake=True)
+    finally:
+        other.join()
+
+    built = built_log.read().split()
+    assert other.exitcode == 0
+    assert 'libelf' not in built
+    assert 'libdwarf' in built and 'mpileaks' in built
+    assert libelf.package.installed
+
+
+def test_split_make_jobs():
+    # 8 jobs among 3 builds that start at once
+    assert [spack.installer.split_make_jobs(8, 3),
+            spack.installer.split_make_jobs(6, 2),
+            spack.installer.split_make_jobs(3, 1)] == [2, 3, 3]
+
+    # Builds get one job even if all are in use
+    assert spack.installer.split_make_jobs(0, 2) == 1
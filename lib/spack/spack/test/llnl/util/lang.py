@@ -22,10 +22,13 @@
 # License along with this program; if not, write to the Free Software
 # Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
 ##############################################################################
+import sys
+import types
+
 import pytest
 from datetime import datetime, timedelta
 
-from llnl.util.lang import pretty_date, match_predicate
+from llnl.util.lang import pretty_date, match_predicate, LazyModule
 
 
 def test_pretty_date():
@@ -94,3 +97,46 @@ def test_match_predicate():
     with pytest.raises(ValueError):
         matcher = match_predicate(object())
         matcher('foo')
+
+
+def test_lazy_module(monkeypatch):
+    module = types.ModuleType('lazy_test_module')
+    module.eager = 'eager'
+    module.sub = types.ModuleType('lazy_test_module.sub')
+
+    lazy = LazyModule(module)
+    monkeypatch.setitem(sys.modules, 'lazy_test_module', lazy)
+
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return 'value'
+
+    lazy.add_lazy_attribute('value', factory)
+    lazy.add_lazy_attribute('sub', lambda: 'not a module')
+    assert 'value' in dir(lazy)
+    assert not calls
+
+    # Computed once, on first access
+    assert lazy.value == 'value'
+    assert lazy.value == 'value'
+    assert len(calls) == 1
+
+    # Globals of the wrapped module are visible, even if set later
+    assert lazy.eager == 'eager'
+    module.late = 'late'
+    assert lazy.late == 'late'
+    with pytest.raises(AttributeError):
+        lazy.missing
+
+    # Submodules do not shadow lazy attributes of the same name
+    assert lazy.sub == 'not a module'
+    lazy.sub = types.ModuleType('lazy_test_module.sub')
+    assert lazy.sub == 'not a module'
+
+    # Assignment replaces the factory
+    lazy.add_lazy_attribute('other', factory)
+    lazy.other = 'assigned'
+    assert lazy.other == 'assigned'
+    assert len(calls) == 1
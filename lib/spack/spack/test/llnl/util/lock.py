@@ -64,6 +64,7 @@ actually on a shared filesystem.
 import os
 import shutil
 import tempfile
+import time
 import traceback
 import glob
 import getpass
@@ -527,6 +528,52 @@ def test_write_lock_timeout_with_multiple_readers_3_2_ranges(lock_path):
         timeout_write(lock_path, 5, 1))
 
 
+#
+# Test that a timeout of 0 tries to take the lock exactly once.
+#
+def test_nonblocking_acquire(lock_path):
+    def try_write(barrier):
+        lock = Lock(lock_path)
+        barrier.wait()  # wait for lock acquire in first process
+        start = time.time()
+        with pytest.raises(LockError):
+            lock.acquire_write(0)
+        assert time.time() - start < lock_fail_timeout
+        barrier.wait()
+
+        barrier.wait()  # wait for release in first process
+        lock.acquire_write(0)
+        lock.release_write()
+
+    def write_then_release(barrier):
+        lock = Lock(lock_path)
+        lock.acquire_write()
+        barrier.wait()
+        barrier.wait()
+        lock.release_write()
+        barrier.wait()
+
+    multiproc_test(write_then_release, try_write)
+
+
+#
+# Test that releasing one lock on a file keeps other locks on the same
+# file in this process.  POSIX releases all of them if any descriptor
+# of the file is closed.
+#
+def test_release_keeps_other_ranges_locked(lock_path):
+    def hold_two_ranges(barrier):
+        first = Lock(lock_path, 0, 1)
+        second = Lock(lock_path, 1, 1)
+        first.acquire_write()
+        second.acquire_write()
+        first.release_write()
+        barrier.wait()
+        barrier.wait()  # hold the lock until timeout in other procs.
+
+    multiproc_test(hold_two_ranges, timeout_write(lock_path, 1, 1))
+
+
 #
 # Test that read can be upgraded to write.
 #
@@ -838,6 +885,55 @@ def test_transaction_with_context_manager(lock_path):
     assert not vals['exception_fn']
 
 
+def test_transaction_exits_while_lock_is_held(lock_path):
+    lock = Lock(lock_path)
+
+    class TestContextManager(object):
+        def __enter__(self):
+            pass
+
+        def __exit__(self, t, v, tb):
+            vals['exit'] = lock._file is not None
+
+    def exit_fn(t, v, tb):
+        vals['exit_fn'] = lock._file is not None
+
+    for transaction in (ReadTransaction, WriteTransaction):
+        vals = {}
+        with transaction(lock, TestContextManager, exit_fn):
+            pass
+
+        assert vals == {'exit': True, 'exit_fn': True}
+        assert lock._file is None
+
+
+def test_transaction_release_fn_raises(lock_path):
+    lock = Lock(lock_path)
+
+    def enter_fn():
+        vals['entered'] += 1
+
+    def exit_fn(t, v, tb):
+        vals['exited'] += 1
+        if vals['fail']:
+            raise IOError('could not write')
+
+    for transaction in (ReadTransaction, WriteTransaction):
+        vals = {'entered': 0, 'exited': 0, 'fail': True}
+        with pytest.raises(IOError):
+            with transaction(lock, enter_fn, exit_fn):
+                pass
+
+        # The lock is released, and the next transaction starts afresh
+        assert lock._file is None
+        assert lock._reads == 0 and lock._writes == 0
+
+        vals['fail'] = False
+        with transaction(lock, enter_fn, exit_fn):
+            assert lock._file is not None
+        assert vals == {'entered': 2, 'exited': 2, 'fail': False}
+
+
 def test_transaction_with_context_manager_and_exception(lock_path):
     class TestContextManager(object):
         def __enter__(self):
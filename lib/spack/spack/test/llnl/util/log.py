@@ -23,8 +23,13 @@
 # Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
 ##############################################################################
 from __future__ import print_function
+import resource
+import sys
+import time
+
 import pytest
 
+import llnl.util.tty.log
 from llnl.util.tty.log import log_output
 from spack.util.executable import which
 
@@ -98,3 +103,43 @@ def test_log_subproc_and_echo_output(capfd, tmpdir):
 
         with open('foo.txt') as f:
             assert f.read() == 'logged\n'
+
+
+def _children_cpu_time():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def test_log_output_split_across_reads(capfd, tmpdir, monkeypatch):
+    # Make the daemon read a few bytes at a time, so that lines, escapes
+    # and control sequences are all split between reads.
+    monkeypatch.setattr(llnl.util.tty.log, '_chunk_size', 3)
+
+    with tmpdir.as_cwd():
+        with log_output('foo.txt') as logger:
+            sys.stdout.write('\x1b[0;32mgreen\x1b[0m ')
+            sys.stdout.write('line\n')
+            with logger.force_echo():
+                print('echo')
+            print('logged')
+
+        assert capfd.readouterr() == ('echo\n', '')
+
+        with open('foo.txt') as f:
+            assert f.read() == 'green line\necho\nlogged\n'
+
+
+def test_log_output_daemon_sleeps_while_idle(capfd, tmpdir):
+    # The daemon should wait for output instead of polling for it.
+    with tmpdir.as_cwd():
+        before = _children_cpu_time()
+        with log_output('foo.txt'):
+            print('start')
+            time.sleep(1)
+            print('end')
+        cpu_time = _children_cpu_time() - before
+
+        with open('foo.txt') as f:
+            assert f.read() == 'start\nend\n'
+
+    assert cpu_time < 0.5
@@ -31,6 +31,7 @@ from llnl.util.filesystem import join_path
 import spack
 import spack.mirror
 import spack.util.executable
+import spack.util.spack_json as sjson
 from spack.spec import Spec
 from spack.stage import Stage
 from spack.util.executable import which
@@ -157,3 +158,43 @@ class TestMirror(object):
         set_up_package('trivial-install-test-package', mock_archive, 'url')
         check_mirror()
         repos.clear()
+
+
+@pytest.mark.usefixtures('config', 'builtin_mock', 'checksummed_fetch')
+def test_mirror_create_jobs_and_report(tmpdir):
+    mirror_root = str(tmpdir.join('mirror'))
+    report = str(tmpdir.join('report.json'))
+
+    def create():
+        return spack.mirror.create(
+            mirror_root, ['libelf', 'libdwarf'], num_versions=1, jobs=2,
+            report=report)
+
+    present, mirrored, error = create()
+    assert not present and not error
+    assert sorted(s.name for s in mirrored) == ['libdwarf', 'libelf']
+
+    with open(report) as f:
+        data = sjson.load(f)
+    assert data['mirror'] == mirror_root
+    assert data['summary']['mirrored'] == 2
+    assert data['summary']['bytes'] > 0
+    archives = dict((r['spec'].split('@')[0], r['archives'])
+                    for r in data['specs'])
+    libelf_archive = join_path(mirror_root, archives['libelf'][0]['path'])
+    assert os.path.getsize(libelf_archive) == archives['libelf'][0]['size']
+
+    # Archives that are there are not fetched again, unless their
+    # checksum is wrong.
+    with open(libelf_archive, 'w') as f:
+        f.write('partial')
+
+    present, mirrored, error = create()
+    assert [s.name for s in present] == ['libdwarf']
+    assert [s.name for s in mirrored] == ['libelf']
+    assert os.path.getsize(libelf_archive) == archives['libelf'][0]['size']
+
+    with open(report) as f:
+        data = sjson.load(f)
+    assert data['summary']['present'] == 1
+    assert data['summary']['mirrored'] == 1
@@ -0,0 +1,104 @@
+##############################################################################
+# Copyright (c) 2013-2017, Lawrence Livermore National Security, LLC.
+# Produced at the Lawrence Livermore National Laboratory.
+#
+# This file is part of Spack.
+# Created by Todd Gamblin, tgamblin@llnl.gov, All rights reserved.
+# LLNL-CODE-647188
+#
+# For details, see https://github.com/spack/spack
+# Please also see the NOTICE and LICENSE files for our notice and the LGPL.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License (as
+# published by the Free Software Foundation) version 2.1, February 1999.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the IMPLIED WARRANTY OF
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the terms and
+# conditions of the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+##############################################################################
+import os
+
+import pytest
+
+import spack
+import spack.prefetch
+from spack.fetch_strategy import CacheURLFetchStrategy, FsCache
+from spack.spec import Spec
+
+
+@pytest.fixture()
+def download_cache(tmpdir, monkeypatch):
+    """A real, empty download cache."""
+    cache = FsCache(str(tmpdir.join('cache')))
+    monkeypatch.setattr(spack, 'fetch_cache', cache)
+    return cache
+
+
+def cached_archive(cache, spec):
+    return os.path.join(
+        cache.root, spec.name, '%s-%s.tar.gz' % (spec.name, spec.version))
+
+
+@pytest.mark.usefixtures('builtin_mock', 'config', 'checksummed_fetch')
+def test_prefetch_into_cache(download_cache):
+    spec = Spec('libdwarf').concretized()
+    nodes = list(spec.traverse(order='post'))
+
+    with spack.prefetch.prefetching(nodes, 2) as prefetcher:
+        assert prefetcher is not None
+        for s in nodes:
+            spack.prefetch.wait(s)
+            assert spack.prefetch.done(s)
+            assert os.path.isfile(cached_archive(download_cache, s))
+
+    # Nothing is prefetched outside of the block
+    assert spack.prefetch._prefetcher is None
+
+    # The package is now staged from the cache
+    pkg = spec.package
+    try:
+        pkg.do_fetch()
+        assert isinstance(pkg.stage[0].fetcher, CacheURLFetchStrategy)
+    finally:
+        pkg.stage.destroy()
+
+
+@pytest.mark.usefixtures('builtin_mock', 'config', 'checksummed_fetch')
+def test_prefetch_needs_two_jobs(download_cache):
+    spec = Spec('libelf').concretized()
+
+    with spack.prefetch.prefetching([spec], 1) as prefetcher:
+        assert prefetcher is None
+        assert spack.prefetch.done(spec)
+
+    assert not os.path.exists(cached_archive(download_cache, spec))
+
+
+@pytest.mark.usefixtures('builtin_mock', 'config')
+def test_prefetch_skips_uncachable(download_cache, mock_fetch):
+    # The mock fetcher has no checksum, so it can't be cached
+    spec = Spec('libelf').concretized()
+
+    with spack.prefetch.prefetching([spec], 2):
+        spack.prefetch.wait(spec)
+
+    assert not os.path.exists(cached_archive(download_cache, spec))
+
+
+@pytest.mark.usefixtures('checksummed_fetch')
+def test_install_while_prefetching(install_mockery, download_cache):
+    spec = Spec('libdwarf').concretized()
+    nodes = list(spec.traverse(order='post'))
+
+    with spack.prefetch.prefetching(nodes, 2):
+        spec.package.do_install()
+
+    assert all(s.package.installed for s in nodes)
+    assert all(os.path.isfile(cached_archive(download_cache, s))
+               for s in nodes)
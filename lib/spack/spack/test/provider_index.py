@@ -37,10 +37,12 @@ Tests assume that mock packages provide this::
                     mpi@:10.0: set([zmpi])},
     'stuff': {stuff: set([externalvirtual])}}
 """
+import pytest
 from six import StringIO
 
 import spack
-from spack.provider_index import ProviderIndex
+import spack.provider_index
+from spack.provider_index import ProviderIndex, ProviderIndexError
 from spack.spec import Spec
 
 
@@ -92,3 +94,56 @@ def test_copy(builtin_mock):
     p = ProviderIndex(spack.repo.all_package_names())
     q = p.copy()
     assert p == q
+
+
+def test_providers_for_is_memoized(builtin_mock, monkeypatch):
+    p = ProviderIndex(spack.repo.all_package_names())
+    mpi_providers = p.providers_for('mpi@3')
+
+    def fail(*args):
+        raise AssertionError('providers looked up again')
+    monkeypatch.setattr(p, '_find_providers', fail)
+
+    again = p.providers_for(Spec('mpi@3'))
+    assert again == mpi_providers
+
+    # Callers get copies they can modify
+    assert all(a is not b for a, b in zip(again, mpi_providers))
+
+
+def test_providers_for_follows_changes(builtin_mock):
+    p = ProviderIndex(spack.repo.all_package_names())
+    assert Spec('zmpi') in p.providers_for('mpi@3')
+
+    p.remove_provider('zmpi')
+    assert Spec('zmpi') not in p.providers_for('mpi@3')
+
+    p.update('zmpi')
+    assert Spec('zmpi') in p.providers_for('mpi@3')
+
+    q = ProviderIndex()
+    assert q.providers_for('mpi@3') == []
+    q.merge(p)
+    assert Spec('zmpi') in q.providers_for('mpi@3')
+
+
+def test_json_round_trip(builtin_mock):
+    p = ProviderIndex(spack.repo.all_package_names())
+
+    ostream = StringIO()
+    p.to_json(ostream)
+
+    istream = StringIO(ostream.getvalue())
+    q = ProviderIndex.from_json(istream)
+
+    assert p == q
+
+
+def test_json_format_version(builtin_mock, monkeypatch):
+    p = ProviderIndex(spack.repo.all_package_names())
+    ostream = StringIO()
+    p.to_json(ostream)
+
+    monkeypatch.setattr(spack.provider_index, 'json_format_version', 2)
+    with pytest.raises(ProviderIndexError):
+        ProviderIndex.from_json(StringIO(ostream.getvalue()))
@@ -22,10 +22,15 @@
 # License along with this program; if not, write to the Free Software
 # Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
 ##############################################################################
-import spack
+import sys
+import time
 
 import pytest
 
+import spack
+import spack.file_cache
+import spack.repository
+
 
 # Unlike the repo_path fixture defined in conftest, this has a test-level
 # scope rather than a session level scope, since we want to edit the
@@ -74,3 +79,212 @@ def test_repo_pkg_with_unknown_namespace(repo_for_test):
 def test_repo_unknown_pkg(repo_for_test):
     with pytest.raises(spack.repository.UnknownPackageError):
         repo_for_test.get('builtin.mock.nonexistentpackage')
+
+
+@pytest.fixture()
+def pkg_source(tmpdir, monkeypatch):
+    """A package file and an empty misc cache to keep its bytecode in."""
+    monkeypatch.setattr(
+        spack, 'misc_cache', spack.file_cache.FileCache(str(tmpdir)))
+    source = tmpdir.join('package.py')
+    source.write('value = 1\n')
+    return source
+
+
+def test_package_bytecode_is_cached(pkg_source, monkeypatch):
+    fullname = 'spack.pkg.bytecode_test.foo'
+    load = spack.repository.load_package_source
+    try:
+        assert load(fullname, str(pkg_source)).value == 1
+
+        # Loading again uses the cached bytecode, without compiling.
+        def fail(*args, **kwargs):
+            raise AssertionError('package.py compiled again')
+        monkeypatch.setattr(spack.repository, 'compile', fail, raising=False)
+        module = load(fullname, str(pkg_source))
+        monkeypatch.delattr(spack.repository, 'compile')
+        assert module.value == 1
+        assert module.__file__ == str(pkg_source)
+
+        # A changed package.py is compiled again.
+        pkg_source.write('value = 22\n')
+        assert load(fullname, str(pkg_source)).value == 22
+    finally:
+        sys.modules.pop(fullname, None)
+
+
+def test_package_bytecode_is_cached_by_path(pkg_source, monkeypatch):
+    # The same package in another repository or Spack instance
+    other_source = pkg_source.dirpath().join('other', 'package.py')
+    other_source.write('value = 2\n', ensure=True)
+
+    fullname = 'spack.pkg.bytecode_test.baz'
+    load = spack.repository.load_package_source
+    try:
+        assert load(fullname, str(pkg_source)).value == 1
+        assert load(fullname, str(other_source)).value == 2
+
+        # Each keeps its own bytecode
+        def fail(*args, **kwargs):
+            raise AssertionError('package.py compiled again')
+        monkeypatch.setattr(spack.repository, 'compile', fail, raising=False)
+        assert load(fullname, str(pkg_source)).value == 1
+        assert load(fullname, str(other_source)).value == 2
+    finally:
+        sys.modules.pop(fullname, None)
+
+
+def test_package_with_error_is_not_kept(pkg_source):
+    fullname = 'spack.pkg.bytecode_test.bar'
+    pkg_source.write('raise ValueError("broken package")\n')
+    with pytest.raises(ValueError):
+        spack.repository.load_package_source(fullname, str(pkg_source))
+    assert fullname not in sys.modules
+
+
+@pytest.mark.parametrize('name', ['mpich', 'mpileaks', 'extension1'])
+def test_package_metadata(builtin_mock, name):
+    pkg = spack.repo.get(name)
+    metadata = spack.repo.get_metadata(name)
+
+    assert metadata.name == pkg.name
+    assert metadata.namespace == pkg.namespace
+    assert metadata.homepage == pkg.homepage
+    assert metadata.format_doc() == pkg.format_doc()
+    assert set(metadata.versions) == set(pkg.versions)
+    assert set(metadata.variants) == set(pkg.variants)
+    assert set(metadata.dependencies) == set(pkg.dependencies)
+    assert metadata.provided == pkg.provided
+    assert metadata.extendees == sorted(pkg.extendees)
+    for deptype in spack.all_deptypes:
+        assert (sorted(metadata.dependencies_of_type(deptype)) ==
+                sorted(pkg.dependencies_of_type(deptype)))
+
+
+def test_package_metadata_does_not_load_packages(builtin_mock, monkeypatch):
+    expected = spack.repo.get('mpileaks').possible_dependencies()
+
+    def fail(*args, **kwargs):
+        raise AssertionError('package loaded')
+    monkeypatch.setattr(spack.repository.Repo, 'get', fail)
+    monkeypatch.setattr(spack.repository.Repo, 'get_pkg_class', fail)
+
+    metadata = spack.repo.get_metadata('mpileaks')
+    assert metadata.possible_dependencies() == expected
+    assert set(metadata.possible_dependencies(transitive=False)) == set([
+        'mpileaks', 'callpath', 'mpich', 'mpich2', 'multi-provider-mpi',
+        'zmpi'])
+
+
+def test_metadata_index_is_updated(tmpdir, monkeypatch):
+    monkeypatch.setattr(
+        spack, 'misc_cache', spack.file_cache.FileCache(str(tmpdir)))
+    root, namespace = spack.repository.create_repo(
+        str(tmpdir.join('repo')), 'metadata_test_repo')
+    pkg_file = tmpdir.join('repo', 'packages', 'a', 'package.py')
+
+    source = """from spack import *
+
+
+class A(Package):
+    \"\"\"{0}\"\"\"
+    homepage = "http://www.example.com"
+    url = "http://www.example.com/a-1.0.tar.gz"
+
+    version('1.0', '0123456789abcdef0123456789abcdef')
+"""
+
+    def make_index(description, mtime):
+        pkg_file.write(source.format(description), ensure=True)
+        pkg_file.setmtime(mtime)
+
+        # Start from a fresh repository, as a new spack process would
+        spack.repository.FastPackageChecker._paths_cache.clear()
+        monkeypatch.setattr(spack, 'repo', spack.repository.RepoPath(root))
+        repo = spack.repo.repo_for_pkg('a')
+        return spack.repository.make_metadata_index_cache.func(
+            repo.packages_path, repo.namespace)
+
+    index = make_index('First description', 1000000000)
+    assert index['a'].__doc__ == 'First description'
+
+    # A package newer than the index is updated
+    index = make_index('Second description', time.time() + 10)
+    assert index['a'].__doc__ == 'Second description'
+
+
+def test_package_stats_are_cached(tmpdir, monkeypatch):
+    monkeypatch.setattr(
+        spack, 'misc_cache', spack.file_cache.FileCache(str(tmpdir)))
+    monkeypatch.setattr(
+        spack.repository, 'package_stats_cache_enabled', lambda: True)
+    packages = tmpdir.join('packages')
+    packages.ensure('a', 'package.py')
+    dir_mtime = 1000000000
+    packages.setmtime(dir_mtime)
+
+    checker_class = spack.repository.FastPackageChecker
+    packages_path = str(packages)
+
+    def stats():
+        checker_class._paths_cache.pop(packages_path, None)
+        return dict(checker_class(packages_path))
+
+    first = stats()
+    assert list(first) == ['a']
+
+    # As long as the packages directory is unchanged, nothing is scanned
+    create_new_cache = checker_class._create_new_cache
+
+    def fail(self):
+        raise AssertionError('packages scanned again')
+    monkeypatch.setattr(checker_class, '_create_new_cache', fail)
+    assert stats() == first
+
+    # Edits to a package.py are noticed all the same
+    pkg_file = packages.join('a', 'package.py')
+    pkg_file.write('# edited\n')
+    pkg_file.setmtime(pkg_file.mtime() + 10)
+    packages.setmtime(dir_mtime)
+    edited = stats()
+    assert edited['a'].st_mtime == pkg_file.mtime()
+    assert edited['a'].st_size == pkg_file.size()
+    assert stats() == edited
+    monkeypatch.setattr(checker_class, '_create_new_cache', create_new_cache)
+
+    # Adding a package changes the directory, so it is scanned again
+    packages.ensure('b', 'package.py')
+    packages.setmtime(packages.mtime() + 10)
+    assert sorted(stats()) == ['a', 'b']
+
+    # A corrupt or old cache is scanned again, too
+    for content in ('{"mtime": ', '{"packages": {}}'):
+        for cache_file in tmpdir.join('package-stats').listdir('*.json'):
+            cache_file.write(content)
+        assert sorted(stats()) == ['a', 'b']
+    checker_class._paths_cache.pop(packages_path, None)
+
+
+@pytest.mark.parametrize('kind', ['providers', 'tags', 'metadata'])
+def test_parallel_index_update(builtin_mock, kind):
+    names = ['builtin.mock.' + x for x in spack.repo.all_package_names()]
+    index_class = spack.repository.index_kinds[kind].index_class
+
+    serial = index_class()
+    spack.repository.update_index(serial, kind, names, jobs=1)
+
+    # Start from an index with stale entries for some of the packages
+    parallel = index_class()
+    spack.repository.update_index(parallel, kind, names[::3], jobs=1)
+    spack.repository.update_index(parallel, kind, names, jobs=2)
+
+    if kind == 'providers':
+        assert parallel == serial
+    elif kind == 'tags':
+        assert set(parallel) == set(serial)
+        for tag in serial:
+            assert sorted(parallel[tag]) == sorted(serial[tag])
+    else:
+        assert set(parallel) == set(serial)
+        for name in serial:
+            assert parallel[name].to_dict() == serial[name].to_dict()
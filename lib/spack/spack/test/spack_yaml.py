@@ -74,6 +74,16 @@ def test_dict_order(data):
     assert data['config_file']['x86_64'].keys() == expected_order
 
 
+def test_load_fast(data):
+    spec_yaml = syaml.dump(data)
+    fast_data = syaml.load_fast(spec_yaml)
+
+    assert fast_data == data
+    assert fast_data['config_file'].keys() == data['config_file'].keys()
+    assert isinstance(fast_data['config_file'], syaml.syaml_dict)
+    assert not hasattr(fast_data['config_file'], '_start_mark')
+
+
 def test_line_numbers(data):
     def check(obj, start_line, end_line):
         assert obj._start_mark.line == start_line
@@ -108,3 +118,36 @@ def test_yaml_aliases():
 
     # ensure no YAML aliases appear in syaml dumps.
     assert '*id' not in string
+
+
+@pytest.mark.parametrize('data', [
+    syaml.syaml_dict([('zlib', syaml.syaml_dict([
+        ('version', '1.2.11'),
+        ('arch', syaml.syaml_dict([('platform', 'linux'),
+                                   ('platform_os', 'rhel7'),
+                                   ('target', 'x86_64')])),
+        ('parameters', syaml.syaml_dict([('shared', True),
+                                         ('cflags', []),
+                                         ('foo', ['bar', 'baz'])])),
+        ('external', {'path': '/usr', 'module': False})]))]),
+    {'b': 1, 'a': [None, 1.5, '', ' x', 'x: y']},
+    {'versions': ['1.0', '1.0:', ':1.0', '2.3.4', '1e3', '0x1f', '012']},
+    {'words': ['yes', 'no', 'on', 'Off', 'true', 'null', '~', '-', '?']},
+    {'quotes': ["it's", '"quoted"', '#hash', 'a#b', '[list]', '{x}']},
+    {'nested': {'w': {}, 'x': [[], [{}], {'y': ['z']}]}},
+])
+def test_dump_flow_matches_dump(data):
+    maxint = 2 ** 31 - 1
+    expected = syaml.dump(data, default_flow_style=True, width=maxint)
+    assert syaml.dump_flow(data, width=maxint) == expected
+
+
+@pytest.mark.parametrize('data', [
+    {'x' * 200: 'long key'},
+    {'multi\nline': 'key'},
+    {'': 'empty key'},
+    ['not', 'a', 'mapping'],
+])
+def test_dump_flow_rejects_unsupported_data(data):
+    with pytest.raises(ValueError):
+        syaml.dump_flow(data, width=2 ** 31 - 1)
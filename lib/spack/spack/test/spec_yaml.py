@@ -40,6 +40,9 @@ def check_yaml_round_trip(spec):
     spec_from_yaml = Spec.from_yaml(yaml_text)
     assert spec.eq_dag(spec_from_yaml)
 
+    spec_from_yaml = Spec.from_yaml(yaml_text, fast=True)
+    assert spec.eq_dag(spec_from_yaml)
+
 
 def test_simple_spec():
     spec = Spec('mpileaks')
@@ -207,3 +210,44 @@ def reverse_all_dicts(data):
         return type(data)(reverse_all_dicts(elt) for elt in data)
     else:
         return data
+
+
+def _reference_dag_hash(spec):
+    """dag_hash() as it was computed through the full YAML emitter."""
+    import base64
+    import hashlib
+    from spack.spec import maxint
+
+    yaml_text = syaml.dump(
+        spec.to_node_dict(), default_flow_style=True, width=maxint)
+    sha = hashlib.sha1(yaml_text.encode('utf-8'))
+    b32_hash = base64.b32encode(sha.digest()).lower()
+    if not isinstance(b32_hash, str):
+        b32_hash = b32_hash.decode('utf-8')
+    return b32_hash
+
+
+def test_dag_hash_matches_yaml_emitter(config, builtin_mock):
+    specs = ['mpileaks ^zmpi', 'dttop', 'dtuse', 'externaltest',
+             'multivalue_variant foo="bar,baz"', 'mpileaks+debug~opt']
+    for spec in specs:
+        spec = Spec(spec)
+        spec.normalize()
+        for s in spec.traverse():
+            assert s.dag_hash() == _reference_dag_hash(s)
+
+        spec.concretize()
+        for s in spec.traverse():
+            assert s.dag_hash() == _reference_dag_hash(s)
+
+
+def test_abstract_hash_not_kept_after_change(builtin_mock):
+    spec = Spec('mpileaks ^callpath')
+    spec.normalize()
+    before = spec.dag_hash()
+
+    spec['callpath'].versions = Spec('callpath@1.0').versions
+    after = spec.dag_hash()
+
+    assert before != after
+    assert after == _reference_dag_hash(spec)
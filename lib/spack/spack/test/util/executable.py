@@ -0,0 +1,87 @@
+##############################################################################
+# Copyright (c) 2013-2017, Lawrence Livermore National Security, LLC.
+# Produced at the Lawrence Livermore National Laboratory.
+#
+# This file is part of Spack.
+# Created by Todd Gamblin, tgamblin@llnl.gov, All rights reserved.
+# LLNL-CODE-647188
+#
+# For details, see https://github.com/spack/spack
+# Please also see the NOTICE and LICENSE files for our notice and the LGPL.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License (as
+# published by the Free Software Foundation) version 2.1, February 1999.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the IMPLIED WARRANTY OF
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the terms and
+# conditions of the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+##############################################################################
+"""Tests for :py:class:`spack.util.executable.Executable`"""
+import os
+import sys
+import time
+
+import pytest
+
+import llnl.util.filesystem
+
+from spack.util.executable import Executable, ProcessError
+
+
+def test_timeout_kills_child_processes(tmpdir):
+    """Commands that run too long are killed with everything they started.
+    """
+    script = tmpdir.join('hang')
+    script.write("""\
+#!/bin/sh
+echo started
+sleep 60
+""")
+    llnl.util.filesystem.set_executable(str(script))
+    hang = Executable(str(script))
+
+    start = time.time()
+    with pytest.raises(ProcessError) as e:
+        hang(output=str, timeout=0.5)
+
+    # The sleep would keep the output pipe open if it were still running
+    assert time.time() - start < 30
+    assert 'timed out' in str(e.value)
+
+
+def test_timeout_not_reached(tmpdir):
+    script = tmpdir.join('echo')
+    script.write('#!/bin/sh\necho "$@"\n')
+    llnl.util.filesystem.set_executable(str(script))
+
+    assert Executable(str(script))('hi', output=str, timeout=30) == 'hi\n'
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason='needs /proc')
+def test_commands_do_not_inherit_descriptors(tmpdir):
+    """Commands with a timeout may run in several threads at once, e.g. to
+    detect compilers, and must not hold each other's pipes open."""
+    script = tmpdir.join('check')
+    script.write('#!/bin/sh\ntest -e /proc/$$/fd/$1 && echo open || echo no\n')
+    llnl.util.filesystem.set_executable(str(script))
+    check = Executable(str(script))
+
+    # dup2() makes an inheritable copy, out of the way of the shell's fds
+    r, w = os.pipe()
+    fd = 50
+    os.dup2(w, fd)
+    try:
+        assert check(str(fd), output=str, timeout=30) == 'no\n'
+
+        # Other commands keep Popen's default, which differs by version
+        inherited = 'open\n' if sys.version_info < (3, 0, 0) else 'no\n'
+        assert check(str(fd), output=str) == inherited
+    finally:
+        for f in (r, w, fd):
+            os.close(f)
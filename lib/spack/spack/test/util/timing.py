@@ -0,0 +1,124 @@
+##############################################################################
+# Copyright (c) 2013-2017, Lawrence Livermore National Security, LLC.
+# Produced at the Lawrence Livermore National Laboratory.
+#
+# This file is part of Spack.
+# Created by Todd Gamblin, tgamblin@llnl.gov, All rights reserved.
+# LLNL-CODE-647188
+#
+# For details, see https://github.com/spack/spack
+# Please also see the NOTICE and LICENSE files for our notice and the LGPL.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License (as
+# published by the Free Software Foundation) version 2.1, February 1999.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the IMPLIED WARRANTY OF
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the terms and
+# conditions of the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+##############################################################################
+"""Tests for the opt-in timing instrumentation in spack.util.timing."""
+import pytest
+from six import StringIO
+
+import spack.util.timing as timing
+from spack.spec import Spec
+
+
+@pytest.fixture()
+def recording():
+    """Records timed calls for the duration of a test."""
+    timing.clear()
+    timing.enable()
+    yield
+    timing.disable()
+    timing.clear()
+
+
+@timing.timed('outer', package=lambda name, depth: name)
+def outer(name, depth):
+    if depth:
+        outer(name, depth - 1)
+    inner()
+
+
+@timing.timed('inner')
+def inner():
+    pass
+
+
+def test_nothing_recorded_when_disabled():
+    timing.clear()
+    outer('foo', 2)
+    assert timing.phases() == []
+    assert timing.packages() == []
+
+
+def test_record(recording):
+    timing.record('startup', 0.5)
+    timing.record('startup', 0.25)
+    assert timing.phases() == [('startup', 2, 0.75)]
+
+    timing.disable()
+    timing.record('startup', 1.0)
+    assert timing.phases() == [('startup', 2, 0.75)]
+
+
+def test_calls_and_packages_are_recorded(recording):
+    outer('foo', 2)
+    outer('bar', 0)
+
+    calls = dict((name, n) for name, n, _ in timing.phases())
+    assert calls == {'outer': 4, 'inner': 4}
+
+    # Time without a package of its own goes to the enclosing package
+    assert sorted(name for name, _ in timing.packages()) == ['bar', 'foo']
+    total = sum(seconds for _, seconds in timing.packages())
+    outer_seconds = next(s for name, _, s in timing.phases()
+                         if name == 'outer')
+    assert total == pytest.approx(outer_seconds)
+
+
+@pytest.mark.usefixtures('config', 'builtin_mock')
+def test_concretization_is_timed(recording):
+    Spec('mpileaks').concretize()
+
+    phases = [name for name, _, _ in timing.phases()]
+    for phase in ('concretize', 'normalize', 'merge dependency',
+                  'expand virtual packages', 'concretize version'):
+        assert phase in phases
+    assert 'mpileaks' in dict(timing.packages())
+
+    out = StringIO()
+    timing.print_report(out)
+    assert 'merge dependency' in out.getvalue()
+    assert 'mpileaks' in out.getvalue()
+
+
+@pytest.mark.usefixtures('config', 'builtin_mock')
+def test_timed_methods_called_with_keywords(recording):
+    spec = Spec('mpileaks')
+    spec.normalize()
+    spec._concretize_helper(presets={}, visited=set())
+    assert 'concretize node' in [name for name, _, _ in timing.phases()]
+
+
+def test_clear_in_timed_call(recording):
+    @timing.timed('clearing')
+    def clearing():
+        outer('foo', 1)
+        timing.clear()
+
+    outer('bar', 0)
+    clearing()
+    assert timing.phases() == []
+
+    # Calls after clear() are recorded from scratch
+    outer('foo', 0)
+    assert dict((n, c) for n, c, _ in timing.phases()) == {
+        'outer': 1, 'inner': 1}
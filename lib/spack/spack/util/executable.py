@@ -24,7 +24,9 @@
 ##############################################################################
 import os
 import re
+import signal
 import subprocess
+import threading
 from six import string_types
 import sys
 
@@ -34,6 +36,18 @@ import spack.error
 
 __all__ = ['Executable', 'which', 'ProcessError']
 
+#: Serializes process creation on Python 2
+_popen_lock = threading.Lock()
+
+
+def _popen(*args, **kwargs):
+    """``subprocess.Popen``, but only in one thread at a time on Python 2,
+    where ``preexec_fn`` and the pipes of other children are not safe."""
+    if sys.version_info >= (3, 0, 0):
+        return subprocess.Popen(*args, **kwargs)
+    with _popen_lock:
+        return subprocess.Popen(*args, **kwargs)
+
 
 class Executable(object):
     """Class representing a program that can be run on the command line."""
@@ -103,6 +117,10 @@ class Executable(object):
             input: Where to read stdin from
             output: Where to send stdout
             error: Where to send stderr
+            timeout (int or float): Kill the command and raise
+                ``ProcessError`` if it runs for longer than this many
+                seconds.  The command gets its own process group, so
+                that processes it started are killed, too.
 
         Accepted values for input, output, and error:
 
@@ -132,6 +150,8 @@ class Executable(object):
         if isinstance(ignore_errors, int):
             ignore_errors = (ignore_errors, )
 
+        timeout = kwargs.pop('timeout', None)
+
         input  = kwargs.pop('input',  None)
         output = kwargs.pop('output', None)
         error  = kwargs.pop('error',  None)
@@ -168,14 +188,48 @@ class Executable(object):
 
         tty.debug(cmd_line)
 
+        # Commands with a timeout run in their own session.  They may run
+        # in several threads, e.g. to detect compilers, so they must not
+        # inherit each other's pipes, and must not run Python code between
+        # fork and exec where that can be avoided.  Other commands inherit
+        # file descriptors as usual, e.g. a make jobserver.
+        popen_args = {}
+        if timeout:
+            popen_args['close_fds'] = True
+            if sys.version_info >= (3, 2):
+                popen_args['start_new_session'] = True
+            else:
+                popen_args['preexec_fn'] = os.setsid
+
         try:
-            proc = subprocess.Popen(
+            proc = _popen(
                 cmd,
                 stdin=istream,
                 stderr=estream,
                 stdout=ostream,
-                env=env)
-            out, err = proc.communicate()
+                env=env,
+                **popen_args)
+
+            timer, timed_out = None, []
+            if timeout:
+                def kill():
+                    timed_out.append(True)
+                    try:
+                        os.killpg(proc.pid, signal.SIGKILL)
+                    except OSError:
+                        pass  # it just finished
+                timer = threading.Timer(timeout, kill)
+                timer.start()
+
+            try:
+                out, err = proc.communicate()
+            finally:
+                if timer:
+                    timer.cancel()
+
+            if timed_out:
+                raise ProcessError(
+                    'Command timed out after %s seconds:' % timeout, cmd_line)
 
             rc = self.returncode = proc.returncode
             if fail_on_error and rc != 0 and (rc not in ignore_errors):
@@ -27,9 +27,10 @@ This implements a parallel map operation but it can accept more values
 than multiprocessing.Pool.apply() can.  For example, apply() will fail
 to pickle functions if they're passed indirectly as parameters.
 """
-from multiprocessing import Process, Pipe, Semaphore, Value
+from multiprocessing import Process, Pipe, Semaphore, Value, cpu_count
+from multiprocessing.pool import ThreadPool
 
-__all__ = ['spawn', 'parmap', 'Barrier']
+__all__ = ['spawn', 'parmap', 'thread_map', 'Barrier']
 
 
 def spawn(f):
@@ -48,6 +49,31 @@ def parmap(f, X):
     return [p.recv() for (p, c) in pipe]
 
 
+def thread_map(f, X, jobs=None):
+    """Like ``map(f, X)``, but runs ``f`` in a pool of threads.
+
+    Use this instead of ``parmap`` when ``f`` mostly waits on other
+    processes or on I/O: threads are cheap to start, and results need
+    not be sent back through pipes.
+
+    Args:
+        f (function): function to call on each element of ``X``
+        X (list): arguments to ``f``
+        jobs (int): maximum number of threads; defaults to the number
+            of CPUs
+    """
+    X = list(X)
+    if not X:
+        return []
+
+    pool = ThreadPool(min(len(X), jobs or cpu_count()))
+    try:
+        return pool.map(f, X)
+    finally:
+        pool.close()
+        pool.join()
+
+
 class Barrier:
     """Simple reusable semaphore barrier.
 
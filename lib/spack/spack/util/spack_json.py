@@ -45,6 +45,10 @@ def load(stream):
     else:
         load = json.load
 
+    # Python 3's json module already returns str objects, so only
+    # Python 2 needs the conversion pass.
+    if sys.version_info[0] >= 3:
+        return load(stream)
     return _strify(load(stream, object_hook=_strify), ignore_dicts=True)
 
 
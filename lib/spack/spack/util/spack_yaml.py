@@ -30,6 +30,10 @@
 - ``Our load methods use ``OrderedDict`` class instead of YAML's
   default unorderd dict.
 
+- ``load_fast()`` skips the marks and uses LibYAML's C parser when it
+  is available.  It is meant for machine-written files like
+  ``spec.yaml``, where nobody needs line numbers for error messages.
+
 """
 import yaml
 from yaml import Loader, Dumper
@@ -40,7 +44,7 @@ from ordereddict_backport import OrderedDict
 import spack.error
 
 # Only export load and dump
-__all__ = ['load', 'dump', 'SpackYAMLError']
+__all__ = ['load', 'load_fast', 'dump', 'dump_flow', 'SpackYAMLError']
 
 # Make new classes so we can add custom attributes.
 # Also, use OrderedDict instead of just dict.
@@ -155,6 +159,34 @@ OrderedLineLoader.add_constructor(
     'tag:yaml.org,2002:str', OrderedLineLoader.construct_yaml_str)
 
 
+# Use LibYAML's parser for load_fast() if PyYAML was built with it.
+try:
+    from yaml import CLoader as FastBaseLoader
+    fast_loader_uses_libyaml = True
+except ImportError:
+    FastBaseLoader = Loader
+    fast_loader_uses_libyaml = False
+
+
+class OrderedLoader(FastBaseLoader):
+    """YAML loader that preserves order, but not line numbers.
+
+       Mappings read in by this loader are ``syaml_dict`` objects, as
+       with ``OrderedLineLoader``, but nothing is marked and strings
+       are plain ``str`` objects.  Keys are not checked for duplicates.
+
+    """
+
+    def construct_yaml_map(self, node):
+        data = syaml_dict()
+        yield data
+        data.update(self.construct_pairs(node))
+
+
+OrderedLoader.add_constructor(
+    'tag:yaml.org,2002:map', OrderedLoader.construct_yaml_map)
+
+
 class OrderedLineDumper(Dumper):
     """Dumper that preserves ordering and formats ``syaml_*`` objects.
 
@@ -213,11 +245,107 @@ def load(*args, **kwargs):
     return yaml.load(*args, **kwargs)
 
 
+def load_fast(stream):
+    """Load YAML from a string or file without marks.
+
+    This is faster than ``load()`` and uses LibYAML when it is
+    available, but error messages about the returned data cannot point
+    back into the file.
+    """
+    return yaml.load(stream, Loader=OrderedLoader)
+
+
 def dump(*args, **kwargs):
     kwargs['Dumper'] = OrderedLineDumper
     return yaml.dump(*args, **kwargs)
 
 
+#: Memoized flow-style text of scalars, keyed by (type, value).
+_flow_scalars = {}
+
+#: Clear the scalar memo when it gets larger than this.
+_max_flow_scalars = 65536
+
+# Characters that PyYAML considers line breaks in scalars.
+_line_breaks = ('\n', '\r', '\x85')
+
+
+def _flow_scalar(value, width):
+    """Flow-style text of a scalar, as the YAML emitter would write it.
+
+    The emitter's quoting rules are subtle, so each scalar is written
+    by the emitter itself, once, as the only item in a flow sequence.
+    """
+    try:
+        key = (type(value), value)
+        return _flow_scalars[key]
+    except KeyError:
+        pass
+    except TypeError:
+        # unhashable values are not memoized
+        return dump([value], default_flow_style=True, width=width)[1:-2]
+
+    if len(_flow_scalars) > _max_flow_scalars:
+        _flow_scalars.clear()
+    text = dump([value], default_flow_style=True, width=width)[1:-2]
+    _flow_scalars[key] = text
+    return text
+
+
+def _write_flow(data, width, out):
+    """Append the flow-style YAML pieces for ``data`` to ``out``."""
+    if type(data) in (dict, syaml_dict):
+        items = list(data.items())
+        if type(data) is dict:
+            items.sort()
+
+        out.append('{')
+        for i, (key, value) in enumerate(items):
+            # Keys the emitter cannot write as simple keys need the
+            # full emitter.
+            if (type(key) not in (str, syaml_str) or
+                    not key or len(key) >= 128 or
+                    any(c in key for c in _line_breaks)):
+                raise ValueError("Unsupported key for dump_flow: %r" % key)
+            if i:
+                out.append(', ')
+            out.append(_flow_scalar(key, width))
+            out.append(': ')
+            _write_flow(value, width, out)
+        out.append('}')
+
+    elif type(data) in (list, syaml_list):
+        out.append('[')
+        for i, item in enumerate(data):
+            if i:
+                out.append(', ')
+            _write_flow(item, width, out)
+        out.append(']')
+
+    else:
+        out.append(_flow_scalar(data, width))
+
+
+def dump_flow(data, width):
+    """Fast version of ``dump(data, default_flow_style=True, width=width)``.
+
+    The output is identical, but dicts, ``syaml_dict`` objects and lists
+    are written directly instead of going through PyYAML's representer,
+    serializer and emitter.  The top-level object must be a mapping,
+    whose text must not be wider than ``width``.  Raises ValueError for
+    data that only the full emitter can write.
+    """
+    if type(data) not in (dict, syaml_dict):
+        raise ValueError("dump_flow needs a mapping")
+
+    out = []
+    _write_flow(data, width, out)
+    text = ''.join(out)
+    if len(text) > width:
+        raise ValueError("dump_flow output is wider than %d" % width)
+    return text + '\n'
+
+
 class SpackYAMLError(spack.error.SpackError):
     """Raised when there are issues with YAML parsing."""
     def __init__(self, msg, yaml_error):
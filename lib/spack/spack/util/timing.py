@@ -0,0 +1,199 @@
+##############################################################################
+# Copyright (c) 2013-2017, Lawrence Livermore National Security, LLC.
+# Produced at the Lawrence Livermore National Laboratory.
+#
+# This file is part of Spack.
+# Created by Todd Gamblin, tgamblin@llnl.gov, All rights reserved.
+# LLNL-CODE-647188
+#
+# For details, see https://github.com/spack/spack
+# Please also see the NOTICE and LICENSE files for our notice and the LGPL.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License (as
+# published by the Free Software Foundation) version 2.1, February 1999.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the IMPLIED WARRANTY OF
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the terms and
+# conditions of the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+##############################################################################
+"""Opt-in instrumentation of where Spack spends its time.
+
+Functions decorated with ``timed()`` record their calls and wall time
+under a phase name, but only while recording is enabled with
+``enable()`` (``spack --timing``).  When it is disabled, the decorator
+costs one global lookup per call.
+
+Each phase keeps the number of calls and the *inclusive* time, counting
+only the outermost call when a phase recurses.  Time is also charged to
+packages: each timed call charges its *self* time, i.e. without nested
+timed calls, to its own package or to that of the enclosing call.  So
+the times of all packages add up to the total.
+"""
+import functools
+import sys
+import time
+
+__all__ = ['timed', 'record', 'enable', 'disable', 'clear', 'phases',
+           'packages', 'print_report']
+
+#: Whether calls to timed functions are being recorded
+enabled = False
+
+# phase name -> [calls, inclusive seconds]
+_phases = {}
+
+# package name -> self seconds
+_packages = {}
+
+# timed calls in progress, innermost last
+_stack = []
+
+# phase name -> number of calls to it in progress
+_active = {}
+
+
+class _Frame(object):
+    __slots__ = ('phase', 'package', 'start', 'nested')
+
+    def __init__(self, phase, package):
+        self.phase = phase
+        self.package = package
+        self.start = time.time()
+        self.nested = 0.0
+
+
+def enable():
+    """Start recording timed calls."""
+    global enabled
+    enabled = True
+
+
+def disable():
+    """Stop recording timed calls; what was recorded is kept."""
+    global enabled
+    enabled = False
+
+
+def clear():
+    """Forget everything recorded so far, and any calls in progress."""
+    _phases.clear()
+    _packages.clear()
+    del _stack[:]
+    _active.clear()
+
+
+def _start(phase, package):
+    # Time that is not charged to a package of its own goes to the
+    # package of the enclosing call.
+    if package is None and _stack:
+        package = _stack[-1].package
+
+    frame = _Frame(phase, package)
+    _stack.append(frame)
+    _active[phase] = _active.get(phase, 0) + 1
+    return frame
+
+
+def _stop(frame):
+    if not _stack or _stack[-1] is not frame:
+        return  # cleared while the call was running
+
+    elapsed = time.time() - frame.start
+    _stack.pop()
+    _active[frame.phase] -= 1
+
+    record = _phases.setdefault(frame.phase, [0, 0.0])
+    record[0] += 1
+    if not _active[frame.phase]:
+        record[1] += elapsed
+
+    if frame.package is not None:
+        _packages[frame.package] = (_packages.get(frame.package, 0.0) +
+                                    elapsed - frame.nested)
+
+    if _stack:
+        _stack[-1].nested += elapsed
+
+
+def record(phase, seconds):
+    """Record one call to ``phase`` that took ``seconds``.
+
+    This is for time that can't be measured with ``timed()``, like
+    Spack's own startup, which is over before recording is enabled.
+    """
+    if not enabled:
+        return
+
+    entry = _phases.setdefault(phase, [0, 0.0])
+    entry[0] += 1
+    entry[1] += seconds
+
+
+def timed(phase, package=None):
+    """Decorator that records calls to a function under ``phase``.
+
+    Args:
+        phase (str): name under which calls are reported
+        package (callable): optional function that is called with the
+            arguments of each call and returns the name of the package
+            to charge the time to, or None
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+
+            name = package(*args, **kwargs) if package else None
+            frame = _start(phase, name)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                _stop(frame)
+        return wrapper
+    return decorator
+
+
+def phases():
+    """Recorded phases as (name, calls, seconds), slowest first."""
+    return sorted(((name, calls, seconds)
+                   for name, (calls, seconds) in _phases.items()),
+                  key=lambda p: (-p[2], p[0]))
+
+
+def packages():
+    """Recorded packages as (name, seconds), slowest first."""
+    return sorted(_packages.items(), key=lambda p: (-p[1], p[0]))
+
+
+def print_report(stream=None, npackages=20):
+    """Print the time per phase and the slowest packages.
+
+    Args:
+        stream (file): where to write; default is ``sys.stderr``
+        npackages (int): how many packages to show
+    """
+    stream = stream or sys.stderr
+
+    phase_list = phases()
+    if not phase_list:
+        stream.write('No timed calls were recorded.\n')
+        return
+
+    width = max(len(name) for name, _, _ in phase_list)
+    stream.write('%-*s %10s %10s\n' % (width, 'Phase', 'Calls', 'Seconds'))
+    for name, calls, seconds in phase_list:
+        stream.write('%-*s %10d %10.3f\n' % (width, name, calls, seconds))
+
+    package_list = packages()[:npackages]
+    if package_list:
+        width = max(len(name) for name, _ in package_list)
+        stream.write('\n%-*s %10s\n' % (width, 'Package', 'Seconds'))
+        for name, seconds in package_list:
+            stream.write('%-*s %10.3f\n' % (width, name, seconds))
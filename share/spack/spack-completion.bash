@@ -115,8 +115,9 @@ function _spack {
     if $list_options
     then
         compgen -W "-h --help -d --debug -D --pdb -k --insecure -m --mock -p
-                    --profile -v --verbose -s --stacktrace -V --version
-                    --color --color=always --color=auto --color=never" -- "$cur"
+                    --profile --timing -v --verbose -s --stacktrace -V
+                    --version --color --color=always --color=auto
+                    --color=never" -- "$cur"
     else
         compgen -W "$(_subcommands)" -- "$cur"
     fi
@@ -226,6 +227,10 @@ function _spack_clean {
     fi
 }
 
+function _spack_commands {
+    compgen -W "-h --help --update" -- "$cur"
+}
+
 function _spack_compiler {
     if $list_options
     then
@@ -278,6 +283,15 @@ function _spack_compilers {
     compgen -W "-h --help --scope" -- "$cur"
 }
 
+function _spack_concretize {
+    if $list_options
+    then
+        compgen -W "-h --help -f --file -j --jobs" -- "$cur"
+    else
+        compgen -W "$(_all_packages)" -- "$cur"
+    fi
+}
+
 function _spack_config {
     if $list_options
     then
@@ -333,7 +347,7 @@ function _spack_debug {
     then
         compgen -W "-h --help" -- "$cur"
     else
-        compgen -W "create-db-tarball" -- "$cur"
+        compgen -W "create-db-tarball index-load provider-index" -- "$cur"
     fi
 }
 
@@ -341,6 +355,14 @@ function _spack_debug_create_db_tarball {
     compgen -W "-h --help" -- "$cur"
 }
 
+function _spack_debug_index_load {
+    compgen -W "-h --help -n --repeat" -- "$cur"
+}
+
+function _spack_debug_provider_index {
+    compgen -W "-h --help" -- "$cur"
+}
+
 function _spack_dependents {
     if $list_options
     then
@@ -397,7 +419,7 @@ function _spack_fetch {
     if $list_options
     then
         compgen -W "-h --help -n --no-checksum -m --missing
-                    -D --dependencies" -- "$cur"
+                    -D --dependencies -j --jobs" -- "$cur"
     else
         compgen -W "$(_all_packages)" -- "$cur"
     fi
@@ -454,8 +476,10 @@ function _spack_info {
 function _spack_install {
     if $list_options
     then
-        compgen -W "-h --help --only -j --jobs --keep-prefix --keep-stage
-                    -n --no-checksum -v --verbose --fake --clean --dirty
+        compgen -W "-h --help --only -j --jobs --concurrent-builds
+                    --fetch-jobs --keep-prefix --keep-stage -n --no-checksum
+                    -v --verbose
+                    --fake --clean --dirty
                     --run-tests --log-format --log-file --source" -- "$cur"
     else
         compgen -W "$(_all_packages)" -- "$cur"
@@ -518,7 +542,8 @@ function _spack_mirror_create {
     if $list_options
     then
         compgen -W "-h --help -d --directory -f --file
-                    -D --dependencies -o --one-version-per-spec" -- "$cur"
+                    -D --dependencies -o --one-version-per-spec
+                    -j --jobs --report" -- "$cur"
     else
         compgen -W "$(_all_packages)" -- "$cur"
     fi
@@ -651,7 +676,7 @@ function _spack_python {
 }
 
 function _spack_reindex {
-    compgen -W "-h --help" -- "$cur"
+    compgen -W "-h --help -j --jobs" -- "$cur"
 }
 
 function _spack_repo {
@@ -806,7 +831,7 @@ function _spack_use {
 function _spack_versions {
     if $list_options
     then
-        compgen -W "-h --help" -- "$cur"
+        compgen -W "-h --help -s --safe-only" -- "$cur"
     else
         compgen -W "$(_all_packages)" -- "$cur"
     fi
@@ -884,7 +909,14 @@ function _spack_view_symlink {
 # Helper functions for subcommands
 
 function _subcommands {
-    spack help --all | grep "^  [a-z]" | awk '{print $1}' | grep -v spack
+    # Read the command manifest directly, so Spack doesn't have to start
+    local manifest="$SPACK_ROOT/lib/spack/spack/cmd/manifest.txt"
+    if [[ -r "$manifest" ]]
+    then
+        grep -v "^#" "$manifest" | cut -f1
+    else
+        spack commands
+    fi
 }
 
 function _all_packages {